@@ -0,0 +1,97 @@
+"""
+Benchmark company-name matching against a local DuckDB Crunchbase stand-in.
+
+Compares the legacy ILIKE OR-chain with the bulk normalized-key join for 30, 300 and
+3,000 candidate names:
+
+    python -m benchmarks.bench_enrich --orgs 200000
+"""
+import argparse
+import json
+import random
+import time
+
+import duckdb
+
+from niche_enrichment import enrich, enrich_ilike, match_companies, match_provenance
+
+WORDS = ["acme", "global", "blue", "river", "summit", "green", "valley", "pioneer", "atlas", "harbor",
+         "prime", "north", "star", "united", "metro", "cedar", "iron", "golden", "silver", "coastal",
+         "foods", "logistics", "health", "systems", "energy", "farms", "labs", "capital", "motors", "media"]
+SUFFIXES = ["", "", "", " Inc.", " LLC", " Ltd", " Corp", " Co", " Holdings"]
+CANDIDATE_SIZES = [30, 300, 3000]
+
+
+def make_org_names(count, seed=0):
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        words = rng.sample(WORDS, rng.randint(2, 3)) + [str(rng.randint(1, 999))]
+        names.add(" ".join(word.capitalize() for word in words) + rng.choice(SUFFIXES))
+    return sorted(names)
+
+
+def build_fixture(org_count, seed=0):
+    """Create an in-memory DuckDB organization_summary-like table."""
+    conn = duckdb.connect()
+    conn.execute('create table organization_summary ("UUID" varchar, name varchar, "SHORT_DESCRIPTION" varchar)')
+    rows = [(f"uuid-{i}", name, f"{name} is a company.") for i, name in enumerate(make_org_names(org_count, seed))]
+    conn.executemany("insert into organization_summary values (?, ?, ?)", rows)
+    return conn, [name for _, name, _ in rows]
+
+
+def make_candidates(org_names, count, seed=0):
+    """Mix exact names, suffix/case variants, word prefixes and misses, like run_graph output."""
+    rng = random.Random(seed + count)
+    candidates = []
+    for name in rng.sample(org_names, count):
+        roll = rng.random()
+        if roll < 0.4:
+            candidates.append(name)
+        elif roll < 0.7:
+            candidates.append(name.upper().split(" INC")[0])
+        elif roll < 0.9:
+            candidates.append(" ".join(name.split()[:2]))
+        else:
+            candidates.append(f"Unknown Company {rng.randint(0, 10 ** 6)}")
+    return candidates
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(org_count=100000, sizes=CANDIDATE_SIZES, seed=0):
+    conn, org_names = build_fixture(org_count, seed)
+    results = []
+    for size in sizes:
+        candidates = make_candidates(org_names, size, seed)
+        matches, bulk_seconds = timed(lambda: match_companies(candidates, conn=conn, table="organization_summary",
+                                                              dialect="duckdb"))
+        provenance = match_provenance(matches, candidates)
+        legacy, ilike_seconds = timed(lambda: enrich_ilike(candidates, conn=conn, table="organization_summary"))
+        results.append({
+            "candidates": size,
+            "orgs": org_count,
+            "bulk_seconds": round(bulk_seconds, 4),
+            "ilike_seconds": round(ilike_seconds, 4),
+            "bulk_rows": len(enrich(candidates, conn=conn, table="organization_summary", dialect="duckdb")[0]),
+            "ilike_rows": len(legacy),
+            "match_types": provenance["MATCH_TYPE"].value_counts().to_dict(),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orgs", type=int, default=100000, help="rows in the DuckDB fixture")
+    parser.add_argument("--out", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(org_count=args.orgs)
+    print(json.dumps(results, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
@@ -0,0 +1,316 @@
+"""
+Offline fixtures for the benchmarks: feed and page files, a local HTTP server that
+serves them, and a chat model that replays recorded (or synthesized) responses.
+
+Fixture directory layout:
+
+    feeds/<slug>.xml             Google News RSS for a query  -> /rss?q=<query>
+    nitter/<slug>.html           Nitter search results        -> /search?f=tweets&q=<keyword>+usa
+    nitter/<slug>-<cursor>.html  Their following pages        -> ...&cursor=<cursor>
+    truth.html                   Truth Social timeline        -> /@realDonaldTrump
+    llm.jsonl                    {"key", "content"} LLM responses (see RecordingChatModel)
+
+write_fixtures() synthesizes a deterministic set; record_feeds(), record_nitter_pages()
+and RecordingChatModel capture real responses once so later runs replay them.
+"""
+import ast
+import hashlib
+import html
+import json
+import os
+import random
+import re
+import threading
+import time
+from email.utils import format_datetime, formatdate, parsedate_to_datetime
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, quote_plus
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import Runnable, RunnableLambda
+
+WORDS = ["tariffs", "beef", "prices", "supply", "chain", "restaurants", "imports", "steel", "shipping",
+         "inflation", "labor", "energy", "retail", "demand", "drought", "exports", "rates", "consumers"]
+SOURCES = ["Reuters", "AP News", "Bloomberg", "CNBC", "WSJ"]
+
+
+def slug(text):
+    return re.sub(r"[^a-z0-9]+", "-", " ".join(text.lower().split())).strip("-") or "empty"
+
+
+def _sentence(rng, words=8):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def make_rss(query, items=50, seed=0, now=None):
+    """Google News-shaped RSS document with `items` articles from the last few days."""
+    rng = random.Random(f"{seed}-{query}")
+    now = now or datetime.now(timezone.utc)
+    entries = []
+    for i in range(items):
+        published = now - timedelta(hours=rng.uniform(0, 96))
+        title = f"{_sentence(rng)} - {rng.choice(SOURCES)}"
+        entries.append(
+            f"<item><title>{html.escape(title)}</title>"
+            f"<link>https://news.example.com/articles/{slug(query)}-{i}?oc=5</link>"
+            f"<guid>{slug(query)}-{i}</guid>"
+            f"<pubDate>{format_datetime(published)}</pubDate></item>")
+    return ('<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>\"{html.escape(query)}\" - Google News</title>{''.join(entries)}</channel></rss>")
+
+
+def nitter_cursor(page):
+    return f"DAAD{page:04d}"
+
+
+def make_nitter_page(keyword, tweets=20, seed=0, page=0, pages=1):
+    """
+    Nitter search results page `page` of `pages`, in Nitter's server-rendered markup:
+    timeline items with nested links in the tweet content, a "Load newest" link on
+    later pages and a "Load more" cursor link while more pages follow.
+    """
+    rng = random.Random(f"{seed}-{keyword}-{page}")
+    query = f"f=tweets&amp;q={html.escape(quote_plus(keyword))}+usa"
+    items = [f'<div class="timeline-item show-more"><a href="?{query}">Load newest</a></div>'] if page else []
+    for i in range(tweets):
+        user = f"user{rng.randrange(1000)}"
+        items.append(
+            f'<div class="timeline-item " data-username="{user}">'
+            f'<a class="tweet-link" href="/{user}/status/{page}{i:04d}#m"></a><div class="tweet-body">'
+            f'<div class="tweet-header"><a class="fullname" href="/{user}">{user.title()}</a>'
+            f'<span class="tweet-date"><a href="/{user}/status/{page}{i:04d}#m">{i + 1}h</a></span></div>'
+            f'<div class="tweet-content media-body" dir="auto">{html.escape(_sentence(rng, 16))} '
+            f'<a href="/search?q=%23{slug(keyword)}">#{slug(keyword)}</a></div>'
+            f'<div class="tweet-stats"><span class="tweet-stat">{rng.randrange(50)}</span></div></div></div>')
+    if page + 1 < pages:
+        items.append(f'<div class="show-more"><a href="?{query}&amp;cursor={nitter_cursor(page + 1)}">Load more</a>'
+                     f'</div>')
+    return (f'<html><head><title>Search - Nitter</title></head><body><div class="container">'
+            f'<div class="timeline-container"><div class="timeline">{"".join(items)}</div></div></div></body></html>')
+
+
+def make_truth_page(posts=12, seed=0):
+    rng = random.Random(seed)
+    items = "".join(f'<div class="status" aria-label="{html.escape(_sentence(rng, 20))} {i}"></div>'
+                    for i in range(posts))
+    return f'<html><body><div id="timeline">{items}</div></body></html>'
+
+
+def nitter_page_name(keyword, cursor=None):
+    return f"{slug(keyword)}-{slug(cursor)}.html" if cursor else f"{slug(keyword)}.html"
+
+
+def write_fixtures(directory, queries, items_per_feed=50, tweets_per_page=20, nitter_pages=3, seed=0):
+    """Write synthetic feeds and pages for `queries` into `directory` (existing files are kept)."""
+    for sub in ["feeds", "nitter"]:
+        os.makedirs(os.path.join(directory, sub), exist_ok=True)
+    for query in queries:
+        feed_path = os.path.join(directory, "feeds", f"{slug(query)}.xml")
+        if not os.path.exists(feed_path):
+            with open(feed_path, "w", encoding="utf-8") as file:
+                file.write(make_rss(query, items_per_feed, seed))
+        for page in range(nitter_pages):
+            cursor = nitter_cursor(page) if page else None
+            page_path = os.path.join(directory, "nitter", nitter_page_name(query, cursor))
+            if not os.path.exists(page_path):
+                with open(page_path, "w", encoding="utf-8") as file:
+                    file.write(make_nitter_page(query, tweets_per_page, seed, page, nitter_pages))
+    truth_path = os.path.join(directory, "truth.html")
+    if not os.path.exists(truth_path):
+        with open(truth_path, "w", encoding="utf-8") as file:
+            file.write(make_truth_page(seed=seed))
+
+
+def record_feeds(queries, directory):
+    """Download the real Google News feeds for `queries` once, to replay them offline later."""
+    from feed_fetcher import fetch_raw_feeds
+
+    os.makedirs(os.path.join(directory, "feeds"), exist_ok=True)
+    for query, body in fetch_raw_feeds(queries, cache=False).items():
+        if isinstance(body, bytes):
+            with open(os.path.join(directory, "feeds", f"{slug(query)}.xml"), "wb") as file:
+                file.write(body)
+
+
+def record_nitter_pages(keywords, directory, pages=3):
+    """Save the real Nitter search pages for `keywords`, following their cursors, to replay offline later."""
+    import scrapers
+    from clients import get_http_client
+
+    os.makedirs(os.path.join(directory, "nitter"), exist_ok=True)
+    for keyword in keywords:
+        params, cursor = f"?f=tweets&q={quote_plus(keyword)}+usa", None
+        for _ in range(pages):
+            response = get_http_client().get(f"{scrapers.NITTER_INSTANCE}/search{params}",
+                                             headers=scrapers.NITTER_HEADERS, follow_redirects=True)
+            response.raise_for_status()
+            with open(os.path.join(directory, "nitter", nitter_page_name(keyword, cursor)), "wb") as file:
+                file.write(response.content)
+            params = scrapers.parse_nitter_page(response.content)[1]
+            if not params:
+                break
+            cursor = parse_qs(params.lstrip("?"))["cursor"][0]
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    directory = "."
+    latency = 0.0
+    requests = None  # (path, status) of every request, shared with the server
+
+    def _not_modified(self, etag, modified):
+        """Whether the request's validators match the file, as a conditional GET."""
+        if self.headers.get("If-None-Match"):
+            return self.headers["If-None-Match"] == etag
+        since = self.headers.get("If-Modified-Since")
+        try:
+            return since is not None and int(modified) <= parsedate_to_datetime(since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    def send_response(self, code, message=None):
+        self.requests.append((self.path, code))
+        super().send_response(code, message)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if url.path == "/rss":
+            path, content_type = os.path.join("feeds", f"{slug(params.get('q', [''])[0])}.xml"), "application/rss+xml"
+        elif url.path == "/search":
+            keyword = re.sub(r"\s+usa$", "", params.get("q", [""])[0])
+            path = os.path.join("nitter", nitter_page_name(keyword, params.get("cursor", [None])[0]))
+            content_type = "text/html"
+        elif url.path.startswith("/@"):
+            path, content_type = "truth.html", "text/html"
+        else:
+            path, content_type = None, None
+        full_path = os.path.join(self.directory, path) if path else None
+        if self.latency:
+            time.sleep(self.latency)
+        if not full_path or not os.path.exists(full_path):
+            self.send_error(404)
+            return
+        with open(full_path, "rb") as file:
+            body = file.read()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        modified = os.path.getmtime(full_path)
+        if self._not_modified(etag, modified):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(modified, usegmt=True))
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """
+    Serve a fixture directory on 127.0.0.1 in a background thread.
+
+    Files are served with ETag and Last-Modified validators and conditional GETs are
+    answered with 304 Not Modified, like Google News does.
+
+    Attributes (once started):
+        url (str): Base URL, e.g. http://127.0.0.1:54321.
+        rss_template (str): fetch_raw_feeds url_template pointing at the server.
+        requests (list): (path, status) of every request served.
+    """
+
+    def __init__(self, directory, latency=0.0):
+        self.requests = []
+        handler = type("Handler", (_FixtureHandler,), {"directory": directory, "latency": latency,
+                                                        "requests": self.requests})
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self.rss_template = self.url + "/rss?q={query}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+        return False
+
+
+def _prompt_text(value):
+    return value.to_string() if hasattr(value, "to_string") else str(value)
+
+
+def prompt_key(text):
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def synthetic_response(text):
+    """Deterministic stand-in answer: every third company for classification prompts, {} otherwise."""
+    if "relevant_uuids" in text and "Companies:" in text:
+        rows = ast.literal_eval(text.split("Companies:", 1)[1].strip())
+        uuids = [row["UUID"] for row in rows if int(prompt_key(row["UUID"]), 16) % 3 == 0]
+        return json.dumps({"relevant_uuids": uuids})
+    return "{}"
+
+
+class ReplayChatModel(Runnable):
+    """
+    Chat model stand-in that answers from recorded responses.
+
+    Prompts are looked up by the hash of their whitespace-normalized text in
+    `responses_path` (JSONL written by RecordingChatModel); unknown prompts get
+    `responder(text)`. `latency` seconds are slept per call to mimic the API.
+    """
+
+    def __init__(self, responses_path=None, responder=synthetic_response, latency=0.0, model_name="replay"):
+        self.responses = {}
+        if responses_path and os.path.exists(responses_path):
+            with open(responses_path, "r", encoding="utf-8") as file:
+                for line in file:
+                    record = json.loads(line)
+                    self.responses[record["key"]] = record["content"]
+        self.responder = responder
+        self.latency = latency
+        self.model_name = model_name
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, input, config=None, **kwargs):
+        text = _prompt_text(input)
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        content = self.responses.get(prompt_key(text))
+        return AIMessage(content=content if content is not None else self.responder(text))
+
+    def with_structured_output(self, method="json_mode", **kwargs):
+        return self | RunnableLambda(lambda message: json.loads(message.content))
+
+
+class RecordingChatModel(Runnable):
+    """Wraps a real chat model and appends every (prompt, response) to a JSONL file for replay."""
+
+    def __init__(self, model, path):
+        self.model = model
+        self.path = path
+        self.model_name = getattr(model, "model_name", "recording")
+        self._lock = threading.Lock()
+
+    def invoke(self, input, config=None, **kwargs):
+        message = self.model.invoke(input, config=config, **kwargs)
+        record = {"key": prompt_key(_prompt_text(input)), "content": message.content}
+        with self._lock, open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return message
+
+    def with_structured_output(self, method="json_mode", **kwargs):
+        return self | RunnableLambda(lambda message: json.loads(message.content))
@@ -0,0 +1,82 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+
+DEFAULT_REGRESSION_THRESHOLD = 0.2  # Relative slowdown reported as a regression
+
+
+@dataclass
+class Measurement:
+    stage: str
+    size: int
+    unit: str
+    seconds: float  # Median of the runs
+    runs: list = field(default_factory=list)
+    extra: dict = field(default_factory=dict)
+
+    @property
+    def throughput(self):
+        return self.size / self.seconds if self.seconds else None
+
+    def as_dict(self):
+        return {**asdict(self), "throughput": round(self.throughput, 2) if self.throughput else None}
+
+
+def measure(stage, size, unit, fn, repeat=3, extra=None):
+    """
+    Time `fn(run)` `repeat` times and return the median as a Measurement.
+
+    `fn` receives the run index, so it can vary its inputs and stay clear of caches;
+    a dict it returns is merged into the measurement's extra fields.
+    """
+    runs, details = [], {}
+    for run in range(repeat):
+        start = time.perf_counter()
+        result = fn(run)
+        runs.append(round(time.perf_counter() - start, 4))
+        if isinstance(result, dict):
+            details = result
+    return Measurement(stage, size, unit, statistics.median(runs), runs, {**(extra or {}), **details})
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def save_results(measurements, path, skipped=None):
+    report = {**environment(), "results": [m.as_dict() for m in measurements], "skipped": skipped or {}}
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    return report
+
+
+def compare(current, baseline, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """
+    Compare two saved reports stage by stage and size by size.
+
+    Returns:
+        list: {"stage", "size", "baseline", "current", "ratio", "regression"} dicts.
+    """
+    before = {(r["stage"], r["size"]): r["seconds"] for r in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        key = (result["stage"], result["size"])
+        if key in before and before[key]:
+            ratio = result["seconds"] / before[key]
+            rows.append({"stage": key[0], "size": key[1], "baseline": before[key], "current": result["seconds"],
+                         "ratio": round(ratio, 3), "regression": ratio > 1 + threshold})
+    return rows
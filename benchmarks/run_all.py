@@ -0,0 +1,253 @@
+"""
+Offline benchmark suite: every stage against local fixtures, across scaled input sizes.
+
+Feeds and pages are served by a local HTTP server (headless Chrome loads the pages),
+LLM calls are answered by a replaying model and Crunchbase is a DuckDB sample, so
+results depend only on the code and the machine:
+
+    python -m benchmarks.run_all --out bench.json
+    python -m benchmarks.run_all --scale full --out new.json --compare bench.json
+
+Use --fixtures to replay a directory of recorded feeds, pages and LLM responses
+(see benchmarks/fixtures.py) instead of synthesized ones.
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+
+import pandas as pd
+
+import clients
+import llm_cache
+import scrapers
+from benchmarks.bench_enrich import build_fixture, make_candidates
+from benchmarks.fixtures import FixtureServer, ReplayChatModel, write_fixtures
+from benchmarks.harness import measure, save_results, compare
+
+SCALES = {
+    "small": {"fetch_feed": [1, 5], "scrape_nitter": [1, 2], "scrape_nitter_browser": [1, 2],
+              "trump_scraper": [1], "collect": [2],
+              "convert_json_to_csv": [10, 100], "save_scrapes_to_excel": [100, 1000], "export_scrapes": [1000],
+              "enrich": [30, 300], "clean_company_list": [100, 1000], "orgs": 20000},
+    "full": {"fetch_feed": [1, 5, 20], "scrape_nitter": [1, 4, 20],
+             "scrape_nitter_browser": [1, 4], "trump_scraper": [1], "collect": [4],
+             "convert_json_to_csv": [10, 100, 1000], "save_scrapes_to_excel": [1000, 10000, 100000],
+             "export_scrapes": [100000],
+             "enrich": [30, 300, 3000], "clean_company_list": [100, 1000, 5000], "orgs": 100000},
+}
+STAGES = ["fetch_feed", "scrape_nitter", "scrape_nitter_browser", "trump_scraper", "collect", "convert_json_to_csv",
+          "save_scrapes_to_excel", "export_scrapes", "enrich", "clean_company_list"]
+LLM_LATENCY = 0.05  # Seconds per replayed LLM call, so concurrency shows in the numbers
+
+
+def queries_for(count):
+    return [f"benchmark query {i}" for i in range(count)]
+
+
+def chrome_unavailable():
+    """Reason headless Chrome can not start here, or None."""
+    from driver_pool import get_driver_pool
+
+    try:
+        with get_driver_pool().driver(timeout=60):
+            return None
+    except Exception as e:
+        return f"headless Chrome unavailable: {e}"
+
+
+def bench_fetch_feed(sizes, ctx):
+    for size in sizes:
+        queries = queries_for(size)
+        yield measure("fetch_feed", size, "feeds", lambda run: {
+            "articles": len(scrapers.fetch_feeds(queries, days=36500, url_template=ctx["server"].rss_template,
+                                                 cache=False)[0])}, repeat=ctx["repeat"])
+
+
+def bench_scrape_nitter(sizes, ctx, engine="http"):
+    import tracemalloc
+
+    from collectors import NitterCollector, run_collectors
+
+    scrapers.NITTER_INSTANCE = ctx["server"].url
+    # Time the engines, not the per-host politeness delay
+    scrapers.nitter_rate_limiter.min_interval = 0
+    workers = 2
+    if engine == "browser":
+        from driver_pool import get_driver_pool
+
+        workers = get_driver_pool().size
+    for size in sizes:
+        keywords = queries_for(size)
+
+        def run(index):
+            results = run_collectors([NitterCollector(max_workers=workers, engine=engine)], keywords)
+            return {"tweets": len(results["tweets"].records)}
+
+        # Python-side peak of one warmed-up run; Chrome's memory lives in its own processes
+        run(-2)
+        tracemalloc.start()
+        run(-1)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        yield measure(f"scrape_nitter_{engine}" if engine != "http" else "scrape_nitter", size, "keywords", run,
+                      repeat=ctx["repeat"], extra={"python_peak_kb": peak // 1024})
+
+
+def bench_scrape_nitter_browser(sizes, ctx):
+    return bench_scrape_nitter(sizes, ctx, engine="browser")
+
+
+def bench_trump_scraper(sizes, ctx):
+    scrapers.TRUMP_LINK = ctx["server"].url + "/@realDonaldTrump"
+    for size in sizes:
+        yield measure("trump_scraper", size, "pages", lambda run: {"posts": len(scrapers.trump_scraper())},
+                      repeat=ctx["repeat"])
+
+
+def bench_collect(sizes, ctx):
+    from collectors import NewsCollector, NitterCollector, TruthSocialCollector, run_collectors
+
+    scrapers.NITTER_INSTANCE = ctx["server"].url
+    scrapers.TRUMP_LINK = ctx["server"].url + "/@realDonaldTrump"
+    for size in sizes:
+        keywords = queries_for(size)
+
+        def run(index):
+            collectors = [NewsCollector(days=36500, url_template=ctx["server"].rss_template, cache=False),
+                          NitterCollector(), TruthSocialCollector()]
+            results = run_collectors(collectors, keywords)
+            return {f"{source}_seconds": round(result.seconds, 3) for source, result in results.items()}
+
+        yield measure("collect", size, "keywords", run, repeat=ctx["repeat"])
+
+
+def analysis_result(categories):
+    return {
+        "Summary of Key Findings": "Benchmark summary. " * 20,
+        "Affected Business Categories": [{
+            "Business Category Name": f"Category {i}",
+            "NAIC Code": str(311000 + i),
+            "Suggested Niches": [f"Niche {i}.{j}" for j in range(5)],
+            "Relevant Market Trends": [f"trend {i}.{j}" for j in range(5)],
+            "Potential Impact": "Impact description. " * 10,
+        } for i in range(categories)],
+    }
+
+
+def scrapes(rows):
+    news = {f"query {q}": [{"title": f"Title {q}-{i}", "link": f"https://news.example.com/{q}/{i}",
+                            "date": "Mon, 06 Jan 2025 10:00:00 GMT"} for i in range(rows // 10)]
+            for q in range(5)}
+    tweets = {f"query {q}": [f"Tweet {q}-{i} " * 8 for i in range(rows // 10)] for q in range(5)}
+    return {"news_feeds": news, "x_tweets": tweets, "trump_data": {"Donald Trump Tweets": ["Post"] * 10}}
+
+
+def bench_convert_json_to_csv(sizes, ctx):
+    from exporters import convert_json_to_csv
+
+    for size in sizes:
+        data = analysis_result(size)
+        yield measure("convert_json_to_csv", size, "categories",
+                      lambda run: {"bytes": len(convert_json_to_csv(data))}, repeat=ctx["repeat"])
+
+
+def bench_save_scrapes_to_excel(sizes, ctx):
+    from exporters import save_scrapes_to_excel
+
+    for size in sizes:
+        data = scrapes(size)
+        yield measure("save_scrapes_to_excel", size, "rows",
+                      lambda run: {"bytes": len(save_scrapes_to_excel(data))}, repeat=ctx["repeat"])
+
+
+def bench_export_scrapes(sizes, ctx):
+    from exporters import EXPORT_FORMATS, export_scrapes
+
+    for size in sizes:
+        data = scrapes(size)
+        for export_format in EXPORT_FORMATS:
+            yield measure(f"export_{export_format}", size, "rows",
+                          lambda run: {"bytes": len(export_scrapes(data, export_format))}, repeat=ctx["repeat"])
+
+
+def bench_enrich(sizes, ctx):
+    from niche_enrichment import enrich
+
+    conn, org_names = build_fixture(ctx["scale"]["orgs"])
+    for size in sizes:
+        candidates = make_candidates(org_names, size)
+        yield measure("enrich", size, "names", lambda run: {
+            "rows": len(enrich(candidates, conn=conn, table="organization_summary", dialect="duckdb")[0])},
+            repeat=ctx["repeat"], extra={"orgs": ctx["scale"]["orgs"]})
+
+
+def bench_clean_company_list(sizes, ctx):
+    from snowflake_df_cleaner import CLASSIFIER_MODEL, clean_company_list
+
+    model = ReplayChatModel(ctx["llm_responses"], latency=LLM_LATENCY, model_name=CLASSIFIER_MODEL)
+    clients.register_client("openai", model, model=CLASSIFIER_MODEL)
+    for size in sizes:
+        def run(index):
+            # Fresh UUIDs per run keep the LLM cache cold
+            df = pd.DataFrame({"UUID": [f"run{index}-{size}-{i}" for i in range(size)],
+                               "SHORT_DESCRIPTION": [f"Company {i} sells {i % 7} kinds of steak" for i in range(size)]})
+            calls = model.calls
+            relevant = clean_company_list(df, "Premium Steakhouse")
+            return {"relevant": len(relevant), "llm_calls": model.calls - calls}
+
+        yield measure("clean_company_list", size, "companies", run, repeat=ctx["repeat"])
+
+
+BENCHMARKS = {stage: globals()[f"bench_{stage}"] for stage in STAGES}
+BROWSER_STAGES = {"scrape_nitter_browser", "trump_scraper", "collect"}
+
+
+def run(stages=STAGES, scale="small", repeat=3, fixtures=None):
+    """
+    Run the selected stages and return (measurements, {stage: reason} for skipped stages).
+    """
+    scale_sizes = SCALES[scale]
+    work_dir = tempfile.mkdtemp(prefix="marketmuse-bench-")
+    fixtures = fixtures or os.path.join(work_dir, "fixtures")
+    largest = max(scale_sizes["fetch_feed"] + scale_sizes["scrape_nitter"])
+    write_fixtures(fixtures, queries_for(largest))
+    llm_cache.get_llm_cache(path=os.path.join(work_dir, "llm_cache.sqlite"))
+
+    measurements, skipped = [], {}
+    with FixtureServer(fixtures) as server:
+        ctx = {"server": server, "repeat": repeat, "scale": scale_sizes,
+               "llm_responses": os.path.join(fixtures, "llm.jsonl")}
+        browser_problem = chrome_unavailable() if BROWSER_STAGES & set(stages) else None
+        for stage in stages:
+            if stage in BROWSER_STAGES and browser_problem:
+                skipped[stage] = browser_problem
+                continue
+            for measurement in BENCHMARKS[stage](scale_sizes[stage], ctx):
+                logging.info(f"{stage} x{measurement.size}: {measurement.seconds:.4f}s {measurement.extra}")
+                measurements.append(measurement)
+    return measurements, skipped
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="bench.json", help="results JSON file")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage and size (the median is kept)")
+    parser.add_argument("--fixtures", help="directory of recorded fixtures to replay")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    measurements, skipped = run(args.stages, args.scale, args.repeat, args.fixtures)
+    report = save_results(measurements, args.out, skipped)
+    for stage, reason in skipped.items():
+        print(f"skipped {stage}: {reason}")
+    print(pd.DataFrame(report["results"])[["stage", "size", "unit", "seconds", "throughput"]].to_string(index=False))
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            rows = compare(report, json.load(file))
+        print(pd.DataFrame(rows).to_string(index=False) if rows else "Nothing to compare.")
+        raise SystemExit(1 if any(row["regression"] for row in rows) else 0)
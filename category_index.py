@@ -0,0 +1,139 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+
+import numpy as np
+
+DEFAULT_TOP_K = 40
+EMBEDDING_CACHE_DIR = os.path.join(".cache", "embeddings")
+
+
+class HashingEmbedder:
+    """
+    Deterministic local embedder based on the hashing trick.
+
+    Word unigrams and bigrams are hashed into `dim` signed buckets.
+    No network, no model download: meant for tests, benchmarks and offline runs.
+    """
+
+    def __init__(self, dim=512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text):
+        tokens = re.findall(r"\w+", (text or "").lower())
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def embed_documents(self, texts):
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                matrix[row, value % self.dim] += 1.0 if value >> 63 else -1.0
+        return matrix
+
+
+class OpenAIEmbedder:
+    """OpenAI embeddings through langchain, returned as a NumPy matrix."""
+
+    def __init__(self, model="text-embedding-3-small"):
+        from langchain_openai import OpenAIEmbeddings
+
+        self.name = f"openai-{model}"
+        self._client = OpenAIEmbeddings(model=model)
+
+    def embed_documents(self, texts):
+        return np.asarray(self._client.embed_documents(list(texts)), dtype=np.float32)
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def category_text(category):
+    return f"{category['Category']} (NAIC {category['naic_category']})"
+
+
+class CategoryIndex:
+    """
+    In-memory cosine-similarity index over the NAICS categories.
+
+    The category embeddings are computed once (and cached on disk per embedder and
+    category set) and kept as a normalized NumPy matrix, so a search is one matrix
+    product.
+    """
+
+    def __init__(self, categories, embedder, cache_dir=EMBEDDING_CACHE_DIR):
+        self.categories = list(categories)
+        self.embedder = embedder
+        self.matrix = _normalize(self._embed_categories(cache_dir))
+
+    def _embed_categories(self, cache_dir):
+        texts = [category_text(category) for category in self.categories]
+        fingerprint = hashlib.sha1("\n".join([self.embedder.name] + texts).encode("utf-8")).hexdigest()
+        path = os.path.join(cache_dir, f"categories-{fingerprint}.npy") if cache_dir else None
+        if path and os.path.exists(path):
+            return np.load(path)
+        matrix = self.embedder.embed_documents(texts)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.save(path, matrix)
+        return matrix
+
+    def search(self, texts, k=DEFAULT_TOP_K):
+        """
+        Return the k categories most similar to any of the given texts.
+
+        Each category is scored by its best cosine similarity over all texts, so one
+        strongly related article is enough to surface it.
+
+        Args:
+            texts (list): Query texts (article titles, tweets, business type...).
+            k (int): Number of categories to return.
+
+        Returns:
+            list: Category records, most similar first.
+        """
+        texts = [text for text in texts if text]
+        if not texts or not self.categories:
+            return []
+        queries = _normalize(self.embedder.embed_documents(texts))
+        scores = (queries @ self.matrix.T).max(axis=0)
+        k = min(k, len(self.categories))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [self.categories[i] for i in top]
+
+
+def scrape_texts(scraped_data):
+    """Flatten combined_data (news entries, tweets, posts) into a list of texts."""
+    texts = []
+    for source in scraped_data.values():
+        for items in source.values():
+            for item in items:
+                texts.append(item.get("title") if isinstance(item, dict) else item)
+    return texts
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+_default_embedder = None
+
+
+def get_category_index(categories, embedder=None):
+    """Return the process-wide index for this embedder, building it on first use."""
+    global _default_embedder
+    with _indexes_lock:
+        if embedder is None:
+            _default_embedder = _default_embedder or OpenAIEmbedder()
+            embedder = _default_embedder
+        index = _indexes.get(embedder.name)
+        if index is None or index.categories != categories:
+            logging.info(f"Building category index with {embedder.name} for {len(categories)} categories")
+            index = CategoryIndex(categories, embedder)
+            _indexes[embedder.name] = index
+        return index
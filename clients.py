@@ -0,0 +1,74 @@
+import logging
+import threading
+
+import httpx
+
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+HTTP_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+
+_clients = {}
+_lock = threading.Lock()
+_http_client = None
+
+
+def get_http_client():
+    """Process-wide httpx client; model clients share its connection pool."""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        return _http_client
+
+
+def _build(kind, options):
+    if kind == "openai":
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(http_client=get_http_client(), **options)
+    if kind == "groq":
+        from langchain_groq import ChatGroq
+
+        return ChatGroq(http_client=get_http_client(), **options)
+    if kind == "tavily":
+        from langchain_community.tools.tavily_search import TavilySearchResults
+
+        return TavilySearchResults(**options)
+    raise ValueError(f"Unknown client kind: {kind}")
+
+
+def get_client(kind, **options):
+    """
+    Return the shared client for (kind, options), building it on first use.
+
+    Clients are created lazily, so importing a module that uses them needs no API key,
+    and the same instance is reused by every caller in the process.
+
+    Args:
+        kind (str): "openai", "groq" or "tavily".
+        **options: Constructor arguments, e.g. model="gpt-4o-mini".
+    """
+    key = (kind, tuple(sorted(options.items())))
+    client = _clients.get(key)
+    if client is None:
+        built = _build(kind, options)
+        with _lock:
+            client = _clients.setdefault(key, built)
+        if client is built:
+            logging.info(f"Created {kind} client {options}")
+    return client
+
+
+def register_client(kind, client, **options):
+    """Install a client for (kind, options), e.g. a replaying fake model in benchmarks."""
+    with _lock:
+        _clients[(kind, tuple(sorted(options.items())))] = client
+
+
+def get_chat_model(model, **options):
+    """Shared ChatOpenAI client for a model name."""
+    return get_client("openai", model=model, **options)
+
+
+def get_search_tool(**options):
+    """Shared Tavily search tool."""
+    return get_client("tavily", **options)
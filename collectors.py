@@ -0,0 +1,277 @@
+"""
+Signal collectors and the scheduler that runs them side by side.
+
+A collector splits its source into work items (all keywords for the batched news
+download, one keyword per Nitter search, a single Truth Social timeline) and turns
+each item into typed records. run_collectors() gives every source its own worker
+pool and deadline, so collection takes about as long as the slowest source rather
+than the sum of all three; merge_combined_data() builds combined_data from the records.
+"""
+import abc
+import concurrent.futures
+import logging
+import queue
+import time
+from dataclasses import dataclass, field
+from typing import Tuple
+
+from driver_pool import get_driver_pool
+from scrapers import fetch_feeds, scrape_nitter, trump_scraper
+from tracing import bind, span
+
+DEFAULT_NEWS_DEADLINE = 60  # Seconds from the start of collection until a source is abandoned
+DEFAULT_NITTER_DEADLINE = 180
+DEFAULT_TRUTH_DEADLINE = 90
+TRUMP_TASK = "Donald Trump"
+
+OK, PARTIAL, FAILED, TIMEOUT = "ok", "partial", "failed", "timeout"
+
+
+@dataclass(frozen=True)
+class Article:
+    title: str
+    link: str
+    date: str
+    keywords: Tuple[str, ...]  # Every keyword whose feed returned the article
+
+
+@dataclass(frozen=True)
+class Post:
+    source: str
+    query: str
+    text: str
+
+
+class Collector(abc.ABC):
+    """
+    A signal source. Subclasses set `source`, `label` and `combined_key` and implement
+    work_items(), collect() and to_combined().
+    """
+    source = None
+    label = None
+    combined_key = None
+    max_workers = 1
+    deadline = DEFAULT_NEWS_DEADLINE
+
+    def work_items(self, keywords):
+        return list(dict.fromkeys(keywords))
+
+    def describe(self, item):
+        return str(item)
+
+    @abc.abstractmethod
+    def collect(self, item):
+        """
+        Collect one work item; returns (records, {task: error message}) for sources that
+        can partly fail. An exception marks the whole item as failed.
+        """
+
+    @abc.abstractmethod
+    def to_combined(self, records, expand=False):
+        """The combined_data value of this source's records."""
+
+
+class NewsCollector(Collector):
+    """Google News RSS for all keywords in one batched download, deduplicated across keywords."""
+    source = "news"
+    label = "News"
+    combined_key = "news_feeds"
+
+    def __init__(self, days=5, progress=None, deadline=DEFAULT_NEWS_DEADLINE, **fetch_kwargs):
+        self.days = days
+        self.progress = progress
+        self.deadline = deadline
+        self.fetch_kwargs = fetch_kwargs
+
+    def work_items(self, keywords):
+        keywords = tuple(dict.fromkeys(keywords))
+        return [keywords] if keywords else []
+
+    def describe(self, item):
+        return ", ".join(item)
+
+    def collect(self, item):
+        news_table, failed = fetch_feeds(list(item), days=self.days, progress=self.progress, **self.fetch_kwargs)
+        records = [Article(title, link, date, tuple(keywords))
+                   for title, link, date, keywords in news_table[["title", "link", "date", "keywords"]]
+                   .itertuples(index=False)]
+        return records, {query: str(error) for query, error in failed.items()}
+
+    def to_combined(self, records, expand=False):
+        """Articles per keyword; without `expand` each one only under its first keyword, as the LLM gets it."""
+        feed_results = {}
+        for article in records:
+            for query in (article.keywords if expand else article.keywords[:1]):
+                feed_results.setdefault(query, []).append(
+                    {"title": article.title, "link": article.link, "date": article.date})
+        return feed_results
+
+
+class NitterCollector(Collector):
+    """Nitter searches, one keyword per work item, as many at a time as the driver pool has Chrome instances."""
+    source = "tweets"
+    label = "Tweets"
+    combined_key = "x_tweets"
+
+    def __init__(self, progress=None, max_workers=None, deadline=DEFAULT_NITTER_DEADLINE, max_tweets=10,
+                 engine="auto"):
+        self.progress = progress
+        self.max_workers = max_workers or get_driver_pool().size
+        self.deadline = deadline
+        self.max_tweets = max_tweets
+        self.engine = engine
+
+    def collect(self, item):
+        tweets = scrape_nitter(item, max_tweets=self.max_tweets, progress=self.progress, engine=self.engine)
+        return [Post(self.source, item, text) for text in tweets], {}
+
+    def to_combined(self, records, expand=False):
+        tweets = {}
+        for post in records:
+            tweets.setdefault(post.query, []).append(post.text)
+        return tweets
+
+
+class TruthSocialCollector(Collector):
+    """The latest Truth Social posts of Donald Trump; not filtered by keywords."""
+    source = "truth_social"
+    label = "Truth Social posts"
+    combined_key = "trump_data"
+
+    def __init__(self, progress=None, deadline=DEFAULT_TRUTH_DEADLINE):
+        self.progress = progress
+        self.deadline = deadline
+
+    def work_items(self, keywords):
+        return [TRUMP_TASK]
+
+    def collect(self, item):
+        return [Post(self.source, item, text) for text in trump_scraper(progress=self.progress)], {}
+
+    def to_combined(self, records, expand=False):
+        return {"Donald Trump Tweets": [post.text for post in records]}
+
+
+def default_collectors(news_progress=None, tweet_progress=None):
+    return [NewsCollector(progress=news_progress), NitterCollector(progress=tweet_progress),
+            TruthSocialCollector(progress=tweet_progress)]
+
+
+@dataclass
+class CollectorResult:
+    collector: Collector
+    records: list = field(default_factory=list)
+    errors: dict = field(default_factory=dict)  # task -> error message
+    items: int = 0
+    seconds: float = 0.0
+
+    @property
+    def state(self):
+        if not self.errors:
+            return OK
+        if self.records:
+            return PARTIAL
+        timed_out = all(message.startswith("timed out") for message in self.errors.values())
+        return TIMEOUT if timed_out else FAILED
+
+    def status(self):
+        return {"source": self.collector.source, "state": self.state, "records": len(self.records),
+                "items": self.items, "seconds": round(self.seconds, 2), "errors": dict(self.errors)}
+
+
+def run_collectors(collectors, keywords, on_event=None, poll_interval=0.2):
+    """
+    Run the work items of all collectors concurrently, each source on its own pool.
+
+    Workers report through a queue drained on the calling thread, so `on_event` and the
+    progress renders stay on that thread.
+    Items still running when their source's deadline (seconds since the start) passes
+    are abandoned and recorded as timed out; they finish in the background.
+
+    Args:
+        collectors (list): Collector instances, one per source.
+        keywords (list): Keywords to collect for.
+        on_event (callable): on_event(status, collector, item description, detail) with
+            status one of "started", "done", "error" or "timeout".
+        poll_interval (float): Seconds between two checks of the event queue.
+
+    Returns:
+        dict: source -> CollectorResult, in the order of `collectors`.
+    """
+    events = queue.Queue()
+    results = {collector.source: CollectorResult(collector) for collector in collectors}
+    pending = {}  # (source, index) -> (collector, item)
+    start = time.monotonic()
+
+    def worker(collector, key, item):
+        events.put(("started", key, None))
+        try:
+            with span(f"collect.{collector.source}", item=collector.describe(item)) as s:
+                records, errors = collector.collect(item)
+                s.set(records=len(records), errors=len(errors))
+        except Exception as exc:
+            events.put(("error", key, exc))
+        else:
+            events.put(("done", key, (records, errors)))
+
+    def handle(status, key, detail):
+        if key not in pending:  # Already abandoned after the deadline
+            return
+        collector, item = pending[key] if status == "started" else pending.pop(key)
+        result = results[collector.source]
+        if status == "done":
+            records, errors = detail
+            result.records.extend(records)
+            result.errors.update(errors)
+        elif status != "started":
+            result.errors[collector.describe(item)] = (str(detail) if status == "error"
+                                                       else f"timed out after {collector.deadline}s")
+            logging.error(f"Error collecting {collector.source} for '{collector.describe(item)}': {detail}")
+        if status != "started" and not any(source == collector.source for source, _ in pending):
+            result.seconds = time.monotonic() - start
+        if on_event:
+            on_event(status, collector, collector.describe(item), detail)
+
+    executors = []
+    try:
+        for collector in collectors:
+            items = collector.work_items(keywords)
+            results[collector.source].items = len(items)
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=collector.max_workers,
+                                                             thread_name_prefix=f"collect-{collector.source}")
+            executors.append(executor)
+            for index, item in enumerate(items):
+                key = (collector.source, index)
+                pending[key] = (collector, item)
+                executor.submit(bind(worker), collector, key, item)
+
+        while pending:
+            try:
+                handle(*events.get(timeout=poll_interval))
+            except queue.Empty:
+                pass
+            for collector in collectors:
+                progress = getattr(collector, "progress", None)
+                if progress:
+                    progress.flush()
+            elapsed = time.monotonic() - start
+            for key, (collector, _) in list(pending.items()):
+                if elapsed > collector.deadline:
+                    handle("timeout", key, f"deadline of {collector.deadline}s passed")
+    finally:
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+        for collector in collectors:
+            progress = getattr(collector, "progress", None)
+            if progress:
+                progress.flush(force=True)
+
+    for result in results.values():
+        logging.info(f"Collected {result.collector.source}: {result.status()}")
+    return results
+
+
+def merge_combined_data(results, expand=False):
+    """combined_data of all sources; `expand` lists shared articles under every keyword, for exports."""
+    return {result.collector.combined_key: result.collector.to_combined(result.records, expand=expand)
+            for result in results.values()}
@@ -0,0 +1,259 @@
+import argparse
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_INDEX_DIR = os.path.join(".cache", "company_index")
+LEGAL_SUFFIXES = ["inc", "incorporated", "llc", "ltd", "limited", "corp", "corporation",
+                  "co", "company", "plc", "lp", "llp", "gmbh"]
+SUFFIX_PATTERN = "( (" + "|".join(LEGAL_SUFFIXES) + "))+$"
+DEFAULT_MIN_SCORE = 0.6
+MAX_TRIGRAM_DOCS = 50000  # Trigrams in more documents than this are too common to select candidates
+ARRAYS = ["uuids", "names", "keys", "trigram_counts", "token_postings", "trigram_postings",
+          "token_terms", "token_offsets", "trigram_terms", "trigram_offsets"]
+
+
+def normalize_company_name(name):
+    """Lower-case, strip punctuation and trailing legal suffixes: 'ACME Foods, Inc.' -> 'acme foods'."""
+    key = re.sub(r"[^a-z0-9]+", " ", (name or "").lower()).strip()
+    return re.sub(SUFFIX_PATTERN, "", " " + key).strip()
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _build_postings(term_docs):
+    """
+    Turn {term: [doc ids]} into (sorted terms, int64 offsets, flat int32 postings).
+
+    The postings of terms[i] are postings[offsets[i]:offsets[i + 1]], sorted by doc id.
+    """
+    terms = sorted(term_docs)
+    chunks = [np.unique(np.asarray(term_docs[term], dtype=np.int32)) for term in terms]
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum([len(docs) for docs in chunks], out=offsets[1:])
+    postings = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int32)
+    return np.asarray(terms, dtype=str), offsets, postings
+
+
+class CompanyIndex:
+    """
+    Local, memory-mapped company-name index for offline matching.
+
+    Two inverted indexes map normalized name tokens and character trigrams to document
+    ids. Their sorted vocabularies, offsets and postings, and the names and UUIDs, are
+    stored as .npy arrays that are memory-mapped on load, so opening the index is cheap
+    and lookups (a binary search per term) run in-process. An exact lookup
+    intersects token postings; a fuzzy lookup ranks documents by trigram Dice similarity
+    ("Acme Foods" vs "ACME Food Group").
+
+    Each save() writes a new version directory and then atomically replaces meta.json,
+    which names the current version, so instances that still map the previous files
+    keep reading a consistent index. Only one process should save at a time.
+    """
+
+    def __init__(self, directory=DEFAULT_INDEX_DIR):
+        self.directory = directory
+        self._pending = []
+        self._load()
+
+    def _path(self, *names):
+        return os.path.join(self.directory, *names)
+
+    def _load(self):
+        if not os.path.exists(self._path("meta.json")):
+            self.uuids = np.zeros(0, dtype="U1")
+            self.names = np.zeros(0, dtype="U1")
+            self.keys = np.zeros(0, dtype="U1")
+            self.trigram_counts = np.zeros(0, dtype=np.int16)
+            for kind in ["token", "trigram"]:
+                setattr(self, f"{kind}_terms", np.zeros(0, dtype="U1"))
+                setattr(self, f"{kind}_offsets", np.zeros(1, dtype=np.int64))
+                setattr(self, f"{kind}_postings", np.zeros(0, dtype=np.int32))
+            return
+        while True:
+            with open(self._path("meta.json"), "r", encoding="utf-8") as file:
+                version = json.load(file)["version"]
+            try:
+                for name in ARRAYS:
+                    setattr(self, name, np.load(self._path(version, f"{name}.npy"), mmap_mode="r"))
+                return
+            except FileNotFoundError:
+                continue  # A concurrent save() replaced this version; read meta.json again
+
+    def __len__(self):
+        return len(self.uuids)
+
+    def add(self, records):
+        """
+        Queue (uuid, name) records for the next save(). Existing UUIDs are replaced.
+
+        Args:
+            records (iterable): (uuid, name) pairs, e.g. from a Crunchbase extract.
+        """
+        self._pending.extend((str(uuid), str(name)) for uuid, name in records if uuid and name)
+
+    def save(self):
+        """Merge the queued records into the index and rewrite it on disk."""
+        if not self._pending:
+            return
+        merged = dict(zip(np.asarray(self.uuids).tolist(), np.asarray(self.names).tolist()))
+        merged.update(self._pending)
+        self._pending = []
+
+        uuids = list(merged)
+        names = [merged[uuid] for uuid in uuids]
+        keys = [normalize_company_name(name) for name in names]
+        token_docs, trigram_docs, trigram_counts = {}, {}, []
+        for doc, key in enumerate(keys):
+            for token in set(key.split()):
+                token_docs.setdefault(token, []).append(doc)
+            grams = _trigrams(key) if key else set()
+            trigram_counts.append(len(grams))
+            for gram in grams:
+                trigram_docs.setdefault(gram, []).append(doc)
+        token_terms, token_offsets, token_postings = _build_postings(token_docs)
+        trigram_terms, trigram_offsets, trigram_postings = _build_postings(trigram_docs)
+
+        os.makedirs(self.directory, exist_ok=True)
+        arrays = {
+            "uuids": np.asarray(uuids, dtype=str),
+            "names": np.asarray(names, dtype=str),
+            "keys": np.asarray(keys, dtype=str),
+            "trigram_counts": np.asarray(trigram_counts, dtype=np.int16),
+            "token_postings": token_postings,
+            "trigram_postings": trigram_postings,
+            "token_terms": token_terms,
+            "token_offsets": token_offsets,
+            "trigram_terms": trigram_terms,
+            "trigram_offsets": trigram_offsets,
+        }
+        staging = tempfile.mkdtemp(dir=self.directory, prefix="tmp-")
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(staging, f"{name}.npy"), array)
+            version = "v-" + os.path.basename(staging)[len("tmp-"):]
+            os.rename(staging, self._path(version))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump({"organizations": len(uuids), "version": version}, file)
+        os.replace(tmp, self._path("meta.json"))
+        # Open memory maps keep the unlinked files of older versions readable
+        for entry in os.listdir(self.directory):
+            if entry.startswith("v-") and entry != version:
+                shutil.rmtree(self._path(entry), ignore_errors=True)
+        self._load()
+        logging.info(f"Company index saved with {len(uuids)} organizations")
+
+    def _postings(self, kind, term):
+        """Sorted doc ids of a term, found by binary search over the memory-mapped terms; None if unknown."""
+        terms = getattr(self, f"{kind}_terms")
+        i = int(np.searchsorted(terms, term))
+        if i == len(terms) or terms[i] != term:
+            return None
+        offsets = getattr(self, f"{kind}_offsets")
+        return getattr(self, f"{kind}_postings")[offsets[i]:offsets[i + 1]]
+
+    def _exact(self, key):
+        docs = None
+        for token in set(key.split()):
+            posting = self._postings("token", token)
+            if posting is None:
+                return []
+            docs = posting if docs is None else np.intersect1d(docs, posting, assume_unique=True)
+        if docs is None:
+            return []
+        return [int(doc) for doc in docs if self.keys[doc] == key]
+
+    def _fuzzy(self, key, limit, min_score):
+        grams = _trigrams(key)
+        postings = [p for p in (self._postings("trigram", gram) for gram in grams) if p is not None]
+        rare = [p for p in postings if len(p) <= MAX_TRIGRAM_DOCS]
+        if not rare:
+            return []
+        # Candidates come from the rare trigrams, but all shared trigrams count towards the score
+        docs, common = np.unique(np.concatenate(rare), return_counts=True)
+        for posting in postings:
+            if len(posting) > MAX_TRIGRAM_DOCS:
+                positions = np.minimum(np.searchsorted(posting, docs), len(posting) - 1)
+                common += np.asarray(posting[positions]) == docs
+        scores = 2.0 * common / (len(grams) + np.asarray(self.trigram_counts[docs], dtype=np.float64))
+        keep = scores >= min_score
+        docs, scores = docs[keep], scores[keep]
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return [(int(docs[i]), float(scores[i])) for i in order]
+
+    def lookup(self, name, limit=5, min_score=DEFAULT_MIN_SCORE):
+        """
+        Find the organizations matching a company name.
+
+        Args:
+            name (str): Company name.
+            limit (int): Maximum number of fuzzy matches.
+            min_score (float): Minimum trigram Dice similarity for fuzzy matches.
+
+        Returns:
+            list: {"uuid", "name", "score", "match_type"} dicts, best first. Exact
+                normalized matches are returned alone with match_type "exact".
+        """
+        key = normalize_company_name(name)
+        if not key or not len(self):
+            return []
+        exact = self._exact(key)
+        matches = [(doc, 1.0) for doc in exact] if exact else self._fuzzy(key, limit, min_score)
+        match_type = "exact" if exact else "fuzzy"
+        return [{"uuid": str(self.uuids[doc]), "name": str(self.names[doc]), "score": round(score, 3),
+                 "match_type": match_type} for doc, score in matches]
+
+    def lookup_many(self, names, limit=1, min_score=DEFAULT_MIN_SCORE):
+        """Look up several names; returns {name: [matches]}."""
+        return {name: self.lookup(name, limit=limit, min_score=min_score) for name in dict.fromkeys(names)}
+
+
+def read_extract(path, uuid_column="uuid", name_column="name"):
+    """Read (uuid, name) pairs from a CSV or Parquet Crunchbase extract (column names are case-insensitive)."""
+    df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path, dtype=str)
+    columns = {column.lower(): column for column in df.columns}
+    df = df[[columns[uuid_column.lower()], columns[name_column.lower()]]].dropna()
+    return df.itertuples(index=False, name=None)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_company_index(directory=DEFAULT_INDEX_DIR):
+    """Return the process-wide company index, or None when it has not been built yet."""
+    global _index
+    with _index_lock:
+        if _index is None and os.path.exists(os.path.join(directory, "meta.json")):
+            _index = CompanyIndex(directory)
+        return _index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or extend the local company-name index.")
+    parser.add_argument("extracts", nargs="+", help="CSV or Parquet Crunchbase extracts with uuid and name columns")
+    parser.add_argument("--dir", default=DEFAULT_INDEX_DIR, help="index directory")
+    parser.add_argument("--uuid-column", default="uuid")
+    parser.add_argument("--name-column", default="name")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    index = CompanyIndex(args.dir)
+    for extract in args.extracts:
+        index.add(read_extract(extract, args.uuid_column, args.name_column))
+    index.save()
+    print(f"Index at {args.dir} holds {len(index)} organizations")
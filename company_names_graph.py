@@ -1,14 +1,17 @@
 from typing import List
 from typing_extensions import TypedDict
-from langchain_openai import ChatOpenAI
-from langchain_groq import ChatGroq
 import re
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_community.tools.tavily_search import TavilySearchResults
 from langgraph.graph import END, StateGraph, START
 import json
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from environs import Env
+from llm_cache import get_llm_cache
+from clients import get_chat_model
+from search_cache import get_search_cache
+from tracing import bind, span
 
 logging.basicConfig(
     level=logging.INFO,
@@ -25,9 +28,8 @@ class ReWOO(TypedDict):
     result: str
 
 
-model = ChatOpenAI(model="gpt-4o")
-solve_model = ChatGroq(model_name="deepseek-r1-distill-llama-70b", temperature=0)
-search = TavilySearchResults()
+GRAPH_MODEL = "gpt-4o"  # Planner, LLM tool and solver; clients come from the shared registry
+DEFAULT_MAX_CONCURRENCY = 4
 
 prompt = """For the following task, make plans that can solve the problem step by step. For each plan, indicate \
 which external tool together with tool input to retrieve evidence. You can store the evidence into a \
@@ -68,16 +70,37 @@ Response:"""
 
 # Regex to match expressions of the form E#... = ...[...]
 regex_pattern = r"Plan:\s*(.+)\s*(#E\d+)\s*=\s*(\w+)\s*\[([^\]]+)\]"
+evidence_pattern = r"#E\d+"
+
+# Maximum number of steps running at the same time per tool
+TOOL_CONCURRENCY = {"Google": 5, "LLM": 2}
+_tool_slots = {tool: threading.BoundedSemaphore(limit) for tool, limit in TOOL_CONCURRENCY.items()}
 prompt_template = ChatPromptTemplate.from_messages([("user", prompt)])
-planner = prompt_template | model
+
+
+def validate_plan(plan_string):
+    """Raise ValueError for a plan without any step the regex can parse."""
+    if not re.findall(regex_pattern, plan_string or ""):
+        raise ValueError(f"Plan has no parsable steps: {plan_string!r:.200}")
+
+
+def validate_answer(result):
+    """Raise ValueError for a solver answer without a list of companies."""
+    if not isinstance(result, dict) or not isinstance(result.get("companies"), list):
+        raise ValueError(f"Answer has no list of companies: {result!r:.200}")
 
 
 def get_plan(state: ReWOO):
     task = state["task"]
-    result = planner.invoke({"task": task})
-    # Find all matches in the sample text
-    matches = re.findall(regex_pattern, result.content)
-    return {"steps": matches, "plan_string": result.content}
+    planner = prompt_template | get_chat_model(GRAPH_MODEL)
+    with span("rewoo.plan") as s:
+        plan_string = get_llm_cache().cached(GRAPH_MODEL, prompt, {"task": task},
+                                             lambda: planner.invoke({"task": task}).content,
+                                             validate=validate_plan)
+        # Find all matches in the sample text
+        matches = re.findall(regex_pattern, plan_string)
+        s.set(steps=len(matches))
+    return {"steps": matches, "plan_string": plan_string}
 
 
 def _get_current_task(state: ReWOO):
@@ -89,22 +112,63 @@ def _get_current_task(state: ReWOO):
         return len(state["results"]) + 1
 
 
+def _substitute(text, results):
+    """Replace #E references with their evidence; unknown references are left as they are."""
+    return re.sub(evidence_pattern, lambda m: results.get(m.group(0), m.group(0)), text)
+
+
+def step_dependencies(steps):
+    """
+    Build the evidence DAG of a plan.
+
+    Returns:
+        dict: {step name: set of earlier step names its tool input references}. Only
+            earlier steps count, so the graph can not contain cycles.
+    """
+    dependencies = {}
+    for _, step_name, _, tool_input in steps:
+        dependencies[step_name] = set(re.findall(evidence_pattern, tool_input)) & set(dependencies)
+    return dependencies
+
+
+def _run_tool(tool, tool_input):
+    if tool not in _tool_slots:
+        raise ValueError(f"Unknown tool: {tool}")
+    with span("rewoo.tool", tool=tool) as s, _tool_slots[tool]:
+        if tool == "Google":
+            result = get_search_cache().invoke(tool_input)
+            logging.info(f"Google [{tool_input}] returned {len(result)} results")
+            return result
+        result = get_chat_model(GRAPH_MODEL).invoke(tool_input)
+        usage = getattr(result, "usage_metadata", None)
+        if usage:
+            s.set(input_tokens=usage.get("input_tokens"), output_tokens=usage.get("output_tokens"))
+        return result
+
+
 def tool_execution(state: ReWOO):
-    """Worker node that executes the tools of a given plan."""
-    _step = _get_current_task(state)
-    _, step_name, tool, tool_input = state["steps"][_step - 1]
-    _results = (state["results"] or {}) if "results" in state else {}
-    for k, v in _results.items():
-        tool_input = tool_input.replace(k, v)
-    if tool == "Google":
-        result = search.invoke(tool_input.replace('"',""))
-        print(f"CHECK TOOL_INPUT: {tool_input}")
-        print(f"CHECK GOOGLE RESULT: {result}")
-    elif tool == "LLM":
-        result = model.invoke(tool_input)
-    else:
-        raise ValueError
-    _results[step_name] = str(result)
+    """
+    Worker node that executes the tools of a given plan.
+
+    Steps run as soon as the evidence they reference is available, so independent
+    searches run concurrently (bounded per tool by TOOL_CONCURRENCY) while dependent
+    steps still see the results of the steps before them.
+    """
+    _results = dict((state["results"] or {}) if "results" in state else {})
+    steps = {step_name: (tool, tool_input) for _, step_name, tool, tool_input in state["steps"]}
+    dependencies = step_dependencies(state["steps"])
+    pending = [name for name in dependencies if name not in _results]
+
+    with ThreadPoolExecutor(max_workers=sum(TOOL_CONCURRENCY.values())) as executor:
+        running = {}
+        while pending or running:
+            for name in [name for name in pending if dependencies[name] <= _results.keys()]:
+                pending.remove(name)
+                tool, tool_input = steps[name]
+                running[executor.submit(bind(_run_tool), tool, _substitute(tool_input, _results))] = name
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                _results[running.pop(future)] = str(future.result())
     return {"results": _results}
 
 
@@ -112,12 +176,15 @@ def solve(state: ReWOO):
     plan = ""
     for _plan, step_name, tool, tool_input in state["steps"]:
         _results = (state["results"] or {}) if "results" in state else {}
-        for k, v in _results.items():
-            tool_input = tool_input.replace(k, v)
-            step_name = step_name.replace(k, v)
+        tool_input = _substitute(tool_input, _results)
+        step_name = _substitute(step_name, _results)
         plan += f"Plan: {_plan}\n{step_name} = {tool}[{tool_input}]"
     prompt = solve_prompt.format(plan=plan, task=state["task"])
-    result = model.with_structured_output(method="json_mode").invoke(prompt)
+    model = get_chat_model(GRAPH_MODEL)
+    with span("rewoo.solve"):
+        result = get_llm_cache().cached(GRAPH_MODEL, solve_prompt, {"plan": plan, "task": state["task"]},
+                                        lambda: model.with_structured_output(method="json_mode").invoke(prompt),
+                                        validate=validate_answer)
     return {"result": result}
 
 
@@ -130,21 +197,35 @@ def _route(state):
         # We are still executing tasks, loop back to the "tool" node
         return "tool"
 
+_app = None
+_app_lock = threading.Lock()
+
+
+def get_app():
+    """Return the process-wide compiled ReWOO graph, compiling it on first use."""
+    global _app
+    with _app_lock:
+        if _app is None:
+            graph = StateGraph(ReWOO)
+            graph.add_node("plan", get_plan)
+            graph.add_node("tool", tool_execution)
+            graph.add_node("solve", solve)
+            graph.add_edge("plan", "tool")
+            graph.add_edge("solve", END)
+            graph.add_conditional_edges("tool", _route)
+            graph.add_edge(START, "plan")
+            _app = graph.compile()
+        return _app
+
+
+def _task(niche):
+    return f"Return me a list of at least 30 companies in the USA within the following niche: {niche}. Return the list in json format: companies: [list of company names]. Return generic normalized names of companies so it will be easy to find them in a database, i.e. no inc, ltd, and co etc."
+
+
 def run_graph(niche:str):
-    graph = StateGraph(ReWOO)
-    graph.add_node("plan", get_plan)
-    graph.add_node("tool", tool_execution)
-    graph.add_node("solve", solve)
-    graph.add_edge("plan", "tool")
-    graph.add_edge("solve", END)
-    graph.add_conditional_edges("tool", _route)
-    graph.add_edge(START, "plan")
-
-    app = graph.compile()
-
-    task = f"Return me a list of at least 30 companies in the USA within the following niche: {niche}. Return the list in json format: companies: [list of company names]. Return generic normalized names of companies so it will be easy to find them in a database, i.e. no inc, ltd, and co etc."
+    app = get_app()
     # result = ""
-    for s in app.stream({"task": task}):
+    for s in app.stream({"task": _task(niche)}):
         print(s)
         result = s
         print("---")
@@ -155,3 +236,35 @@ def run_graph(niche:str):
     companies_list = companies["companies"]
 
     return companies_list
+
+
+def run_graph_many(niches, max_concurrency=DEFAULT_MAX_CONCURRENCY, failed=None):
+    """
+    Run the graph for several niches concurrently over the shared compiled app.
+
+    Args:
+        niches (list): Niche strings.
+        max_concurrency (int): Maximum number of graphs running at the same time.
+        failed (set): If given, receives the niches whose run failed or whose answer has no companies.
+
+    Returns:
+        dict: {niche: list of company names}; a niche whose run failed or whose answer has no
+            companies is logged and maps to [].
+    """
+    niches = list(dict.fromkeys(niches))
+    states = get_app().batch([{"task": _task(niche)} for niche in niches],
+                             config={"max_concurrency": max_concurrency}, return_exceptions=True)
+    companies = {}
+    for niche, state in zip(niches, states):
+        if isinstance(state, Exception):
+            logging.error(f"Company search for niche '{niche}' failed: {state}")
+            companies[niche] = None
+        else:
+            companies[niche] = (state.get("result") or {}).get("companies")
+            if companies[niche] is None:
+                logging.warning(f"Company search for niche '{niche}' returned no companies")
+        if companies[niche] is None:
+            companies[niche] = []
+            if failed is not None:
+                failed.add(niche)
+    return companies
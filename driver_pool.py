@@ -0,0 +1,279 @@
+import atexit
+import functools
+import logging
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+from tracing import span
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_PAGES = 20  # Recycle a Chrome instance after this many leases
+DEFAULT_IDLE_TIMEOUT = 300  # Seconds an idle instance is kept warm
+DEFAULT_REAP_INTERVAL = 30  # Seconds between two checks for idle instances to quit
+
+
+def _free_port():
+    """Ask the OS for an unused local TCP port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get_chrome_options(headless=True, debugging_port=None):
+    """
+    Create and return ChromeOptions with pre-configured settings.
+
+    Args:
+        headless (bool): Run Chrome without a window.
+        debugging_port (int): Remote debugging port. A free port is picked when omitted,
+            so several instances can run side by side.
+
+    Returns:
+        ChromeOptions: Configured options.
+    """
+    options = webdriver.ChromeOptions()
+
+    # # Set DNS over HTTPS configuration
+    # local_state = {
+    #     "dns_over_https.mode": "secure",
+    #     "dns_over_https.templates": "https://chrome.cloudflare-dns.com/dns-query",
+    # }
+    # options.add_experimental_option('localState', local_state)
+
+    # Configure user agent
+    user_agent = ('Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 '
+                  '(KHTML, like Gecko) Chrome/60.0.3112.50 Safari/537.36')
+    options.add_argument(f'user-agent={user_agent}')
+
+    if headless:
+        options.add_argument("--headless")
+
+    options.add_argument(f"--remote-debugging-port={debugging_port or _free_port()}")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")  # Required for Streamlit Cloud
+    options.add_argument("--disable-dev-shm-usage")  # Use disk instead of memory
+    options.add_argument("--disable-extensions")  # Reduce memory usage
+    options.add_argument("--disable-background-timer-throttling")
+    options.add_argument("--disable-backgrounding-occluded-windows")
+    options.add_argument("--disable-renderer-backgrounding")
+    options.add_argument("--window-size=1280,800")  # Avoid viewport errors
+    return options
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_driver_path():
+    """Resolve (and download if needed) the chromedriver binary once per process."""
+    path = ChromeDriverManager().install()
+    logging.info(f"Resolved chromedriver at {path}")
+    return path
+
+
+def create_driver(options):
+    """Initialize and return a new Chrome webdriver."""
+    service = Service(resolve_driver_path())
+    driver = webdriver.Chrome(service=service, options=options)
+    return driver
+
+
+@dataclass
+class PoolMetrics:
+    """Counters used to size the driver pool."""
+    leases: int = 0
+    hits: int = 0  # Lease served by an already running instance
+    cold_starts: int = 0  # New Chrome process launched
+    recycles: int = 0  # Instance retired after reaching max_pages
+    evictions: int = 0  # Instance retired after being idle too long
+    health_failures: int = 0  # Instance found dead or broken
+
+    def as_dict(self):
+        return asdict(self)
+
+
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.last_used = time.monotonic()
+
+
+class DriverPool:
+    """
+    A bounded pool of warm headless Chrome instances.
+
+    At most `size` drivers exist at any time. Callers lease one through `driver()`;
+    instances are health-checked on checkout, recycled after `max_pages` leases and
+    evicted after `idle_timeout` seconds without use. While instances are idle a daemon
+    thread checks every `reap_interval` seconds for ones to evict, so Chrome processes
+    do not outlive the timeout when no further lease comes.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, max_pages=DEFAULT_MAX_PAGES,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT, headless=True, reap_interval=DEFAULT_REAP_INTERVAL):
+        self.size = size
+        self.max_pages = max_pages
+        self.idle_timeout = idle_timeout
+        self.headless = headless
+        self.reap_interval = reap_interval
+        self.metrics = PoolMetrics()
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+        self._stop_reaper = threading.Event()
+        self._reaper = None
+
+    def _launch(self):
+        with span("chrome.start"):
+            driver = create_driver(get_chrome_options(headless=self.headless))
+        with self._lock:
+            self.metrics.cold_starts += 1
+        return _PooledDriver(driver)
+
+    @staticmethod
+    def _quit(pooled):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logging.warning(f"Error while quitting Chrome driver: {e}")
+
+    @staticmethod
+    def _is_healthy(pooled):
+        try:
+            pooled.driver.current_url  # Round-trips to the browser
+            return True
+        except Exception:
+            return False
+
+    def warm(self, count=None):
+        """Start up to `count` (default: pool size) idle instances ahead of time."""
+        count = min(count or self.size, self.size)
+        with self._lock:
+            missing = count - len(self._idle)
+        for _ in range(max(missing, 0)):
+            if not self._slots.acquire(blocking=False):
+                break
+            try:
+                self._add_idle(self._launch())
+            finally:
+                self._slots.release()
+
+    def _add_idle(self, pooled):
+        with self._lock:
+            self._idle.append(pooled)
+            if self._reaper is None and not self._closed:
+                self._reaper = threading.Thread(target=self._reap, name="driver-pool-reaper", daemon=True)
+                self._reaper.start()
+
+    def _reap(self):
+        """Evict idle instances periodically; stops once none is left (the next check-in restarts it)."""
+        while not self._stop_reaper.wait(self.reap_interval):
+            self.evict_idle()
+            with self._lock:
+                if not self._idle:
+                    self._reaper = None
+                    return
+
+    def evict_idle(self):
+        """Quit instances that have been idle longer than idle_timeout."""
+        now = time.monotonic()
+        stale = []
+        with self._lock:
+            while self._idle and now - self._idle[0].last_used > self.idle_timeout:
+                stale.append(self._idle.popleft())
+            self.metrics.evictions += len(stale)
+        for pooled in stale:
+            self._quit(pooled)
+
+    def _checkout(self):
+        self.evict_idle()
+        while True:
+            with self._lock:
+                pooled = self._idle.pop() if self._idle else None
+            if pooled is None:
+                return self._launch()
+            if self._is_healthy(pooled):
+                with self._lock:
+                    self.metrics.hits += 1
+                return pooled
+            with self._lock:
+                self.metrics.health_failures += 1
+            self._quit(pooled)
+
+    def _checkin(self, pooled, broken=False):
+        pooled.pages += 1
+        pooled.last_used = time.monotonic()
+        if broken or self._closed:
+            self._quit(pooled)
+            return
+        if pooled.pages >= self.max_pages:
+            with self._lock:
+                self.metrics.recycles += 1
+            self._quit(pooled)
+            return
+        try:
+            pooled.driver.delete_all_cookies()
+        except Exception:
+            self._quit(pooled)
+            return
+        self._add_idle(pooled)
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """
+        Lease a Chrome driver from the pool.
+
+        Args:
+            timeout (float): Seconds to wait for a free slot (None waits forever).
+
+        Yields:
+            webdriver.Chrome: A ready-to-use driver. It goes back to the pool on exit.
+        """
+        if self._closed:
+            raise RuntimeError("Driver pool is closed")
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("Timed out waiting for a free Chrome driver")
+        try:
+            pooled = self._checkout()
+            with self._lock:
+                self.metrics.leases += 1
+            broken = False
+            try:
+                yield pooled.driver
+            except Exception:
+                broken = not self._is_healthy(pooled)
+                raise
+            finally:
+                self._checkin(pooled, broken=broken)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Quit every idle instance and refuse new leases."""
+        self._closed = True
+        self._stop_reaper.set()
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for pooled in idle:
+            self._quit(pooled)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool(**kwargs):
+    """Return the process-wide driver pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool(**kwargs)
+            atexit.register(_pool.close)
+        return _pool
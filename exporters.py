@@ -0,0 +1,173 @@
+"""
+Streaming export of the collected scrapes and the LLM analysis.
+
+Rows are produced by generators over the collected data and written once:
+xlsx through an openpyxl write-only workbook (notes included), CSV through the csv
+module, JSONL line by line and Parquet in record batches.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from openpyxl import Workbook
+
+EXPORT_FORMATS = ["xlsx", "parquet", "jsonl"]
+PARQUET_BATCH_ROWS = 50000
+
+NEWS_HEADER = ["category", "title", "link", "date"]
+TWEET_HEADER = ["category", "tweet"]
+ANALYSIS_HEADER = ["Business Category Name", "NAIC Code", "Suggested Niches", "Relevant Market Trends",
+                   "Potential Impact"]
+RECORD_COLUMNS = ["source", "category", "title", "link", "date", "tweet"]
+
+NEWS_NOTE = "*If it's empty, there are no related news to the keywords within 5 past days."
+TWEETS_NOTE = ("*Note that the tweets are not filtered on our side for relevancy, it only returns the most recent "
+               "posts containing keywords provided by a user. So, knowing the nature of social networks, there "
+               "might be irrelevant silly tweets.")
+TRUMP_NOTE = "*Note that Trump tweets are not filtered by keywords, it is just the last 10 tweets of Trump."
+
+
+def news_rows(news_feeds):
+    for category, items in news_feeds.items():
+        for item in items:
+            yield category, item.get("title"), item.get("link"), item.get("date")
+
+
+def tweet_rows(tweets):
+    for category, texts in tweets.items():
+        for text in texts:
+            yield category, text
+
+
+def scrape_sheets(combined_data):
+    """(sheet name, header, rows, note) for each sheet of the scrapes export."""
+    return [
+        ("News Feeds", NEWS_HEADER, news_rows(combined_data.get("news_feeds", {})), NEWS_NOTE),
+        ("Tweets", TWEET_HEADER, tweet_rows(combined_data.get("x_tweets", {})), TWEETS_NOTE),
+        ("Trump Tweets", TWEET_HEADER, tweet_rows(combined_data.get("trump_data", {})), TRUMP_NOTE),
+    ]
+
+
+def scrape_records(combined_data):
+    """Flat records of every scraped item, for the single-table formats."""
+    sources = [("news", news_rows(combined_data.get("news_feeds", {}))),
+               ("tweets", tweet_rows(combined_data.get("x_tweets", {}))),
+               ("trump", tweet_rows(combined_data.get("trump_data", {})))]
+    for source, rows in sources:
+        for row in rows:
+            if source == "news":
+                category, title, link, date = row
+                yield {"source": source, "category": category, "title": title, "link": link, "date": date,
+                       "tweet": None}
+            else:
+                category, text = row
+                yield {"source": source, "category": category, "title": None, "link": None, "date": None,
+                       "tweet": text}
+
+
+def write_xlsx(sheets, output=None):
+    """
+    Write sheets into a write-only workbook; each note goes two rows under its table.
+
+    Args:
+        sheets (iterable): (sheet name, header, rows, note) tuples; rows may be a generator.
+        output: Binary file object, a BytesIO by default.
+
+    Returns:
+        The output file object.
+    """
+    output = output if output is not None else io.BytesIO()
+    workbook = Workbook(write_only=True)
+    for name, header, rows, note in sheets:
+        sheet = workbook.create_sheet(name)
+        sheet.append(header)
+        for row in rows:
+            sheet.append(row)
+        if note:
+            sheet.append([])
+            sheet.append([note])
+    workbook.save(output)
+    return output
+
+
+def write_csv(header, rows, output=None, trailer=None):
+    """Write a header and rows as CSV, followed by optional free-form trailer lines."""
+    output = output if output is not None else io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(header)
+    writer.writerows(rows)
+    for line in trailer or []:
+        output.write(line)
+    return output
+
+
+def write_jsonl(records, output=None):
+    output = output if output is not None else io.StringIO()
+    for record in records:
+        output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    return output
+
+
+def write_parquet(records, columns, output=None, batch_rows=PARQUET_BATCH_ROWS):
+    """Write dict records to Parquet in batches of `batch_rows`, so only one batch is held in memory."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    output = output if output is not None else io.BytesIO()
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    records = iter(records)
+    with pq.ParquetWriter(output, schema) as writer:
+        while True:
+            batch = list(islice(records, batch_rows))
+            if not batch:
+                break
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+    return output
+
+
+def export_scrapes(combined_data, export_format="xlsx"):
+    """
+    Export collected news and tweets.
+
+    Args:
+        combined_data (dict): {"news_feeds", "x_tweets", "trump_data"} as collected.
+        export_format (str): "xlsx" (one sheet per source, with notes), "parquet" or "jsonl"
+            (one table with a source column).
+
+    Returns:
+        bytes: The exported file.
+    """
+    if export_format == "xlsx":
+        return write_xlsx(scrape_sheets(combined_data)).getvalue()
+    if export_format == "parquet":
+        return write_parquet(scrape_records(combined_data), RECORD_COLUMNS).getvalue()
+    if export_format == "jsonl":
+        return write_jsonl(scrape_records(combined_data)).getvalue().encode("utf-8")
+    raise ValueError(f"Unknown export format: {export_format}")
+
+
+def save_scrapes_to_excel(combined_data):
+    return export_scrapes(combined_data, "xlsx")
+
+
+def analysis_rows(json_data):
+    for item in json_data.get("Affected Business Categories", []):
+        trends = item.get("Relevant Market Trends", [])
+        yield (item.get("Business Category Name"), item.get("NAIC Code"),
+               ", ".join(item.get("Suggested Niches", [])), ", ".join(trends), item.get("Potential Impact"))
+
+
+def convert_json_to_csv(json_data):
+    """CSV of the affected business categories, followed by the summary of key findings."""
+    summary_text = json_data.get("Summary of Key Findings", "")
+    trailer = ["\n\nSummary of Key Findings:\n", f'"{summary_text}"\n']
+    return write_csv(ANALYSIS_HEADER, analysis_rows(json_data), trailer=trailer).getvalue().encode("utf-8")
+
+
+def export_mime_type(export_format):
+    return {
+        "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "parquet": "application/vnd.apache.parquet",
+        "jsonl": "application/jsonl",
+    }[export_format]
@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from urllib.parse import quote_plus
+
+import aiohttp
+
+from tracing import span
+
+GOOGLE_NEWS_RSS = "https://news.google.com/rss/search?q={query}+usa"
+DEFAULT_CACHE_DIR = os.path.join(".cache", "feeds")
+DEFAULT_TTL = 15 * 60  # Seconds a cached feed is served without revalidation
+DEFAULT_MAX_CONNECTIONS = 10
+DEFAULT_TIMEOUT = 15
+
+
+def feed_url(query, url_template=GOOGLE_NEWS_RSS):
+    """Build the RSS URL for a query; whitespace is normalized so equivalent queries share a cache entry."""
+    return url_template.format(query=quote_plus(" ".join(query.split())))
+
+
+@dataclass
+class CachedFeed:
+    body: bytes
+    etag: str = None
+    last_modified: str = None
+    fetched_at: float = 0.0
+
+
+class FeedCache:
+    """
+    On-disk cache of raw feed bodies and their validators (ETag / Last-Modified).
+
+    Entries are keyed by URL, so every session and every keyword set that asks for the
+    same feed shares one copy. Each entry is one file, a JSON metadata line followed by
+    the body, written to a unique temporary file and renamed into place: concurrent
+    writers of the same feed (sessions and jobs are threads of one process) never share
+    a temporary file, and readers never see a body with another response's validators.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".feed")
+
+    def _write(self, url, cached):
+        meta = {"url": url, "etag": cached.etag, "last_modified": cached.last_modified,
+                "fetched_at": cached.fetched_at}
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(json.dumps(meta).encode("utf-8") + b"\n")
+                file.write(cached.body)
+            os.replace(tmp, self._path(url))
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def get(self, url):
+        try:
+            with open(self._path(url), "rb") as file:
+                meta = json.loads(file.readline())
+                body = file.read()
+        except (OSError, ValueError):
+            return None
+        return CachedFeed(body=body, etag=meta.get("etag"), last_modified=meta.get("last_modified"),
+                          fetched_at=meta.get("fetched_at", 0.0))
+
+    def is_fresh(self, cached):
+        return time.time() - cached.fetched_at < self.ttl
+
+    def put(self, url, body, etag=None, last_modified=None):
+        self._write(url, CachedFeed(body=body, etag=etag, last_modified=last_modified, fetched_at=time.time()))
+
+    def touch(self, url, cached):
+        """Mark a cached feed as revalidated (after a 304 Not Modified)."""
+        self._write(url, CachedFeed(body=cached.body, etag=cached.etag, last_modified=cached.last_modified,
+                                    fetched_at=time.time()))
+
+
+def _store(write, url, *args, **kwargs):
+    """Cache writes are best-effort: a feed that was downloaded is never failed by its cache."""
+    try:
+        write(url, *args, **kwargs)
+    except OSError as e:
+        logging.warning(f"Could not cache feed {url}: {e}")
+
+
+async def _fetch_one(session, url, cache):
+    """Return (body, source) where source is "cache", "not_modified", "network" or "stale"."""
+    cached = cache.get(url) if cache else None
+    if cached and cache.is_fresh(cached):
+        return cached.body, "cache"
+
+    headers = {}
+    if cached and cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached and cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
+
+    try:
+        async with session.get(url, headers=headers) as response:
+            if response.status == 304 and cached:
+                _store(cache.touch, url, cached)
+                return cached.body, "not_modified"
+            response.raise_for_status()
+            body = await response.read()
+            if cache:
+                _store(cache.put, url, body, etag=response.headers.get("ETag"),
+                       last_modified=response.headers.get("Last-Modified"))
+            return body, "network"
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        if cached:
+            logging.warning(f"Serving stale feed for {url}: {e}")
+            return cached.body, "stale"
+        raise
+
+
+async def _traced_fetch_one(session, url, cache):
+    with span("news.feed", url=url) as s:
+        body, source = await _fetch_one(session, url, cache)
+        s.set(source=source, bytes=len(body))
+        return body, source
+
+
+async def _fetch_all(urls, cache, max_connections, timeout):
+    connector = aiohttp.TCPConnector(limit=max_connections)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        return await asyncio.gather(*(_traced_fetch_one(session, url, cache) for url in urls),
+                                    return_exceptions=True)
+
+
+def fetch_raw_feeds(queries, url_template=GOOGLE_NEWS_RSS, cache=None,
+                    max_connections=DEFAULT_MAX_CONNECTIONS, timeout=DEFAULT_TIMEOUT):
+    """
+    Download the RSS feeds for several queries over one pooled HTTP session.
+
+    Args:
+        queries (list): Search queries.
+        url_template (str): Feed URL with a `{query}` placeholder; point it at a local
+            server to run against fixture feeds.
+        cache (FeedCache): Feed cache; a default on-disk cache is used when omitted.
+            Pass False to disable caching.
+        max_connections (int): Maximum number of simultaneous connections.
+        timeout (float): Total timeout per request in seconds.
+
+    Returns:
+        dict: query -> raw feed bytes, or the exception raised while fetching it.
+    """
+    if cache is None:
+        cache = FeedCache()
+    queries = list(dict.fromkeys(queries))
+    urls = [feed_url(query, url_template) for query in queries]
+    outcomes = asyncio.run(_fetch_all(urls, cache or None, max_connections, timeout))
+
+    results, sources = {}, {}
+    for query, outcome in zip(queries, outcomes):
+        if isinstance(outcome, BaseException):
+            logging.error(f"Error fetching feed for '{query}': {outcome}")
+            results[query] = outcome
+            continue
+        body, source = outcome
+        results[query] = body
+        sources[source] = sources.get(source, 0) + 1
+    logging.info(f"Fetched {len(queries)} feeds: {sources}")
+    return results
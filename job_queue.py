@@ -0,0 +1,254 @@
+"""
+Background jobs for the Streamlit app.
+
+A job is a function `fn(ctx, *args)` running on the queue's coordinator threads, so
+the script thread only submits it and polls its state by job ID; the queue is process
+wide, so jobs keep running across reruns and reloads. Each stage of a job is handed to
+the worker pool of its stage type through `ctx.run("browser" | "llm" | "sql", ...)`,
+which bounds e.g. the Chrome sessions or Snowflake queries of all jobs together.
+
+Pool sizes come from the constructor or MARKETMUSE_JOB_WORKERS, e.g. "browser=2,llm=8,sql=2".
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from progress import ProgressReporter
+from tracing import bind, span
+
+DEFAULT_STAGE_WORKERS = {"browser": 2, "llm": 4, "sql": 2}
+DEFAULT_MAX_JOBS_PER_USER = 2
+DEFAULT_MAX_RUNNING_JOBS = 8
+DEFAULT_RETENTION_SECONDS = 3600  # Finished jobs are kept this long for late pollers
+MAX_EVENTS = 50
+CANCEL_POLL_SECONDS = 0.5
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+ACTIVE = {QUEUED, RUNNING}
+
+
+class JobLimitError(RuntimeError):
+    """The user already has the maximum number of queued or running jobs."""
+
+
+class JobCancelled(BaseException):
+    """
+    Raised in a job's thread once it is cancelled.
+
+    Like KeyboardInterrupt it is an interruption, not a failure: it passes through
+    `except Exception` handlers, and a computation another session joined through the
+    result store is handed over to that session instead of failing it too.
+    """
+
+
+class JobProgress(ProgressReporter):
+    """Progress of a job; only recorded, the UI reads it through snapshot()."""
+
+    def _can_render(self):
+        return False
+
+
+class Job:
+    """State of one submitted job, updated by its worker and read by pollers."""
+
+    def __init__(self, kind, owner=None):
+        self.job_id = uuid.uuid4().hex
+        self.kind = kind
+        self.owner = owner
+        self.status = QUEUED
+        self.stage = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.progress = JobProgress()
+        self.events = []
+        self.partial = []
+        self.result = None
+        self.error = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status not in ACTIVE
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def partial_results(self):
+        """Copy of the partial results emitted so far, in order."""
+        with self._lock:
+            return list(self.partial)
+
+    def recent_events(self, count=5):
+        with self._lock:
+            return self.events[-count:]
+
+
+class JobContext:
+    """Handle a running job uses to run stages and report progress."""
+
+    def __init__(self, queue, job):
+        self._queue = queue
+        self.job = job
+
+    @property
+    def progress(self):
+        return self.job.progress
+
+    @property
+    def cancelled(self):
+        return self.job._cancel.is_set()
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled(self.job.job_id)
+
+    def run(self, stage_type, fn, *args, **kwargs):
+        """
+        Run one stage on the worker pool of `stage_type` and return its result.
+
+        The job's thread waits for the stage; when the job is cancelled meanwhile it
+        stops waiting and raises JobCancelled (the stage itself runs to completion).
+        """
+        self.check_cancelled()
+        self.job.stage = getattr(fn, "__name__", stage_type)
+        with span(f"job.{stage_type}", stage=self.job.stage):
+            future = self._queue.pool(stage_type).submit(bind(fn), *args, **kwargs)
+            while not wait([future], timeout=CANCEL_POLL_SECONDS).done:
+                self.check_cancelled()
+            return future.result()
+
+    def event(self, message):
+        """Record a short status line, e.g. "Tweets fetched for AI"."""
+        with self.job._lock:
+            self.job.events.append(message)
+            del self.job.events[:-MAX_EVENTS]
+
+    def emit(self, value):
+        """Publish a partial result pollers can show before the job finishes."""
+        with self.job._lock:
+            self.job.partial.append(value)
+
+
+def parse_stage_workers(spec):
+    """'browser=2,llm=8' -> {"browser": 2, "llm": 8}"""
+    workers = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        stage_type, _, count = item.partition("=")
+        workers[stage_type.strip()] = int(count)
+    return workers
+
+
+class JobQueue:
+    """
+    Process-wide queue of background jobs with one worker pool per stage type.
+
+    Args:
+        stage_workers (dict): Workers per stage type, merged over DEFAULT_STAGE_WORKERS.
+        max_jobs_per_user (int): Queued or running jobs one owner may have; submit()
+            raises JobLimitError beyond it.
+        max_running_jobs (int): Jobs running at the same time; later ones stay queued.
+        retention (float): Seconds finished jobs stay available to get().
+    """
+
+    def __init__(self, stage_workers=None, max_jobs_per_user=DEFAULT_MAX_JOBS_PER_USER,
+                 max_running_jobs=DEFAULT_MAX_RUNNING_JOBS, retention=DEFAULT_RETENTION_SECONDS):
+        self.stage_workers = {**DEFAULT_STAGE_WORKERS, **(stage_workers or {})}
+        self.max_jobs_per_user = max_jobs_per_user
+        self.retention = retention
+        self._pools = {stage_type: ThreadPoolExecutor(max_workers=count, thread_name_prefix=f"job-{stage_type}")
+                       for stage_type, count in self.stage_workers.items()}
+        self._coordinator = ThreadPoolExecutor(max_workers=max_running_jobs, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def pool(self, stage_type):
+        try:
+            return self._pools[stage_type]
+        except KeyError:
+            raise ValueError(f"Unknown stage type: {stage_type}") from None
+
+    def submit(self, kind, fn, *args, owner=None, **kwargs):
+        """
+        Queue `fn(ctx, *args, **kwargs)` and return its job ID.
+
+        Raises:
+            JobLimitError: `owner` already has max_jobs_per_user active jobs.
+        """
+        job = Job(kind, owner)
+        with self._lock:
+            self._trim()
+            if owner is not None:
+                active = sum(1 for other in self._jobs.values() if other.owner == owner and not other.finished)
+                if active >= self.max_jobs_per_user:
+                    raise JobLimitError(f"You already have {active} jobs running; wait for one to finish.")
+            self._jobs[job.job_id] = job
+        self._coordinator.submit(self._run, job, fn, args, kwargs)
+        logging.info(f"Job {job.job_id} ({kind}) queued for {owner}")
+        return job.job_id
+
+    def _run(self, job, fn, args, kwargs):
+        if job._cancel.is_set():
+            job.status, job.finished_at = CANCELLED, time.time()
+            return
+        job.status, job.started_at = RUNNING, time.time()
+        try:
+            job.result = fn(JobContext(self, job), *args, **kwargs)
+            job.status = DONE
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            logging.exception(f"Job {job.job_id} ({job.kind}) failed")
+            job.error = str(e) or type(e).__name__
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            job.stage = None
+        logging.info(f"Job {job.job_id} ({job.kind}) {job.status} in {job.elapsed:.1f}s")
+
+    def get(self, job_id):
+        """Return the Job for an ID, or None when it is unknown or expired."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs_for(self, owner):
+        with self._lock:
+            return [job for job in self._jobs.values() if job.owner == owner]
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job._cancel.set()
+
+    def _trim(self):
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def shutdown(self, wait=True):
+        self._coordinator.shutdown(wait=wait)
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue(**kwargs):
+    """Return the process-wide job queue, creating it on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            stage_workers = {**parse_stage_workers(os.getenv("MARKETMUSE_JOB_WORKERS")),
+                             **kwargs.pop("stage_workers", {})}
+            _queue = JobQueue(stage_workers=stage_workers, **kwargs)
+        return _queue
@@ -1,4 +1,3 @@
-from langchain_openai import ChatOpenAI
 from environs import Env
 from langchain_core.prompts import PromptTemplate
 import pandas as pd
@@ -7,6 +6,12 @@ import json
 from langchain_groq import ChatGroq
 from langchain_core.pydantic_v1 import BaseModel, Field
 from typing import List
+from naics_store import get_naics_store
+from category_index import DEFAULT_TOP_K, get_category_index, scrape_texts
+from tokens import chunk_by_tokens, count_tokens
+from llm_cache import get_llm_cache, model_id
+from clients import get_chat_model
+from tracing import span
 
 from pygments.lexers import business
 
@@ -21,31 +26,140 @@ class AffectedBusinessCategory(BaseModel):
     business_category_name: str = Field(..., alias="Business Category Name", description="Name of the business category.")
     naic_code: str = Field(..., alias="NAIC Code", description="NAIC Code for the business category.")
     suggested_niches: List[str] = Field(..., alias="Suggested Niches", description="List of niches within the category that are good targets based on impact assessment.")
-    affected_commodities: List[str] = Field(..., alias="Affected Commodities", description="Specific commodities from the data that are relevant to the category.")
-    potential_impact: str = Field(..., alias="Potential Impact", description="Explanation of how commodity market changes could affect the category.")
+    relevant_market_trends: List[str] = Field(..., alias="Relevant Market Trends", description="Key trends or terms from the data that are relevant to the category.")
+    potential_impact: str = Field(..., alias="Potential Impact", description="Explanation of how the market changes could affect the category.")
 
 class LLMOutput(BaseModel):
     summary_of_key_findings: str = Field(...,alias='Summary of Key Findings', description="Brief overview of the major insights drawn from the scraped data.")
     list_of_affected_business_categories: List[AffectedBusinessCategory] = Field(
-        ..., alias='List of Affected Business Categories',description="List of affected business categories with detailed insights."
+        ..., alias='Affected Business Categories',description="List of affected business categories with detailed insights."
     )
 
 
 # gpt_mini = ChatGroq(model_name="deepseek-r1-distill-llama-70b", temperature=0)
 
-gpt_mini = ChatOpenAI(model= "gpt-4o-mini",
-                 # max_tokens=4096
-                 )
+ANALYSIS_MODEL = "gpt-4o-mini"  # Client comes from the shared registry on first use
 # FOOD_SECTOR_MAPPING_URL = "https://docs.google.com/spreadsheets/d/e/2PACX-1vRQXdibXus54aUsemw6_jTqf_BgNXoEfDTNv-QCmyvYRUIGca_e_5M-McIr_45z9oey5pjRMvQUsoT3/pub?gid=1988978843&single=true&output=csv"
-NAIC_TABLE_URL = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQazo4kuy0iLUc136vNV95JIyaYHh2asSBLs2bPJlokm38KhSjhwlUhjpE85vu_BqLbDcOQxYPA4I28/pub?gid=0&single=true&output=csv"
+
+DEFAULT_CHUNK_TOKENS = 60000  # Scraped-data tokens per map call
+DEFAULT_MAX_CONCURRENCY = 4
 
 def get_category_list():
-    df = pd.read_csv(NAIC_TABLE_URL)
-    unique_categories = df[['naic_category', 'Category']].drop_duplicates().to_dict(orient='records')
-    return unique_categories
+    # Served from the local NAICS store; the Google Sheet is only hit on background refresh
+    return get_naics_store().categories()
+
+
+def get_candidate_categories(scraped_data, business, top_k=DEFAULT_TOP_K, embedder=None):
+    """
+    Pre-select the categories most similar to the scraped data and the user's business.
+
+    Args:
+        scraped_data (dict): combined_data with news, tweets and posts.
+        business (str): User's business category.
+        top_k (int): Number of categories to keep; None or 0 keeps the full list.
+        embedder: Embedding backend (see category_index); OpenAI embeddings by default.
+
+    Returns:
+        list: Category records to put in the prompt.
+    """
+    categories = get_category_list()
+    if not top_k or top_k >= len(categories):
+        return categories
+    index = get_category_index(categories, embedder)
+    candidates = index.search(scrape_texts(scraped_data) + [business], k=top_k)
+    logging.info(f"Category pre-filter kept {len(candidates)}/{len(categories)} categories")
+    return candidates
+
+
+def chunk_scraped_data(scraped_data, max_tokens=DEFAULT_CHUNK_TOKENS, max_items=None):
+    """
+    Split combined_data into token-budgeted chunks with the same source -> keyword -> items shape.
+
+    Args:
+        scraped_data (dict): combined_data with news, tweets and posts.
+        max_tokens (int): Token budget of the scraped data in one chunk.
+        max_items (int): Optional maximum number of items per chunk.
+
+    Returns:
+        list: combined_data-shaped dicts.
+    """
+    flat = [(source, keyword, item)
+            for source, groups in scraped_data.items()
+            for keyword, items in groups.items()
+            for item in items]
+    chunks = []
+    for part in chunk_by_tokens(flat, max_tokens, max_items=max_items, cost=lambda row: count_tokens(row[2])):
+        chunk = {}
+        for source, keyword, item in part:
+            chunk.setdefault(source, {}).setdefault(keyword, []).append(item)
+        chunks.append(chunk)
+    return chunks or [scraped_data]
+
+
+def _extend_unique(target, values):
+    seen = {value.lower() for value in target}
+    for value in values:
+        if value.lower() not in seen:
+            seen.add(value.lower())
+            target.append(value)
+
+
+def validate_niche_result(result):
+    """Parse an LLM analysis against LLMOutput; raises ValueError when it does not match."""
+    try:
+        return LLMOutput.parse_obj(result)
+    except Exception as e:
+        raise ValueError(f"LLM analysis does not match LLMOutput: {e}") from e
+
+
+def merge_niche_results(results):
+    """
+    Reduce per-chunk analyses into one result, merging categories by NAIC code.
 
+    Niches and trends are combined without duplicates, distinct impact explanations and
+    summaries are concatenated. Chunk results that do not match LLMOutput are skipped.
 
-def choose_relevant_niches(scraped_data, business, batch_size=300):
+    Args:
+        results (list): Per-chunk LLM outputs.
+
+    Returns:
+        dict: Merged result, validated against LLMOutput and keyed by its aliases.
+
+    Raises:
+        ValueError: No chunk result matches LLMOutput.
+    """
+    summaries, merged, valid = [], {}, 0
+    for result in results:
+        try:
+            parsed = validate_niche_result(result)
+        except ValueError as e:
+            logging.warning(f"Skipping chunk result: {e}")
+            continue
+        valid += 1
+        if parsed.summary_of_key_findings and parsed.summary_of_key_findings not in summaries:
+            summaries.append(parsed.summary_of_key_findings)
+        for category in parsed.list_of_affected_business_categories:
+            code = category.naic_code.strip()
+            if code not in merged:
+                merged[code] = category.copy(deep=True)
+                continue
+            current = merged[code]
+            _extend_unique(current.suggested_niches, category.suggested_niches)
+            _extend_unique(current.relevant_market_trends, category.relevant_market_trends)
+            if category.potential_impact not in current.potential_impact:
+                current.potential_impact = f"{current.potential_impact} {category.potential_impact}"
+
+    if not valid:
+        raise ValueError(f"None of the {len(results)} chunk results matches LLMOutput")
+    output = LLMOutput.parse_obj({
+        "Summary of Key Findings": " ".join(summaries),
+        "Affected Business Categories": [category.dict(by_alias=True) for category in merged.values()],
+    })
+    return output.dict(by_alias=True)
+
+
+def choose_relevant_niches(scraped_data, business, batch_size=300, top_k=DEFAULT_TOP_K, embedder=None,
+                           max_tokens=DEFAULT_CHUNK_TOKENS, max_concurrency=DEFAULT_MAX_CONCURRENCY):
 
     # format = """
     # [{{
@@ -99,43 +213,34 @@ User's Business Category: {business}
     """
 
     prompt = PromptTemplate(template=prompt_template, input_variables=["scrapes", "categories", "business"])
+    gpt_mini = get_chat_model(ANALYSIS_MODEL)
     chain = prompt | gpt_mini.with_structured_output(method="json_mode")
 
-    all_results = []  # To store results from all batches
-    categories = get_category_list()
-    result = chain.invoke({
-        "scrapes": scraped_data,
-        "categories": categories,
-        "business": business,
-    })
-
-    # # Process data in batches
-    # for i in range(0, total_records, batch_size):
-    #     batch = naics_df.iloc[i:i + batch_size].to_dict(orient='records')  # Get batch as list of dicts
-    #     logging.info(
-    #         f"Processing batch {i // batch_size + 1}/{(total_records // batch_size) + 1} with {len(batch)} records...")
-    #
-    #     result = chain.invoke({
-    #         "niches": batch,
-    #         "format": format,
-    #         "sector": sector,
-    #         "insurance_types": product_type
-    #     })
-    #
-    #     try:
-    #         result_list = next(iter(result.values()))
-    #         logging.info(f"Batch {i // batch_size + 1} processed. Returned {len(result_list)} items.")
-    #         all_results.extend(result_list)
-    #     except StopIteration:
-    #         all_results.extend(result)
-
-    # Convert results to a dataframe
-    # df_merged = pd.DataFrame(all_results)
-    try:
-        with open("llm_response.json", "w", encoding="utf-8") as file:
-            json.dump(result, file, ensure_ascii=False, indent=4)
-        logging.info(f"Data successfully written to llm_response.json")
-    except Exception as e:
-        logging.error(f"Failed to write data to file: {e}")
+    with span("niches.candidates") as s:
+        categories = get_candidate_categories(scraped_data, business, top_k=top_k, embedder=embedder)
+        chunks = chunk_scraped_data(scraped_data, max_tokens=max_tokens, max_items=batch_size)
+        s.set(categories=len(categories), chunks=len(chunks))
+    inputs = [{"scrapes": chunk, "categories": categories, "business": business} for chunk in chunks]
+
+    # Responses are cached by model, template and inputs; a repeated run costs nothing
+    cache = get_llm_cache()
+    model = model_id(gpt_mini)
+    if len(inputs) == 1:
+        result = cache.cached(model, prompt_template, inputs[0], lambda: chain.invoke(inputs[0]),
+                              validate=validate_niche_result)
+    else:
+        # Map: analyse the chunks concurrently; reduce: merge categories by NAIC code
+        logging.info(f"Analysing scraped data in {len(inputs)} chunks (max {max_concurrency} at a time)")
+        chunk_results = cache.batch(chain, model, prompt_template, inputs,
+                                    config={"max_concurrency": max_concurrency}, validate=validate_niche_result)
+        for i, chunk_result in enumerate(chunk_results):
+            if isinstance(chunk_result, Exception):
+                logging.error(f"Chunk {i + 1}/{len(inputs)} failed: {chunk_result}")
+        succeeded = [r for r in chunk_results if not isinstance(r, Exception)]
+        if not succeeded:
+            raise chunk_results[0]
+        result = merge_niche_results(succeeded)
+
+    logging.info(f"LLM cache stats: {cache.stats()}")
     print(result)
     return result
\ No newline at end of file
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from tokens import count_tokens
+from tracing import NOOP_SPAN, span
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_cache.sqlite")
+DEFAULT_TTL = 7 * 24 * 60 * 60  # Seconds a cached response stays valid
+DEFAULT_MAX_ENTRIES = 5000
+
+
+def _normalize(value):
+    """Normalize prompt inputs so cosmetic differences do not change the cache key."""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def model_id(llm):
+    """Best-effort identifier of a chat model client."""
+    return getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+
+
+class LLMCache:
+    """
+    Content-addressed, persistent store for LLM responses.
+
+    Keys are the SHA-256 of the model name, the prompt template hash and the normalized
+    inputs; values are JSON. Entries expire after `ttl` seconds and the least recently
+    used ones are evicted beyond `max_entries`. SQLite makes the store safe to share
+    between concurrent Streamlit sessions and processes.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn, conn:
+            conn.execute("pragma journal_mode=wal")
+            conn.execute("""
+                create table if not exists entries (
+                    key text primary key,
+                    value text not null,
+                    created_at real not null,
+                    accessed_at real not null
+                )""")
+            conn.execute("create index if not exists idx_entries_accessed on entries (accessed_at)")
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.path, timeout=30))
+
+    @staticmethod
+    def make_key(model, template, inputs):
+        template_hash = hashlib.sha256(template.encode("utf-8")).hexdigest()
+        payload = json.dumps({"model": model, "template": template_hash, "inputs": _normalize(inputs)},
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached value for a key, or None on a miss."""
+        now = time.time()
+        with self._connect() as conn, conn:
+            row = conn.execute("select value, created_at from entries where key = ?", (key,)).fetchone()
+            if row and now - row[1] <= self.ttl:
+                conn.execute("update entries set accessed_at = ? where key = ?", (now, key))
+            elif row:
+                conn.execute("delete from entries where key = ?", (key,))
+                row = None
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value):
+        now = time.time()
+        with self._connect() as conn, conn:
+            conn.execute("insert or replace into entries (key, value, created_at, accessed_at) "
+                         "values (?, ?, ?, ?)", (key, json.dumps(value, ensure_ascii=False), now, now))
+            conn.execute("delete from entries where created_at < ?", (now - self.ttl,))
+            conn.execute("delete from entries where key in (select key from entries "
+                         "order by accessed_at desc limit -1 offset ?)", (self.max_entries,))
+
+    def _get_valid(self, key, validate):
+        """Cached value for a key; entries failing `validate` count as misses."""
+        value = self.get(key)
+        if value is not None and validate is not None:
+            try:
+                validate(value)
+            except Exception as e:
+                logging.warning(f"Ignoring cached LLM response that fails validation: {e}")
+                return None
+        return value
+
+    def cached(self, model, template, inputs, compute, validate=None):
+        """
+        Return the cached response for (model, template, inputs), computing it on a miss.
+
+        Args:
+            model (str): Model identifier.
+            template (str): Prompt template (hashed into the key).
+            inputs: JSON-serializable prompt inputs.
+            compute (callable): Produces the JSON-serializable response on a miss.
+            validate (callable): Optional check raising on a malformed response; such a
+                response is raised instead of being cached.
+        """
+        key = self.make_key(model, template, inputs)
+        with span("llm.call", model=model) as s:
+            value = self._get_valid(key, validate)
+            s.set(cache_hit=value is not None)
+            if value is None:
+                value = compute()
+                if validate is not None:
+                    validate(value)
+                self.set(key, value)
+            if s is not NOOP_SPAN:
+                s.set(input_tokens=count_tokens(inputs), output_tokens=count_tokens(value))
+        return value
+
+    def batch(self, runnable, model, template, inputs_list, config=None, validate=None):
+        """
+        Cached equivalent of runnable.batch(inputs_list, return_exceptions=True).
+
+        Only the cache misses are sent to the runnable; failed inputs, and responses that
+        `validate` rejects, are returned as exceptions and not cached.
+        """
+        keys = [self.make_key(model, template, inputs) for inputs in inputs_list]
+        with span("llm.batch", model=model, calls=len(inputs_list)) as s:
+            results = [self._get_valid(key, validate) for key in keys]
+            missing = [i for i, result in enumerate(results) if result is None]
+            if missing:
+                fresh = runnable.batch([inputs_list[i] for i in missing], config=config, return_exceptions=True)
+                for i, value in zip(missing, fresh):
+                    if not isinstance(value, Exception) and validate is not None:
+                        try:
+                            validate(value)
+                        except Exception as e:
+                            value = e
+                    results[i] = value
+                    if not isinstance(value, Exception):
+                        self.set(keys[i], value)
+            if s is not NOOP_SPAN:
+                s.set(cache_hits=len(inputs_list) - len(missing),
+                      failures=sum(isinstance(value, Exception) for value in results),
+                      input_tokens=sum(count_tokens(inputs) for inputs in inputs_list),
+                      output_tokens=sum(count_tokens(value) for value in results
+                                        if not isinstance(value, Exception)))
+        return results
+
+    def stats(self):
+        with self._connect() as conn:
+            entries = conn.execute("select count(*) from entries").fetchone()[0]
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache(**kwargs):
+    """Return the process-wide LLM cache, opening it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(**kwargs)
+            logging.info(f"LLM cache opened at {_cache.path}")
+        return _cache
@@ -1,32 +1,18 @@
-import concurrent.futures
-import feedparser
-import email.utils
-from datetime import datetime, timedelta, timezone
 import json
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import time
 import logging
-from urllib.parse import quote_plus
+import uuid
 
-from company_names_graph import run_graph
-from llm import choose_relevant_niches
 import streamlit as st
+import altair as alt
 import pandas as pd
-import io
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from openpyxl import load_workbook
+from job_queue import DONE, JobLimitError, get_job_queue
+from pipeline import enrich_job, fetch_job, suggested_niches
+from result_store import get_result_store, result_key
+from exporters import EXPORT_FORMATS, export_mime_type, export_scrapes
 from niche_enrichment import *
-from snowflake_df_cleaner import clean_company_list
+import tracing
 # from st_aggrid import AgGrid
 
-NITTER_INSTANCE = "https://nitter.net"
-TRUMP_LINK = "https://truthsocial.com/@realDonaldTrump"
-
 # ✅ Move set_page_config to be the first Streamlit command
 st.set_page_config(page_title="MarketMuse – Your AI-powered muse for market inspiration",
                    page_icon="📰",
@@ -34,277 +20,125 @@ st.set_page_config(page_title="MarketMuse – Your AI-powered muse for market in
                    )
 
 
-def get_chrome_options(headless=True):
-    """Create and return ChromeOptions with pre-configured settings."""
-    options = webdriver.ChromeOptions()
-
-    # # Set DNS over HTTPS configuration
-    # local_state = {
-    #     "dns_over_https.mode": "secure",
-    #     "dns_over_https.templates": "https://chrome.cloudflare-dns.com/dns-query",
-    # }
-    # options.add_experimental_option('localState', local_state)
-
-    # Configure user agent
-    user_agent = ('Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 '
-                  '(KHTML, like Gecko) Chrome/60.0.3112.50 Safari/537.36')
-    options.add_argument(f'user-agent={user_agent}')
-
-    if headless:
-        options.add_argument("--headless")
-
-    options.add_argument("--remote-debugging-port=9222")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")  # Required for Streamlit Cloud
-    options.add_argument("--disable-dev-shm-usage")  # Use disk instead of memory
-    options.add_argument("--disable-extensions")  # Reduce memory usage
-    options.add_argument("--disable-background-timer-throttling")
-    options.add_argument("--disable-backgrounding-occluded-windows")
-    options.add_argument("--disable-renderer-backgrounding")
-    options.add_argument("--window-size=1280,800")  # Avoid viewport errors
-    return options
-
-
-def create_driver(options):
-    """Initialize and return a new Chrome webdriver."""
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
-    return driver
-
-
-def scrape_nitter(keyword, max_tweets=10):
-    """
-    Scrape Nitter search results using Selenium.
-
-    Args:
-        keyword (str): Search keyword.
-        max_tweets (int): Maximum number of tweets to retrieve.
-
-    Returns:
-        list: List of tweet texts.
-    """
-    encoded_keyword = quote_plus(keyword)
-    search_url = f"{NITTER_INSTANCE}/search?f=tweets&q={encoded_keyword}+usa"
-
-    options = get_chrome_options(headless=True)
-    driver = create_driver(options)
-
-    tweets = []
-    st.write(f"Scraping tweets for: **{keyword}**")
-
-    try:
-        driver.get(search_url)
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.tweet-content"))
-        )
-        tweet_elements = driver.find_elements(By.CSS_SELECTOR, "div.tweet-content")
-
-        tweet_display = st.empty()  # Placeholder for updating UI
-        for i, tweet in enumerate(tweet_elements):
-            if i >= max_tweets:
-                break
-            tweets.append(tweet.text)
-            tweet_display.write(f"✅ {i + 1}/{max_tweets} tweets fetched...")  # Live progress update
-            time.sleep(0.5)  # Simulate live updates
-
-    except Exception as e:
-        st.error(f"Error scraping Nitter: {e}")
-        logging.error(f"Error scraping Nitter: {e}")
-    finally:
-        driver.quit()
-
-    return tweets
-
-
-def fetch_feed(query, days=5):
-    """
-    Fetch the RSS feed for a given query and filter out news older than 'days' days.
-
-    Args:
-        query (str): The search query.
-        days (int): Number of days to look back.
-
-    Returns:
-        tuple: (query, list of filtered feed entries)
-    """
-    # Use quote_plus to safely encode the query
-    encoded_query = quote_plus(query)
-    rss_url = f"https://news.google.com/rss/search?q={encoded_query}+usa"
-    feed = feedparser.parse(rss_url)
-    filtered_entries = []
-
-    current_time = datetime.now(timezone.utc)
-    cutoff_time = current_time - timedelta(days=days)
-
-    st.write(f"Fetching news for: **{query}**")
-    news_display = st.empty()  # Placeholder for updating UI
-
-    for entry in feed.entries:
-        try:
-            published_date = email.utils.parsedate_to_datetime(entry.published)
-        except Exception as e:
-            st.warning(f"Could not parse date for entry: {entry.get('title', 'No Title')}")
-            continue
-
-        if published_date > cutoff_time:
-            filtered_entries.append({
-                "title": entry.title,
-                "link": entry.link,
-                "date": entry.published
-            })
-            news_display.write(f"📰 {len(filtered_entries)} articles fetched...")  # Live update
-            time.sleep(0.5)  # Simulate processing delay
-
-    return query, filtered_entries
-
-
-def scroll_up_until_elements(driver, selector, min_count=10, max_scrolls=15):
-    """
-    Scrolls the page until at least min_count unique elements (by aria-label) are found.
-
-    Args:
-        driver (webdriver): Selenium webdriver instance.
-        selector (str): CSS selector to find elements.
-        min_count (int): Minimum number of unique elements required.
-        max_scrolls (int): Maximum number of scroll attempts.
-
-    Returns:
-        list: List of unique aria-label texts.
-    """
-    unique_texts = set()
-    body = driver.find_element(By.TAG_NAME, "body")
-
-    for _ in range(max_scrolls):
-        elements = driver.find_elements(By.CSS_SELECTOR, selector)
-        for element in elements:
-            aria_label = element.get_attribute("aria-label")
-            if aria_label:
-                unique_texts.add(aria_label)
-        if len(unique_texts) >= min_count:
-            break
-        body.send_keys(Keys.PAGE_DOWN)
-        time.sleep(2)  # Allow time for new elements to load
-    return list(unique_texts)
-
-
-def trump_scraper():
-    """
-    Scrapes posts from Donald Trump's Truth Social page using Selenium.
-
-    Returns:
-        list: List of post aria-label texts.
-    """
-    options = get_chrome_options(headless=True)
-    driver = create_driver(options)
-    posts = []
+def show_performance_panel(spans):
+    """Waterfall of the spans recorded during the last traced run."""
+    timeline = tracing.waterfall(spans)
+    with st.expander("⏱️ Performance of the last run"):
+        if timeline.empty:
+            st.write("No spans recorded.")
+            return
+        timeline["span"] = [f"{i:03d} {'· ' * depth}{name}"
+                            for i, (depth, name) in enumerate(zip(timeline["depth"], timeline["name"]))]
+        chart = alt.Chart(timeline).mark_bar().encode(
+            x=alt.X("start_s:Q", title="seconds"),
+            x2="end_s:Q",
+            y=alt.Y("span:N", sort=None, title=None),
+            color="status:N",
+            tooltip=["name", alt.Tooltip("duration_s:Q", format=".3f"), "attributes"],
+        ).properties(height=max(120, 18 * len(timeline)))
+        st.altair_chart(chart, use_container_width=True)
+        totals = (timeline.groupby("name")["duration_s"].agg(["count", "sum", "max"])
+                  .sort_values("sum", ascending=False))
+        st.dataframe(totals, use_container_width=True)
+
+
+def user_id():
+    """Anonymous per-browser ID kept in the URL; the job queue limits concurrent jobs by it."""
+    if "uid" not in st.query_params:
+        st.query_params["uid"] = uuid.uuid4().hex
+    return st.query_params["uid"]
+
+
+def submit_job(state_key, kind, fn, *args, **kwargs):
+    """Queue a background job and remember its ID in the session and the URL."""
     try:
-        driver.get(TRUMP_LINK)
-        # Wait until the timeline element is loaded
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "#timeline"))
-        )
-        posts = scroll_up_until_elements(driver, "#timeline .status[aria-label]", min_count=10)
-    except Exception as e:
-        logging.error(f"Error scraping Trump page: {e}")
-    finally:
-        driver.quit()
-    return posts
-
-
-def convert_json_to_csv(json_data):
-    data_list = []
-    logging.info(f"Json File: {json_data}")
-    # Process "List of Affected Business Categories"
-    if "List of Affected Business Categories" in json_data:
-        for item in json_data["List of Affected Business Categories"]:
-            data_list.append({
-                "Business Category Name": item["Business Category Name"],
-                "NAIC Code": item["NAIC Code"],
-                "Affected Commodities": ", ".join(item["Affected Commodities"]),
-                "Potential Impact": item["Potential Impact"]
-            })
-
-    # Convert to DataFrame
-    df = pd.DataFrame(data_list)
-
-    # Convert DataFrame to CSV format (string buffer)
-    csv_buffer = io.StringIO()
-    df.to_csv(csv_buffer, index=False)
-
-    # Append two new lines and the summary
-    summary_text = json_data.get("Summary of Key Findings", "")
-    csv_buffer.write("\n\nSummary of Key Findings:\n")
-    csv_buffer.write(f'"{summary_text}"\n')
-
-    # Encode the final CSV content
-    csv_data = csv_buffer.getvalue().encode("utf-8")
-
-    return csv_data
-
-
-def save_scrapes_to_excel(combined_data):
-    output = io.BytesIO()
-
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        # Process news_feeds: Flatten data from each category
-        news_rows = []
-        for category, items in combined_data.get("news_feeds", {}).items():
-            for item in items:
-                news_rows.append({
-                    "category": category,
-                    "title": item.get("title"),
-                    "link": item.get("link"),
-                    "date": item.get("date")
-                })
-        df_news = pd.DataFrame(news_rows)
-        df_news.to_excel(writer, sheet_name="News Feeds", index=False)
-
-        # Process x_tweets: Each category contains tweet strings
-        tweets_rows = []
-        for category, tweets in combined_data.get("x_tweets", {}).items():
-            for tweet in tweets:
-                tweets_rows.append({
-                    "category": category,
-                    "tweet": tweet
-                })
-        df_tweets = pd.DataFrame(tweets_rows)
-        df_tweets.to_excel(writer, sheet_name="Tweets", index=False)
-
-        # Process trump_data: Each category contains tweet strings
-        trump_rows = []
-        for category, tweets in combined_data.get("trump_data", {}).items():
-            for tweet in tweets:
-                trump_rows.append({
-                    "category": category,
-                    "tweet": tweet
-                })
-        df_trump = pd.DataFrame(trump_rows)
-        df_trump.to_excel(writer, sheet_name="Trump Tweets", index=False)
-
-    # Load the workbook to modify it after writing
-    output.seek(0)
-    workbook = load_workbook(output)
-
-    # Function to append a note in the first empty row
-    def add_note(sheet_name, note_text):
-        sheet = workbook[sheet_name]
-        max_row = sheet.max_row
-        sheet.cell(row=max_row + 2, column=1, value=note_text)  # Two rows after table
-
-    # Add notes to "Tweets" and "Trump Tweets" sheets
-    add_note("News Feeds",
-             "*If it's empty, there are no related news to the keywords within 5 past days.")
-    add_note("Tweets",
-             "*Note that the tweets are not filtered on our side for relevancy, it only returns the most recent posts containing keywords provided by a user. So, knowing the nature of social networks, there might be irrelevant silly tweets.")
-    add_note("Trump Tweets",
-             "*Note that Trump tweets are not filtered by keywords, it is just the last 10 tweets of Trump.")
-
-    # Save the modified workbook
-    output = io.BytesIO()
-    workbook.save(output)
-    output.seek(0)
-
-    return output.getvalue()
+        job_id = get_job_queue().submit(kind, fn, *args, owner=user_id(), **kwargs)
+    except JobLimitError as e:
+        st.error(f"⚠️ {e}")
+        return None
+    st.session_state[state_key] = job_id
+    st.query_params[state_key] = job_id
+    return job_id
+
+
+def restore_job(state_key):
+    """Pick up a job submitted before a page reload."""
+    if state_key not in st.session_state and state_key in st.query_params:
+        if get_job_queue().get(st.query_params[state_key]) is not None:
+            st.session_state[state_key] = st.query_params[state_key]
+
+
+def finish_job(state_key):
+    st.session_state.pop(state_key, None)
+    st.query_params.pop(state_key, None)
+
+
+def show_job_status(job):
+    snapshot = job.progress.snapshot()
+    label = f"⏳ {job.kind.capitalize()} job {job.status}"
+    if job.stage:
+        label += f" – {job.stage}"
+    st.info(f"{label} ({job.elapsed:.0f}s)")
+    if snapshot:
+        st.markdown("  \n".join(job.progress.format_line(f"**{task}**", count, total, message)
+                                 for task, (count, total, message) in snapshot.items()))
+    for event in job.recent_events():
+        st.caption(event)
+    if st.button("✖️ Cancel", key=f"cancel_{job.job_id}"):
+        get_job_queue().cancel(job.job_id)
+
+
+@st.fragment(run_every=2)
+def job_panel(state_key, on_done):
+    """Poll a background job; once it finishes, hand it to `on_done` and rerun the page."""
+    job = get_job_queue().get(st.session_state.get(state_key))
+    if job is None:
+        finish_job(state_key)
+        st.rerun()
+    if not job.finished:
+        show_job_status(job)
+        partial = job.partial_results()
+        if partial:
+            st.dataframe(pd.concat(partial).sort_index().reset_index(drop=True), use_container_width=True)
+        return
+    finish_job(state_key)
+    if job.status == DONE:
+        on_done(job.result)
+    else:
+        st.session_state.job_message = ("error", f"⚠️ {job.kind.capitalize()} job {job.status}: {job.error or ''}")
+    st.rerun()
+
+
+def on_fetch_done(job_result):
+    load_result(job_result["result"])
+    # Survives a page reload; the store is shared by all sessions
+    st.query_params["result"] = job_result["key"]
+    if job_result["source"] == "computed":
+        st.session_state.job_message = ("success", "🎉 Data fetched and processed!")
+    else:
+        st.session_state.job_message = ("success", "⚡ Loaded today's results for the same keywords and "
+                                                   "business category.")
+    if job_result["trace"]:
+        st.session_state.last_trace = job_result["trace"]
+
+
+def on_enrich_done(job_result):
+    st.session_state.enrichment = job_result
+    if job_result["trace"]:
+        st.session_state.last_trace = job_result["trace"]
+
+
+def load_result(result):
+    for key in ["response_json", "csv_data", "scrapes", "scrapes_excel"]:
+        st.session_state[key] = result[key]
+    # Results stored before the collectors reported per-source status have none
+    st.session_state.source_status = result.get("source_status", {})
+
+
+def show_source_status(source_status):
+    icons = {"ok": "✅", "partial": "⚠️", "failed": "❌", "timeout": "⏱️"}
+    st.caption(" · ".join(f"{icons.get(status['state'], '')} {source}: {status['records']} in {status['seconds']}s"
+                          for source, status in source_status.items()))
 
 
 def main():
@@ -326,68 +160,57 @@ def main():
     keywords = st.text_area("Enter keywords (comma-separated):", placeholder="e.g. AI, technology, healthcare")
     business_type = st.text_input("Enter your business category:",
                                   placeholder="e.g. insurance, food service, healthcare")
+    record_trace = st.sidebar.toggle("⏱️ Record performance trace", value=tracing.is_enabled())
+
+    # Restore the last results of this page after a reload
+    if "response_json" not in st.session_state and "result" in st.query_params:
+        restored = get_result_store().get(st.query_params["result"])
+        if restored is not None:
+            load_result(restored)
 
     # -------------------
     # Data Fetching
     # -------------------
-    if st.button("🚀 Fetch Data", use_container_width=True):
+    restore_job("fetch_job")
+    restore_job("enrich_job")
+    if "job_message" in st.session_state:
+        kind, message = st.session_state.pop("job_message")
+        getattr(st, kind)(message)
+
+    if st.button("🚀 Fetch Data", use_container_width=True, disabled="fetch_job" in st.session_state):
         # Clear previous session state values
-        for key in ["response_json", "csv_data", "scrapes_excel", "all_suggested_niches", "chosen_niche"]:
+        for key in ["response_json", "csv_data", "scrapes", "scrapes_excel", "all_suggested_niches", "chosen_niche",
+                    "enrichment", "source_status"]:
             st.session_state.pop(key, None)
 
         keyword_list = [kw.strip() for kw in keywords.split(",") if kw.strip()]
 
         if keyword_list:
-            with st.spinner("🔄 Fetching data... Please wait"):
-                feed_results, tweets_data, trump_data = {}, {}, {}
-
-                status = st.status("⏳ Processing queries...", expanded=True)
-
-                # Fetch news feeds in parallel
-                with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-                    future_to_query = {executor.submit(fetch_feed, query): query for query in keyword_list}
-                    for future in concurrent.futures.as_completed(future_to_query):
-                        query = future_to_query[future]
-                        try:
-                            query_key, entries = future.result()
-                            feed_results[query_key] = entries
-                            status.update(label=f"✅ News fetched for {query}")
-                        except Exception as exc:
-                            logging.error(f"Query '{query}' generated an exception: {exc}")
-                            status.update(label=f"⚠️ Error fetching news for {query}")
-
-                # Scrape tweets from Nitter
-                for query in keyword_list:
-                    try:
-                        tweets_data[query] = scrape_nitter(query)
-                        status.update(label=f"✅ Tweets fetched for {query}")
-                    except Exception as exc:
-                        logging.error(f"Error scraping Nitter for '{query}': {exc}")
-                status.update(label="⏳Scraping Trump's tweets")
-                trump_data["Donald Trump Tweets"] = trump_scraper()
-                status.update(label="✅ All data fetched! Passing it to AI for analysis...")
-
-                combined_data = {
-                    "news_feeds": feed_results,
-                    "x_tweets": tweets_data,
-                    "trump_data": trump_data
-                }
-
-                # Store processed data in session state
-                st.session_state.response_json = choose_relevant_niches(combined_data, business_type)
-                st.session_state.csv_data = convert_json_to_csv(st.session_state.response_json)
-                st.session_state.scrapes_excel = save_scrapes_to_excel(combined_data)
-
-                st.success("🎉 Data fetched and processed!")
-
+            store = get_result_store()
+            key = result_key(keyword_list, business_type)
+            stored = store.get(key)
+            if stored is not None:
+                load_result(stored)
+                st.query_params["result"] = key
+                st.success("⚡ Loaded today's results for the same keywords and business category.")
+            else:
+                if store.is_running(key):
+                    st.info("⏳ The same search is already running in another session, waiting for its results...")
+                submit_job("fetch_job", "fetch", fetch_job, keyword_list, business_type, trace_enabled=record_trace)
         else:
             st.error("⚠️ Please enter at least one keyword.")
 
+    # The script run ends right after drawing this; the fragment keeps polling the job
+    if "fetch_job" in st.session_state:
+        job_panel("fetch_job", on_fetch_done)
+
     # -------------------
     # Show Results
     # -------------------
     if "response_json" in st.session_state:
         st.header("📊 Data Insights")
+        if st.session_state.get("source_status"):
+            show_source_status(st.session_state.source_status)
         json_data = st.session_state.response_json
 
         if json_data:
@@ -431,11 +254,7 @@ def main():
         # st.json(st.session_state.response_json)
 
         if "all_suggested_niches" not in st.session_state:
-            st.session_state.all_suggested_niches = [
-                niche
-                for category in st.session_state.response_json["Affected Business Categories"]
-                for niche in category.get("Suggested Niches", [])
-            ]
+            st.session_state.all_suggested_niches = suggested_niches(st.session_state.response_json)
 
         # -------------------
         # Enrichment Section
@@ -448,13 +267,22 @@ def main():
                 submit_button = st.form_submit_button(label="🔍 Enrich Data")
 
             if submit_button:
-                with st.spinner("🔄 Extracting relevant companies..."):
-                    companies = run_graph(chosen_niche)
-                    df = enrich(companies)
-                    filtered_df = clean_company_list(df, chosen_niche)
-
+                st.session_state.pop("enrichment", None)
+                submit_job("enrich_job", "enrich", enrich_job, chosen_niche, trace_enabled=record_trace)
+
+            if "enrich_job" in st.session_state:
+                job_panel("enrich_job", on_enrich_done)
+            elif "enrichment" in st.session_state:
+                enrichment = st.session_state.enrichment
+                report = enrichment["report"]
                 st.success("✅ Enrichment complete! See the relevant data below.")
-                st.dataframe(filtered_df)
+                st.dataframe(enrichment["companies"], use_container_width=True)
+                st.caption(report.describe())
+                provenance = enrichment.get("provenance")
+                if provenance is not None:
+                    matched = int((provenance["MATCH_TYPE"] != "none").sum())
+                    with st.expander(f"🔎 {matched} of {len(provenance)} company names found in Crunchbase"):
+                        st.dataframe(provenance, use_container_width=True)
 
     # -------------------
     # Download Buttons
@@ -466,14 +294,21 @@ def main():
             st.download_button("⬇️ Download CSV", st.session_state.csv_data, "scraped_data.csv", "text/csv",
                                use_container_width=True)
         with col2:
+            export_format = st.selectbox("Scraped data format", EXPORT_FORMATS, label_visibility="collapsed")
+            # The Excel file is built once per fetch; the other formats only when picked
+            scrapes_file = (st.session_state.scrapes_excel if export_format == "xlsx"
+                            else export_scrapes(st.session_state.scrapes, export_format))
             st.download_button(
                 "⬇️ Download Scraped News/Tweets",
-                st.session_state.scrapes_excel,
-                "scraped_data.xlsx",
-                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                scrapes_file,
+                f"scraped_data.{export_format}",
+                export_mime_type(export_format),
                 use_container_width=True
             )
 
+    if "last_trace" in st.session_state:
+        show_performance_panel(st.session_state.last_trace)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,204 @@
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+import pandas as pd
+
+NAIC_TABLE_URL = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQazo4kuy0iLUc136vNV95JIyaYHh2asSBLs2bPJlokm38KhSjhwlUhjpE85vu_BqLbDcOQxYPA4I28/pub?gid=0&single=true&output=csv"
+DEFAULT_DB_PATH = os.path.join(".cache", "naics.sqlite")
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "naics_categories.csv")
+DEFAULT_TTL = 24 * 60 * 60  # Refresh from Google Sheets at most once a day
+RETRY_BACKOFF = (60, 60 * 60)  # First and longest wait before retrying a failed download
+CODE_COLUMN = "naic_category"
+NAME_COLUMN = "Category"
+
+
+class NaicsStore:
+    """
+    Local NAICS category table backed by SQLite.
+
+    The table is loaded into memory once and indexed by code and by (case-insensitive)
+    category name. Data comes from, in order: the SQLite store, the bundled CSV
+    snapshot, the Google Sheet. Whenever categories() finds the data older than `ttl` it
+    refreshes it from the sheet in a background thread while the current data keeps
+    being served, so neither startup nor requests wait on Google Docs. Failed downloads,
+    including the first one when there is no store or snapshot (the store then serves no
+    categories), are retried with an exponential backoff.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, url=NAIC_TABLE_URL, snapshot_path=SNAPSHOT_PATH,
+                 ttl=DEFAULT_TTL):
+        self.db_path = db_path
+        self.url = url
+        self.snapshot_path = snapshot_path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._retry_at = 0.0
+        self._retry_delay = RETRY_BACKOFF[0]
+        self._updated_at = 0.0
+        self._records = []
+        self._by_code = {}
+        self._by_name = {}
+        self._load()
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        return sqlite3.connect(self.db_path)
+
+    def _read_db(self):
+        """Return (DataFrame, updated_at) from the SQLite store, or (None, None)."""
+        if not os.path.exists(self.db_path):
+            return None, None
+        try:
+            with closing(self._connect()) as conn, conn:
+                df = pd.read_sql_query(f"select code as {CODE_COLUMN}, name as {NAME_COLUMN} "
+                                       f"from categories order by rowid", conn)
+                updated_at = conn.execute("select value from meta where key = 'updated_at'").fetchone()
+        except (sqlite3.Error, pd.errors.DatabaseError) as e:
+            logging.warning(f"Could not read NAICS store {self.db_path}: {e}")
+            return None, None
+        return df, float(updated_at[0]) if updated_at else 0.0
+
+    def _write_db(self, df, updated_at=None):
+        with closing(self._connect()) as conn, conn:
+            conn.executescript("""
+                drop table if exists categories;
+                create table categories (code text not null, name text not null collate nocase);
+                create index idx_categories_code on categories (code);
+                create index idx_categories_name on categories (name);
+                create table if not exists meta (key text primary key, value text);
+            """)
+            conn.executemany("insert into categories (code, name) values (?, ?)",
+                             df[[CODE_COLUMN, NAME_COLUMN]].astype(str).itertuples(index=False))
+            conn.execute("insert or replace into meta (key, value) values ('updated_at', ?)",
+                         (str(time.time() if updated_at is None else updated_at),))
+
+    @staticmethod
+    def _unique(df):
+        return df[[CODE_COLUMN, NAME_COLUMN]].dropna().astype(str).drop_duplicates()
+
+    def _index(self, df, updated_at):
+        records = df.to_dict(orient="records")
+        by_code, by_name = {}, {}
+        for record in records:
+            by_code.setdefault(record[CODE_COLUMN], []).append(record)
+            by_name.setdefault(record[NAME_COLUMN].lower(), []).append(record)
+        with self._lock:
+            self._records, self._by_code, self._by_name = records, by_code, by_name
+            self._updated_at = updated_at
+
+    def _load(self):
+        df, updated_at = self._read_db()
+        if df is None and os.path.exists(self.snapshot_path):
+            logging.info(f"Seeding NAICS store from bundled snapshot {self.snapshot_path}")
+            df = self._unique(pd.read_csv(self.snapshot_path, dtype=str))
+            # Only a seed: stale right away, so the sheet replaces it once it is reachable
+            updated_at = 0.0
+            self._write_db(df, updated_at=updated_at)
+        if df is None:
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"No local NAICS data and the download failed; serving no categories: {e}")
+                self._schedule_retry()
+            return
+        self._index(df, updated_at)
+        self._refresh_if_due()
+
+    def refresh(self):
+        """Download the category table from the Google Sheet and persist it."""
+        df = self._unique(pd.read_csv(self.url, dtype=str))
+        updated_at = time.time()
+        self._write_db(df, updated_at=updated_at)
+        self._index(df, updated_at)
+        with self._lock:
+            self._retry_at = 0.0
+            self._retry_delay = RETRY_BACKOFF[0]
+        logging.info(f"NAICS store refreshed with {len(df)} categories")
+
+    def _schedule_retry(self):
+        with self._lock:
+            self._retry_at = time.time() + self._retry_delay
+            logging.info(f"Next NAICS download attempt in {self._retry_delay}s")
+            self._retry_delay = min(self._retry_delay * 2, RETRY_BACKOFF[1])
+
+    def refresh_in_background(self):
+        """Refresh from the sheet in a daemon thread; failures keep the current data."""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.warning(f"Background NAICS refresh failed, keeping local data: {e}")
+                self._schedule_retry()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="naics-refresh", daemon=True).start()
+
+    def _refresh_if_due(self):
+        """Start a background refresh when the data is missing or stale and no retry is pending."""
+        now = time.time()
+        with self._lock:
+            stale = not self._records or now - self._updated_at > self.ttl
+            due = stale and now >= self._retry_at
+        if due:
+            self.refresh_in_background()
+
+    def categories(self):
+        """Return the unique categories as [{"naic_category": ..., "Category": ...}, ...]."""
+        self._refresh_if_due()
+        with self._lock:
+            return list(self._records)
+
+    def by_code(self, code):
+        """Return the categories with the given NAIC code."""
+        with self._lock:
+            return list(self._by_code.get(str(code), []))
+
+    def by_name(self, name):
+        """Return the categories with the given name (case-insensitive)."""
+        with self._lock:
+            return list(self._by_name.get(name.lower(), []))
+
+    def export_snapshot(self, path=None):
+        """Write the current table as the bundled CSV snapshot."""
+        path = path or self.snapshot_path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pd.DataFrame(self.categories(), columns=[CODE_COLUMN, NAME_COLUMN]).to_csv(path, index=False)
+        return path
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_naics_store(**kwargs):
+    """Return the process-wide NAICS store, loading it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = NaicsStore(**kwargs)
+        return _store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the local NAICS category store.")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="also write the bundled CSV snapshot used for offline starts")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    store = NaicsStore(ttl=float("inf"))
+    store.refresh()
+    if args.snapshot:
+        print(f"Snapshot written to {store.export_snapshot()}")
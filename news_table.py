@@ -0,0 +1,93 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+RFC_822_FORMAT = "%a, %d %b %Y %H:%M:%S %Z"
+NEWS_COLUMNS = ["title", "link", "date", "published_at", "keywords", "canonical_link", "title_key"]
+
+
+def parse_dates(dates):
+    """
+    Parse RSS publication dates in bulk.
+
+    The strict RFC 822 format covers Google News; anything else falls back to pandas'
+    mixed-format parser. Unparseable dates become NaT.
+    """
+    parsed = pd.to_datetime(dates, format=RFC_822_FORMAT, utc=True, errors="coerce")
+    missing = parsed.isna() & dates.notna()
+    if missing.any():
+        parsed[missing] = pd.to_datetime(dates[missing], format="mixed", utc=True, errors="coerce")
+    return parsed
+
+
+def canonical_links(links):
+    """Lower-case scheme/host, drop 'www.', query strings, fragments and trailing slashes."""
+    return (links.fillna("")
+            .str.strip()
+            .str.replace(r"^https?://(www\.)?", "", regex=True, case=False)
+            .str.replace(r"[?#].*$", "", regex=True)
+            .str.rstrip("/")
+            .str.lower())
+
+
+def title_keys(titles):
+    """Normalize titles for duplicate detection: case, punctuation and whitespace."""
+    return (titles.fillna("")
+            .str.lower()
+            .str.replace(r"[^\w\s]", " ", regex=True)
+            .str.replace(r"\s+", " ", regex=True)
+            .str.strip())
+
+
+def _merge_duplicates(df, key):
+    """Keep the first row per key and collect the keywords of all its duplicates."""
+    # Rows with an empty key (no link / no title) are never merged with each other
+    keys = df[key].mask(df[key] == "", "\0" + pd.Series(range(len(df)), index=df.index).astype(str))
+    keywords = df.groupby(keys, sort=False)["keywords"].agg(
+        lambda lists: list(dict.fromkeys(kw for kws in lists for kw in kws)))
+    first = df[~keys.duplicated()].copy()
+    first["keywords"] = keys[first.index].map(keywords)
+    return first
+
+
+def build_news_table(entries_by_query, days=5, now=None):
+    """
+    Turn the feed entries of all keywords into one deduplicated table.
+
+    Dates are parsed and the `days` window is applied in one vectorized step. Articles
+    returned for several keywords are merged by canonical link and normalized title;
+    the `keywords` column keeps every keyword that returned the article.
+
+    Args:
+        entries_by_query (dict): query -> list of {"title", "link", "date"} entries.
+        days (int): Number of days to look back.
+        now (datetime): Reference time, defaults to the current UTC time.
+
+    Returns:
+        pd.DataFrame: One row per unique article, newest first.
+    """
+    rows = [(query, entry.get("title"), entry.get("link"), entry.get("date"))
+            for query, entries in entries_by_query.items() for entry in entries]
+    if not rows:
+        return pd.DataFrame(columns=NEWS_COLUMNS)
+    df = pd.DataFrame(rows, columns=["query", "title", "link", "date"])
+
+    df["published_at"] = parse_dates(df["date"])
+    unparsed = int(df["published_at"].isna().sum())
+    if unparsed:
+        logging.warning(f"Could not parse the date of {unparsed} news entries; they were skipped")
+
+    cutoff = pd.Timestamp((now or datetime.now(timezone.utc)) - timedelta(days=days))
+    df = df[df["published_at"] > cutoff].copy()
+
+    df["canonical_link"] = canonical_links(df["link"])
+    df["title_key"] = title_keys(df["title"])
+    df["keywords"] = df["query"].map(lambda query: [query])
+    df = df.sort_values("published_at", ascending=False, kind="stable")
+
+    before = len(df)
+    df = _merge_duplicates(df, "canonical_link")
+    df = _merge_duplicates(df, "title_key")
+    logging.info(f"News table: {before} entries in window, {len(df)} unique articles")
+    return df[NEWS_COLUMNS].reset_index(drop=True)
@@ -1,7 +1,16 @@
+import logging
+import time
+from dataclasses import dataclass
+
 import streamlit as st
 import pandas as pd
 import snowflake.connector
 
+from company_index import SUFFIX_PATTERN, normalize_company_name
+from tracing import span
+
+DEFAULT_FETCH_SIZE = 10000  # Rows per batch when the driver has no Arrow batch fetch
+
 
 # Connect to Snowflake
 @st.cache_resource
@@ -13,25 +22,276 @@ def init_connection():
         # warehouse=st.secrets["snowflake"]["warehouse"],
         database=st.secrets["snowflake"]["database"],
         schema=st.secrets["snowflake"]["schema"],
+        paramstyle="qmark",  # Same placeholders as the SQLite/DuckDB stand-ins
     )
 
 
+@dataclass
+class QueryStats:
+    rows: int = 0
+    batches: int = 0
+    bytes: int = 0
+    execute_seconds: float = 0.0
+    fetch_seconds: float = 0.0
+
+
+def _project(query, columns=None, limit=None):
+    """Wrap a query with a column projection and/or a row limit."""
+    if not columns and limit is None:
+        return query
+    select = ", ".join(columns) if columns else "*"
+    sql = f"select {select} from ({query}) as q"
+    if limit is not None:
+        sql += f" limit {int(limit)}"
+    return sql
+
+
+def stream_query(query, params=None, conn=None, limit=None, columns=None,
+                 batch_size=DEFAULT_FETCH_SIZE, stats=None):
+    """
+    Execute a query once and yield the result as DataFrame batches.
+
+    Snowflake cursors are read with fetch_pandas_batches (Arrow); any other DB-API
+    cursor (SQLite, DuckDB) falls back to fetchmany, so tests can run locally.
+
+    Args:
+        query (str): SQL query, with `?` placeholders for params.
+        params (tuple): Bound parameters.
+        conn: DB-API connection, the Snowflake connection by default.
+        limit (int): Optional maximum number of rows.
+        columns (list): Optional column projection.
+        batch_size (int): Rows per batch for the fetchmany fallback.
+        stats (QueryStats): Filled with row, byte and timing counters.
+
+    Yields:
+        pd.DataFrame: Result batches; a single empty frame with the result's columns when
+            there are no rows.
+    """
+    conn = conn or init_connection()
+    stats = stats if stats is not None else QueryStats()
+    sql = _project(query, columns, limit)
+
+    cur = conn.cursor()
+    try:
+        start = time.perf_counter()
+        if params is None:
+            cur.execute(sql)
+        else:
+            cur.execute(sql, params)
+        stats.execute_seconds = time.perf_counter() - start
+
+        if hasattr(cur, "fetch_pandas_batches"):
+            batches = cur.fetch_pandas_batches()
+        else:
+            names = [col[0] for col in cur.description]
+            batches = (pd.DataFrame(rows, columns=names) for rows in iter(lambda: cur.fetchmany(batch_size), []))
+
+        start = time.perf_counter()
+        for df in batches:
+            stats.fetch_seconds += time.perf_counter() - start
+            stats.rows += len(df)
+            stats.batches += 1
+            stats.bytes += int(df.memory_usage(deep=True).sum())
+            yield df
+            start = time.perf_counter()
+        if not stats.batches:
+            # No rows: still hand the caller the result's columns
+            yield pd.DataFrame(columns=[col[0] for col in cur.description])
+    finally:
+        cur.close()
+
+
+def fetch_dataframe(query, params=None, conn=None, limit=None, columns=None):
+    """Run a query once and return the whole result as one DataFrame."""
+    stats = QueryStats()
+    with span("sql.query", params=len(params or ())) as s:
+        frames = list(stream_query(query, params=params, conn=conn, limit=limit, columns=columns, stats=stats))
+        s.set(rows=stats.rows, bytes=stats.bytes, batches=stats.batches,
+              execute_seconds=round(stats.execute_seconds, 3), fetch_seconds=round(stats.fetch_seconds, 3))
+    logging.info(f"Query returned {stats.rows} rows ({stats.bytes} bytes) in {stats.batches} batches: "
+                 f"execute {stats.execute_seconds:.2f}s, fetch {stats.fetch_seconds:.2f}s")
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+
 # Run a query on the free Snowflake database
 @st.cache_data
-def run_query(query):
-    conn = init_connection()
-    with conn.cursor() as cur:
-        cur.execute(query)
-        df = pd.DataFrame(cur.fetchall(), columns=[col[0] for col in conn.cursor().execute(query).description])
-        return df
-
-def enrich(company_list):
-    # Escape single quotes in company names for SQL safety
-    safe_company_list = [name.replace("'", "''") for name in company_list]
-    # Create a properly formatted SQL string
-    conditions = " OR ".join(f"name ILIKE '{company}%'" for company in safe_company_list)
-    query = f"select * from crunchbase_basic_company_data.public.organization_summary where {conditions}"
-             #f"and country_code like '%USA%'")
-    data = run_query(query)
-    return data
+def run_query(query, params=None, limit=None, columns=None):
+    return fetch_dataframe(query, params=params, limit=limit, columns=columns)
+
+
+ORGANIZATION_TABLE = "crunchbase_basic_company_data.public.organization_summary"
+
+
+def _regexp_replace_all(expr, pattern, replacement, dialect):
+    if dialect == "snowflake":
+        return f"regexp_replace({expr}, '{pattern}', '{replacement}', 1, 0)"
+    return f"regexp_replace({expr}, '{pattern}', '{replacement}', 'g')"
+
+
+def name_key_sql(column, dialect="snowflake"):
+    """SQL expression computing normalize_company_name() on the warehouse side."""
+    key = f"trim({_regexp_replace_all(f'lower({column})', '[^a-z0-9]+', ' ', dialect)})"
+    padded = f"' ' || {key}"
+    return f"trim({_regexp_replace_all(padded, SUFFIX_PATTERN, '', dialect)})"
+
+
+def bulk_match_query(candidate_count, table=ORGANIZATION_TABLE, dialect="snowflake"):
+    """
+    Build the bulk name-matching query for `candidate_count` bound (input_name, name_key) pairs.
+
+    Candidates are joined on the exact normalized name; candidates without an exact
+    match fall back to a word-prefix match ("acme" -> "acme food group").
+    """
+    values = ", ".join(["(?, ?)"] * candidate_count)
+    return f"""
+with candidates as (
+    select * from (values {values}) as c (match_input, name_key)
+),
+orgs as (
+    select o.*, {name_key_sql("o.name", dialect)} as match_key from {table} o
+),
+exact as (
+    select c.match_input, 'exact' as match_type, orgs.*
+    from candidates c join orgs on orgs.match_key = c.name_key
+),
+prefix as (
+    select c.match_input, 'prefix' as match_type, orgs.*
+    from candidates c join orgs
+        on split_part(orgs.match_key, ' ', 1) = split_part(c.name_key, ' ', 1)
+        and orgs.match_key like c.name_key || ' %'
+    where c.match_input not in (select match_input from exact)
+)
+select * from exact
+union all
+select * from prefix
+"""
+
+
+def match_companies(company_list, conn=None, table=ORGANIZATION_TABLE, dialect="snowflake"):
+    """
+    Match company names against the organization table in one bulk query.
+
+    Args:
+        company_list (list): Candidate company names.
+        conn: DB-API connection; the cached Snowflake query path is used when omitted.
+        table (str): Organization table.
+        dialect (str): "snowflake" or "duckdb".
+
+    Returns:
+        pd.DataFrame: One row per (input name, organization) match, with MATCH_INPUT and
+            MATCH_TYPE ("exact" or "prefix") columns in front of the organization columns.
+    """
+    candidates = {}
+    for name in company_list:
+        key = normalize_company_name(name)
+        if key:
+            candidates.setdefault(name, key)
+    if not candidates:
+        return pd.DataFrame(columns=["MATCH_INPUT", "MATCH_TYPE"])
+
+    query = bulk_match_query(len(candidates), table=table, dialect=dialect)
+    params = tuple(value for pair in candidates.items() for value in pair)
+    if conn is None:
+        matches = run_query(query, params=params)
+    else:
+        matches = fetch_dataframe(query, params=params, conn=conn)
+    matches = matches.rename(columns=str.upper)
+    return matches.drop(columns=["MATCH_KEY"], errors="ignore")
+
+
+def match_provenance(matches, company_list):
+    """Summarize per input name how it matched: exact, prefix or none, and how many organizations."""
+    provenance = pd.DataFrame({"MATCH_INPUT": list(dict.fromkeys(company_list))})
+    if matches.empty or "MATCH_INPUT" not in matches.columns:
+        return provenance.assign(MATCH_TYPE="none", MATCH_COUNT=0)
+    counts = matches.groupby("MATCH_INPUT").agg(MATCH_TYPE=("MATCH_TYPE", "first"),
+                                                MATCH_COUNT=("MATCH_TYPE", "size"))
+    provenance = provenance.join(counts, on="MATCH_INPUT")
+    provenance["MATCH_TYPE"] = provenance["MATCH_TYPE"].fillna("none")
+    provenance["MATCH_COUNT"] = provenance["MATCH_COUNT"].fillna(0).astype(int)
+    return provenance
+
+
+def enrich_ilike(company_list, conn=None, table=ORGANIZATION_TABLE):
+    """Legacy matching: one `name ILIKE 'x%'` clause per company. Kept for benchmarks."""
+    if not company_list:
+        return pd.DataFrame()
+    conditions = " OR ".join(["name ILIKE ?"] * len(company_list))
+    query = f"select * from {table} where {conditions}"
+    params = tuple(f"{name}%" for name in company_list)
+    if conn is None:
+        return run_query(query, params=params)
+    return fetch_dataframe(query, params=params, conn=conn)
+
+
+def fetch_by_uuid(uuids, conn=None, table=ORGANIZATION_TABLE):
+    """Fetch organizations by UUID with one bound IN-list query."""
+    if not uuids:
+        return pd.DataFrame()
+    placeholders = ", ".join(["?"] * len(uuids))
+    query = f"select * from {table} where uuid in ({placeholders})"
+    if conn is None:
+        return run_query(query, params=tuple(uuids))
+    return fetch_dataframe(query, params=tuple(uuids), conn=conn)
+
+
+def match_with_index(company_list, index, conn=None, table=ORGANIZATION_TABLE, dialect="snowflake",
+                     remote_fallback=True):
+    """
+    Match names in-process with the local company index and fetch only the matched UUIDs.
+
+    Names the index does not know go through the bulk warehouse match when
+    remote_fallback is set, and are dropped otherwise.
+
+    Returns:
+        pd.DataFrame: Same shape as match_companies (MATCH_INPUT, MATCH_TYPE, organization columns).
+    """
+    provenance, unmatched = [], []
+    for name, found in index.lookup_many(company_list).items():
+        if found:
+            provenance += [(name, match["match_type"], match["uuid"]) for match in found]
+        else:
+            unmatched.append(name)
+    logging.info(f"Company index matched {len(company_list) - len(unmatched)}/{len(company_list)} names")
+
+    frames = []
+    if provenance:
+        provenance = pd.DataFrame(provenance, columns=["MATCH_INPUT", "MATCH_TYPE", "UUID"])
+        orgs = fetch_by_uuid(list(dict.fromkeys(provenance["UUID"])), conn=conn, table=table)
+        orgs = orgs.rename(columns=str.upper)
+        if not orgs.empty:
+            frames.append(provenance.merge(orgs, on="UUID"))
+    if unmatched and remote_fallback:
+        frames.append(match_companies(unmatched, conn=conn, table=table, dialect=dialect))
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=["MATCH_INPUT", "MATCH_TYPE"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def enrich(company_list, conn=None, table=ORGANIZATION_TABLE, dialect="snowflake", index=None):
+    """
+    Fetch the Crunchbase organizations matching a list of company names.
+
+    Args:
+        company_list (list): Company names, e.g. the output of run_graph.
+        conn: DB-API connection; the cached Snowflake query path is used when omitted.
+        table (str): Organization table.
+        dialect (str): "snowflake" or "duckdb".
+        index (CompanyIndex): Optional local name index; matched names are then only
+            fetched by UUID.
 
+    Returns:
+        tuple: (matches, provenance): one row per organization with the MATCH_INPUT /
+            MATCH_TYPE that first found it, and match_provenance() with one row per input
+            name, unmatched names and names of organizations found twice included.
+    """
+    if index is not None:
+        matches = match_with_index(company_list, index, conn=conn, table=table, dialect=dialect)
+    else:
+        matches = match_companies(company_list, conn=conn, table=table, dialect=dialect)
+    provenance = match_provenance(matches, company_list)
+    logging.info(f"Company matching: {provenance['MATCH_TYPE'].value_counts().to_dict()}")
+    if "UUID" in matches.columns:
+        matches = matches.drop_duplicates("UUID").reset_index(drop=True)
+    return matches, provenance
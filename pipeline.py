@@ -0,0 +1,340 @@
+"""
+Headless MarketMuse pipeline: collect -> niches -> companies -> enrich -> clean.
+
+Each stage is a plain function shared with the Streamlit app. The CLI runs a file of
+(keywords, business_type) jobs on a worker pool and checkpoints every stage under
+<out>/<job id>/, so an interrupted run resumes where it stopped. A stage in which some
+niches or company chunks failed, and the stages after it, are not checkpointed: the job
+is reported "partial" and running it again retries them.
+
+    python pipeline.py jobs.jsonl --out runs/nightly --workers 2 --format parquet
+
+A jobs file is JSONL ({"keywords": "AI, tariffs", "business_type": "food service"},
+optionally with "niches" or "max_niches") or a CSV with keywords and business_type columns.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, asdict
+from typing import List, Optional
+
+import pandas as pd
+
+from collectors import default_collectors, merge_combined_data, run_collectors
+from company_index import get_company_index
+from company_names_graph import run_graph, run_graph_many
+from driver_pool import get_driver_pool
+from exporters import convert_json_to_csv, export_scrapes
+from llm import choose_relevant_niches
+from niche_enrichment import enrich
+from relevance_prefilter import PrefilterReport, iter_two_tier_clean, two_tier_clean
+from result_store import get_result_store, result_key
+import tracing
+from tracing import span, trace
+
+DEFAULT_OUT_DIR = "runs"
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_NICHES = 3
+OUTPUT_FORMATS = ["parquet", "jsonl"]
+COLLECT_EVENT_LABELS = {
+    "started": "⏳ Collecting {label} for {item}",
+    "done": "✅ {label} fetched for {item}",
+    "error": "⚠️ Error collecting {label} for {item}",
+    "timeout": "⚠️ Timed out collecting {label} for {item}",
+}
+
+
+def collect_signals(keyword_list, news_progress=None, tweet_progress=None, on_event=None, collectors=None):
+    """
+    Collect news, tweets and Truth Social posts for a keyword list, all sources at once.
+
+    Returns:
+        tuple: (combined_data for the LLM, combined_data for the exports with every keyword
+            match of an article, {source: status dict}).
+    """
+    collectors = collectors or default_collectors(news_progress, tweet_progress)
+    with span("collect", keywords=len(keyword_list)):
+        results = run_collectors(collectors, keyword_list, on_event=on_event)
+    logging.info(f"Driver pool metrics: {get_driver_pool().metrics.as_dict()}")
+    statuses = {source: result.status() for source, result in results.items()}
+    # Each article once for the LLM; exports expand the keyword matches again
+    return merge_combined_data(results), merge_combined_data(results, expand=True), statuses
+
+
+def suggested_niches(response_json):
+    """Flatten the suggested niches of an analysis result, in order and without duplicates."""
+    return list(dict.fromkeys(niche
+                              for category in response_json.get("Affected Business Categories", [])
+                              for niche in category.get("Suggested Niches", [])))
+
+
+def build_result(combined_data, scrapes, response_json, source_status=None):
+    """The storable result of a fetch: analysis, CSV and the scrapes with their Excel export."""
+    with span("export"):
+        return {
+            "combined_data": combined_data,
+            "response_json": response_json,
+            "csv_data": convert_json_to_csv(response_json),
+            "scrapes": scrapes,
+            "scrapes_excel": export_scrapes(scrapes, "xlsx"),
+            "source_status": source_status or {},
+        }
+
+
+def fetch_job(ctx, keyword_list, business_type, trace_enabled=None):
+    """
+    Background job: collect and analyse, shared with other sessions through the result store.
+
+    Returns:
+        dict: {"key", "source", "result", "trace"}; trace holds the spans when recorded.
+    """
+    key = result_key(keyword_list, business_type)
+
+    def compute():
+        def on_event(status, collector, item, detail):
+            ctx.event(COLLECT_EVENT_LABELS[status].format(label=collector.label, item=item))
+
+        combined_data, scrapes, source_status = ctx.run("browser", collect_signals, keyword_list,
+                                                        news_progress=ctx.progress, tweet_progress=ctx.progress,
+                                                        on_event=on_event)
+        for status in source_status.values():
+            for task, error in status["errors"].items():
+                ctx.event(f"⚠️ {status['source']} failed for {task}: {error}")
+        ctx.event("✅ All data fetched! Passing it to AI for analysis...")
+        response_json = ctx.run("llm", choose_relevant_niches, combined_data, business_type)
+        return build_result(combined_data, scrapes, response_json, source_status)
+
+    with trace("fetch", enabled=trace_enabled, keywords=len(keyword_list)) as run:
+        result, source = get_result_store().get_or_compute(key, compute)
+    return {"key": key, "source": source, "result": result, "trace": run.spans if run else None}
+
+
+def enrich_job(ctx, niche, trace_enabled=None):
+    """
+    Background job: companies for a niche, enriched and cleaned; relevant rows are
+    emitted as partial results as the classification chunks finish.
+
+    Returns:
+        dict: {"companies" (DataFrame), "provenance" (DataFrame, how each company name
+            matched), "report" (PrefilterReport), "trace"}.
+    """
+    with trace("enrich", enabled=trace_enabled, niche=niche) as run:
+        ctx.event("🔄 Extracting relevant companies...")
+        companies = ctx.run("llm", run_graph, niche)
+        ctx.event(f"🔄 Looking up {len(companies)} companies...")
+        df, provenance = ctx.run("sql", enrich, companies, index=get_company_index())
+        ctx.event(f"🔄 Filtering {len(df)} relevant companies...")
+        report = PrefilterReport()
+
+        def clean():
+            frames = []
+            for frame in iter_two_tier_clean(df, niche, report=report):
+                frames.append(frame)
+                ctx.emit(frame)
+            return pd.concat(frames).sort_index().reset_index(drop=True) if frames else df.iloc[0:0]
+
+        relevant = ctx.run("llm", clean)
+    return {"companies": relevant, "provenance": provenance, "report": report,
+            "trace": run.spans if run else None}
+
+
+@dataclass
+class Job:
+    keywords: List[str]
+    business_type: str
+    niches: Optional[List[str]] = None
+    max_niches: int = DEFAULT_MAX_NICHES
+    job_id: str = ""
+
+    def __post_init__(self):
+        if isinstance(self.keywords, str):
+            self.keywords = [kw.strip() for kw in self.keywords.split(",") if kw.strip()]
+        if not self.job_id:
+            digest = hashlib.sha256(json.dumps([sorted(self.keywords), self.business_type, self.niches])
+                                    .encode("utf-8")).hexdigest()[:8]
+            slug = re.sub(r"[^a-z0-9]+", "-", self.business_type.lower()).strip("-")[:40]
+            self.job_id = f"{slug or 'job'}-{digest}"
+
+
+def read_jobs(path):
+    """Read jobs from a JSONL file or a CSV with keywords and business_type columns."""
+    if path.endswith(".csv"):
+        rows = pd.read_csv(path, dtype=str).dropna(subset=["keywords", "business_type"]).to_dict(orient="records")
+    else:
+        with open(path, "r", encoding="utf-8") as file:
+            rows = [json.loads(line) for line in file if line.strip()]
+    return [Job(**{key: value for key, value in row.items() if key in Job.__dataclass_fields__}) for row in rows]
+
+
+class Checkpoints:
+    """Stage outputs of one job on disk; JSON for structures, Parquet/JSONL for tables."""
+
+    def __init__(self, directory, output_format="parquet"):
+        self.directory = directory
+        self.output_format = output_format
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, stage, table):
+        extension = self.output_format if table else "json"
+        return os.path.join(self.directory, f"{stage}.{extension}")
+
+    def has(self, stage, table=False):
+        return os.path.exists(self._path(stage, table))
+
+    def load(self, stage, table=False):
+        path = self._path(stage, table)
+        if not table:
+            with open(path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        if self.output_format == "parquet":
+            return pd.read_parquet(path)
+        return pd.read_json(path, orient="records", lines=True, dtype=False)
+
+    def save(self, stage, value, table=False):
+        path = self._path(stage, table)
+        tmp_path = f"{path}.tmp"
+        if not table:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(value, file, ensure_ascii=False, default=str)
+        elif self.output_format == "parquet":
+            value.to_parquet(tmp_path, index=False)
+        else:
+            value.to_json(tmp_path, orient="records", lines=True, force_ascii=False, date_format="iso")
+        os.replace(tmp_path, path)  # A crash never leaves a half-written checkpoint behind
+
+
+def _niche_table(frames):
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=["NICHE"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def run_job(job, out_dir=DEFAULT_OUT_DIR, output_format="parquet"):
+    """
+    Run every stage of a job, skipping the stages that already have a checkpoint.
+
+    Returns:
+        dict: Job summary with per-stage seconds and row counts.
+    """
+    with trace("job", job_id=job.job_id, path=os.path.join(out_dir, "traces.jsonl")):
+        return _run_stages(job, Checkpoints(os.path.join(out_dir, job.job_id), output_format))
+
+
+def _run_stages(job, checkpoints):
+    checkpoints.save("job", asdict(job))
+    summary = {"job_id": job.job_id, "business_type": job.business_type, "stages": {}}
+    # Stage -> items (niches, companies) that failed; such a stage and every stage after it
+    # is not checkpointed, so resuming the job retries them
+    incomplete = {}
+
+    def stage(name, compute, table=False):
+        if not incomplete and checkpoints.has(name, table):
+            summary["stages"][name] = "checkpoint"
+            return checkpoints.load(name, table)
+        start = time.perf_counter()
+        with span(name):
+            value = compute()
+        if incomplete:
+            logging.warning(f"[{job.job_id}] {name} not checkpointed; incomplete: {incomplete}")
+        else:
+            checkpoints.save(name, value, table)
+        summary["stages"][name] = round(time.perf_counter() - start, 2)
+        logging.info(f"[{job.job_id}] {name} done in {summary['stages'][name]}s")
+        return value
+
+    def collect():
+        combined_data, _, source_status = collect_signals(job.keywords)
+        summary["sources"] = {source: status["state"] for source, status in source_status.items()}
+        return combined_data
+
+    combined_data = stage("collect", collect)
+    response_json = stage("niches", lambda: choose_relevant_niches(combined_data, job.business_type))
+    niches = job.niches or suggested_niches(response_json)[:job.max_niches]
+
+    def find_companies():
+        failed = set()
+        companies = run_graph_many(niches, failed=failed)
+        if failed:
+            incomplete["companies"] = sorted(failed)
+        return companies
+
+    companies = stage("companies", find_companies)
+
+    def enrich_all():
+        index = get_company_index()
+        frames = []
+        for niche, names in companies.items():
+            df, provenance = enrich(names, index=index)
+            summary.setdefault("matching", {})[niche] = provenance["MATCH_TYPE"].value_counts().to_dict()
+            frames.append(df.assign(NICHE=niche))
+        return _niche_table(frames)
+
+    enriched = stage("enrich", enrich_all, table=True)
+
+    def clean_all():
+        frames = []
+        for niche, df in enriched.groupby("NICHE", sort=False):
+            relevant, report = two_tier_clean(df.reset_index(drop=True), niche)
+            summary.setdefault("prefilter", {})[niche] = report.as_dict()
+            if report.unclassified:
+                incomplete.setdefault("clean", []).append(niche)
+            frames.append(relevant)
+        return _niche_table(frames)
+
+    relevant = stage("clean", clean_all, table=True)
+    summary["niches"] = niches
+    summary["companies"] = len(relevant)
+    if incomplete:
+        summary["incomplete"] = incomplete
+    return summary
+
+
+def run_jobs(jobs, out_dir=DEFAULT_OUT_DIR, workers=DEFAULT_WORKERS, output_format="parquet"):
+    """
+    Run jobs on a worker pool and append one summary line per job to <out>/results.jsonl.
+
+    A failing job is logged and recorded with its error; the other jobs keep running. A
+    job some niches or company chunks failed in is recorded as "partial"; running it
+    again retries them.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    summaries = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_job, job, out_dir, output_format): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                summary = future.result()
+                summary["status"] = "partial" if summary.get("incomplete") else "done"
+            except Exception as e:
+                logging.exception(f"[{job.job_id}] failed")
+                summary = {"job_id": job.job_id, "business_type": job.business_type,
+                           "status": "failed", "error": str(e)}
+            summaries.append(summary)
+            with open(os.path.join(out_dir, "results.jsonl"), "a", encoding="utf-8") as file:
+                file.write(json.dumps(summary, ensure_ascii=False) + "\n")
+    return summaries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("jobs", help="JSONL or CSV jobs file")
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR, help="output and checkpoint directory")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="jobs running at the same time")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="parquet", help="table output format")
+    parser.add_argument("--trace", action="store_true", help="record stage spans to <out>/traces.jsonl")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.trace:
+        tracing.enable()
+
+    results = run_jobs(read_jobs(args.jobs), out_dir=args.out, workers=args.workers, output_format=args.format)
+    failed = [result["job_id"] for result in results if result["status"] != "done"]
+    print(f"{len(results) - len(failed)}/{len(results)} jobs done; results in {args.out}")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,67 @@
+import logging
+import threading
+import time
+
+DEFAULT_MAX_RENDERS_PER_SECOND = 4
+
+
+class ProgressReporter:
+    """
+    Thread-safe, time-throttled progress sink shared by all collectors.
+
+    Collectors call `update()` as often as they like; it only records the latest count
+    per task and renders at most `max_renders_per_second` times per second. The base
+    class renders to the log, so it works headless (batch jobs, CLI).
+    """
+
+    def __init__(self, max_renders_per_second=DEFAULT_MAX_RENDERS_PER_SECOND):
+        self.min_interval = 1.0 / max_renders_per_second
+        self._state = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_render = 0.0
+
+    def update(self, task, count, total=None, message=None):
+        """
+        Record progress for a task and render if the throttle allows it.
+
+        Args:
+            task (str): Task name, e.g. the keyword being collected.
+            count (int): Items collected so far.
+            total (int): Expected number of items, if known.
+            message (str): Optional short status text.
+        """
+        with self._lock:
+            self._state[task] = (count, total, message)
+            self._dirty = True
+        self.flush()
+
+    def flush(self, force=False):
+        """Render the latest state if it changed and the throttle interval has passed."""
+        if not self._can_render():
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not self._dirty or (not force and now - self._last_render < self.min_interval):
+                return
+            snapshot = dict(self._state)
+            self._dirty = False
+            self._last_render = now
+        self.render(snapshot)
+
+    def snapshot(self):
+        """Return a copy of the current state: task -> (count, total, message)."""
+        with self._lock:
+            return dict(self._state)
+
+    def _can_render(self):
+        return True
+
+    @staticmethod
+    def format_line(task, count, total, message):
+        line = f"{task}: {count}/{total}" if total else f"{task}: {count}"
+        return f"{line} ({message})" if message else line
+
+    def render(self, snapshot):
+        for task, (count, total, message) in snapshot.items():
+            logging.info(self.format_line(task, count, total, message))
@@ -0,0 +1,189 @@
+import logging
+import math
+from dataclasses import dataclass, asdict
+
+import numpy as np
+import pandas as pd
+
+from snowflake_df_cleaner import iter_clean_company_list
+from tracing import span
+
+DEFAULT_ACCEPT_THRESHOLD = 0.5  # Score at or above which a company is accepted without the LLM
+# Score below which a company is rejected without the LLM. Off by default: a score of 0
+# only means no term in common with the niche, and the classifier keeps relations that
+# are "not that obvious" (a dry-aged beef restaurant for "steakhouse")
+DEFAULT_REJECT_THRESHOLD = 0.0
+# Share of automatic decisions also sent to the LLM, so the agreement rate shows what they cost
+DEFAULT_AUDIT_FRACTION = 0.05
+
+
+@dataclass
+class PrefilterReport:
+    total: int = 0
+    auto_accepted: int = 0
+    auto_rejected: int = 0
+    sent_to_llm: int = 0
+    llm_accepted: int = 0
+    audited: int = 0
+    audit_agreements: int = 0
+    band_agreements: int = 0
+    unclassified: int = 0  # Rows sent to the LLM whose chunk kept failing
+
+    @property
+    def llm_call_reduction(self):
+        """Share of the rows the LLM did not have to classify."""
+        return 1 - self.sent_to_llm / self.total if self.total else 0.0
+
+    @property
+    def agreement_rate(self):
+        """Share of audited auto-decisions the LLM agreed with (None without an audit)."""
+        return self.audit_agreements / self.audited if self.audited else None
+
+    def as_dict(self):
+        agreement_rate = self.agreement_rate
+        return {**asdict(self), "llm_call_reduction": round(self.llm_call_reduction, 3),
+                "agreement_rate": None if agreement_rate is None else round(agreement_rate, 3)}
+
+    def describe(self):
+        """One-line summary for the UI."""
+        text = (f"Pre-filter decided {self.auto_accepted + self.auto_rejected} of {self.total} companies "
+                f"locally; {self.sent_to_llm} went to the LLM.")
+        if self.audited:
+            text += (f" The LLM agreed with {self.agreement_rate:.0%} of {self.audited} audited "
+                     f"automatic decisions.")
+        return text
+
+
+def _tokens(texts):
+    """Explode texts into (row, term) pairs; lower-cased words with a naive plural strip."""
+    terms = (texts.fillna("").str.lower()
+             .str.findall(r"[a-z0-9]+")
+             .explode()
+             .dropna())
+    terms = terms.where(terms.str.len() <= 3, terms.str.replace(r"(?<!s)s$", "", regex=True))
+    return terms.rename("term").reset_index().rename(columns={"index": "row"})
+
+
+def score_relevance(descriptions, niche):
+    """
+    TF-IDF cosine similarity between the niche and every description, vectorized over the column.
+
+    Args:
+        descriptions (pd.Series): Company descriptions.
+        niche (str): Niche string.
+
+    Returns:
+        np.ndarray: Similarity in [0, 1] per description, aligned with the series.
+    """
+    descriptions = descriptions.reset_index(drop=True)
+    docs = _tokens(descriptions)
+    if docs.empty:
+        return np.zeros(len(descriptions))
+
+    counts = docs.groupby(["row", "term"]).size().rename("tf").reset_index()
+    idf = np.log((1 + len(descriptions)) / (1 + counts.groupby("term").size())) + 1
+    counts["weight"] = counts["tf"] * counts["term"].map(idf)
+    norms = np.sqrt((counts["weight"] ** 2).groupby(counts["row"]).sum())
+
+    query = _tokens(pd.Series([niche]))["term"].value_counts()
+    query_weights = query * query.index.map(lambda term: idf.get(term, math.log(1 + len(descriptions)) + 1))
+    query_norm = math.sqrt((query_weights ** 2).sum()) or 1.0
+
+    matched = counts[counts["term"].isin(query_weights.index)]
+    dots = (matched["weight"] * matched["term"].map(query_weights)).groupby(matched["row"]).sum()
+    scores = (dots / (norms[dots.index] * query_norm)).reindex(range(len(descriptions)), fill_value=0.0)
+    return scores.to_numpy()
+
+
+def term_coverage(descriptions, niche):
+    """
+    Share of the niche's terms that occur in every description, tokenized like score_relevance().
+
+    Returns:
+        np.ndarray: Coverage in [0, 1] per description, aligned with the series.
+    """
+    descriptions = descriptions.reset_index(drop=True)
+    query = set(_tokens(pd.Series([niche]))["term"])
+    if not query:
+        return np.zeros(len(descriptions))
+    docs = _tokens(descriptions)
+    found = docs[docs["term"].isin(query)].drop_duplicates().groupby("row").size()
+    return (found / len(query)).reindex(range(len(descriptions)), fill_value=0.0).to_numpy()
+
+
+def iter_two_tier_clean(company_df, niche, accept_threshold=DEFAULT_ACCEPT_THRESHOLD,
+                        reject_threshold=DEFAULT_REJECT_THRESHOLD, audit_fraction=DEFAULT_AUDIT_FRACTION, report=None,
+                        **llm_kwargs):
+    """
+    Two-tier relevance filter: a local TF-IDF scorer decides the clear cases, the LLM the rest.
+
+    Companies whose description contains every term of the niche or scores at or above
+    accept_threshold are yielded right away, those below reject_threshold (by default
+    none) are dropped, and only the band in between goes to
+    iter_clean_company_list. A random share (audit_fraction, at least one row) of the
+    automatic decisions is also sent to the LLM to measure how often it agrees.
+
+    Args:
+        company_df (pd.DataFrame): Companies with UUID and SHORT_DESCRIPTION columns.
+        niche (str): Niche to classify against.
+        accept_threshold (float): Auto-accept score.
+        reject_threshold (float): Auto-reject score; 0 sends every non-accepted row to the LLM.
+        audit_fraction (float): Share of auto-decided rows re-checked by the LLM; 0 disables the audit.
+        report (PrefilterReport): Filled with call-reduction and agreement counters.
+        **llm_kwargs: Passed to iter_clean_company_list.
+
+    Yields:
+        pd.DataFrame: Relevant rows, auto-accepted ones first.
+    """
+    report = report if report is not None else PrefilterReport()
+    with span("prefilter.score", companies=len(company_df)):
+        scores = pd.Series(score_relevance(company_df["SHORT_DESCRIPTION"], niche), index=company_df.index)
+        covered = term_coverage(company_df["SHORT_DESCRIPTION"], niche) == 1.0
+    accepted = (scores >= accept_threshold) | covered
+    rejected = scores < reject_threshold
+    uncertain = ~accepted & ~rejected
+
+    report.total = len(company_df)
+    report.auto_accepted = int(accepted.sum())
+    report.auto_rejected = int(rejected.sum())
+
+    audit = pd.Series(False, index=company_df.index)
+    decided = company_df[~uncertain]
+    if audit_fraction > 0 and not decided.empty:
+        sample_size = min(len(decided), math.ceil(audit_fraction * len(decided)))
+        audit[decided.sample(n=sample_size, random_state=0).index] = True
+    to_llm = uncertain | audit
+    report.sent_to_llm = int(to_llm.sum())
+
+    if accepted.any():
+        yield company_df[accepted]
+
+    llm_accepted = pd.Series(False, index=company_df.index)
+    classified_uuids = set()
+    if to_llm.any():
+        for frame in iter_clean_company_list(company_df[to_llm], niche, classified_uuids=classified_uuids,
+                                             **llm_kwargs):
+            llm_accepted[frame.index] = True
+            new_rows = frame[uncertain[frame.index]]
+            if not new_rows.empty:
+                yield new_rows
+
+    # Agreement only counts rows whose chunk the LLM actually classified
+    classified = company_df["UUID"].isin(classified_uuids)
+    audit &= classified
+    midpoint = (accept_threshold + reject_threshold) / 2
+    report.unclassified = int((to_llm & ~classified).sum())
+    report.audited = int(audit.sum())
+    report.llm_accepted = int((llm_accepted & uncertain).sum())
+    report.audit_agreements = int((audit & (llm_accepted == accepted)).sum())
+    report.band_agreements = int((uncertain & classified & (llm_accepted == (scores >= midpoint))).sum())
+    logging.info(f"Relevance pre-filter: {report.as_dict()}")
+
+
+def two_tier_clean(company_df, niche, **kwargs):
+    """Return (relevant rows, PrefilterReport) using iter_two_tier_clean."""
+    report = PrefilterReport()
+    frames = list(iter_two_tier_clean(company_df, niche, report=report, **kwargs))
+    if not frames:
+        return company_df.iloc[0:0].reset_index(drop=True), report
+    return pd.concat(frames).sort_index().reset_index(drop=True), report
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future
+from datetime import datetime, timezone
+
+DEFAULT_RESULTS_DIR = os.path.join(".cache", "results")
+DEFAULT_MAX_MEMORY_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = 2 * 1024 * 1024 * 1024
+
+
+def result_key(keywords, business_type, day=None):
+    """
+    Canonical key of a collect-and-analyze request.
+
+    Keywords are normalized (case, whitespace), deduplicated and sorted, so "AI, Beef" and
+    "beef,ai" share results; `day` (a date, UTC today by default) buckets them per day.
+    """
+    day = day or datetime.now(timezone.utc).date()
+    canonical = {
+        "keywords": sorted({" ".join(keyword.lower().split()) for keyword in keywords if keyword.strip()}),
+        "business_type": " ".join((business_type or "").lower().split()),
+        "day": day.isoformat(),
+    }
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode("utf-8")).hexdigest()[:32]
+
+
+class ResultStore:
+    """
+    Process-wide store of finished pipeline results, shared by all Streamlit sessions.
+
+    Results live in an in-memory LRU bounded by `max_memory_bytes` (sizes measured by
+    their pickled form) and are written through to `directory`, where the least
+    recently used files are removed beyond `max_disk_bytes`. Memory evictions therefore
+    only spill to disk, and results survive restarts. get_or_compute() runs one
+    computation per key at a time; concurrent callers wait for it and share its result.
+    """
+
+    def __init__(self, directory=DEFAULT_RESULTS_DIR, max_memory_bytes=DEFAULT_MAX_MEMORY_BYTES,
+                 max_disk_bytes=DEFAULT_MAX_DISK_BYTES):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_bytes = 0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "joined": 0}
+        self._memory = OrderedDict()  # key -> (value, size)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    def _remember(self, key, value, size):
+        with self._lock:
+            if key in self._memory:
+                self.memory_bytes -= self._memory.pop(key)[1]
+            if size > self.max_memory_bytes:
+                return
+            self._memory[key] = (value, size)
+            self.memory_bytes += size
+            while self.memory_bytes > self.max_memory_bytes:
+                _, (_, evicted_size) = self._memory.popitem(last=False)
+                self.memory_bytes -= evicted_size
+
+    def get(self, key):
+        """Return the stored result for a key, or None."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry[0]
+        try:
+            with open(self._path(key), "rb") as file:
+                payload = file.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(self._path(key))  # Disk LRU goes by modification time
+        except OSError as e:  # Trimmed meanwhile or read-only; the read still counts
+            logging.debug(f"Could not touch result {key}: {e}")
+        value = pickle.loads(payload)
+        self._remember(key, value, len(payload))
+        with self._lock:
+            self.stats["disk_hits"] += 1
+        return value
+
+    def put(self, key, value):
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(payload)
+        os.replace(tmp_path, self._path(key))
+        self._remember(key, value, len(payload))
+        self._trim_disk()
+
+    def _trim_disk(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".pickle"):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+    def _lookup(self, key):
+        """(stored result or None, "memory" | "disk")"""
+        with self._lock:
+            in_memory = key in self._memory
+        return self.get(key), "memory" if in_memory else "disk"
+
+    def get_or_compute(self, key, compute):
+        """
+        Return (result, source) for a key, computing it at most once across sessions.
+
+        Args:
+            key (str): result_key() of the request.
+            compute (callable): Produces the result on a miss; exceptions reach every waiter
+                and nothing is stored. When the computation is interrupted instead (e.g.
+                KeyboardInterrupt), a waiter takes over and computes it itself.
+
+        Returns:
+            tuple: (result, source) with source "memory", "disk", "joined" (waited for
+                another session's computation) or "computed".
+        """
+        value, source = self._lookup(key)
+        if value is not None:
+            return value, source
+
+        while True:
+            with self._lock:
+                future = self._inflight.get(key)
+                owner = future is None
+                if owner:
+                    future = self._inflight[key] = Future()
+                else:
+                    self.stats["joined"] += 1
+            if owner:
+                break
+            try:
+                return future.result(), "joined"
+            except CancelledError:  # The owner was interrupted; compete to take over
+                continue
+
+        try:
+            # Another owner may have stored the result between the get() above and taking over
+            value, source = self._lookup(key)
+            if value is not None:
+                future.set_result(value)
+                return value, source
+            with self._lock:
+                self.stats["misses"] += 1
+            start = time.perf_counter()
+            value = compute()
+            self.put(key, value)
+            logging.info(f"Result {key} computed in {time.perf_counter() - start:.1f}s and stored")
+            future.set_result(value)
+            return value, "computed"
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def is_running(self, key):
+        with self._lock:
+            return key in self._inflight
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_result_store(**kwargs):
+    """Return the process-wide result store, opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResultStore(**kwargs)
+        return _store
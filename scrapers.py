@@ -0,0 +1,307 @@
+import feedparser
+import httpx
+import lxml.html
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+import threading
+import time
+import logging
+from urllib.parse import quote_plus, urlparse
+
+from clients import get_http_client
+from driver_pool import get_driver_pool
+from feed_fetcher import fetch_raw_feeds
+from news_table import build_news_table
+from tracing import span
+
+NITTER_INSTANCE = "https://nitter.net"
+TRUMP_LINK = "https://truthsocial.com/@realDonaldTrump"
+NITTER_HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                                "Chrome/60.0.3112.50 Safari/537.36"}
+NITTER_CHALLENGE_STATUSES = {403, 503}  # Bot checks some instances answer with until JavaScript runs
+DEFAULT_HOST_INTERVAL = 1.0  # Minimum seconds between two requests to the same host
+
+
+class HostRateLimiter:
+    """Spaces out requests per host so parallel workers do not hammer one instance."""
+
+    def __init__(self, min_interval=DEFAULT_HOST_INTERVAL):
+        self.min_interval = min_interval
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        """Block until a request to the host of `url` is allowed."""
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            with span("rate_limit.wait", host=host, seconds=round(delay, 3)):
+                time.sleep(delay)
+
+
+nitter_rate_limiter = HostRateLimiter()
+
+
+class NitterNeedsBrowser(Exception):
+    """The Nitter page did not contain a server-rendered timeline (e.g. a JavaScript challenge)."""
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+TWEET_CONTENT_XPATH = f"//div[{_has_class('tweet-content')}]"
+TIMELINE_XPATH = f"//div[{_has_class('timeline')}]"
+NEXT_CURSOR_XPATH = f"//div[{_has_class('show-more')}]/a[contains(@href, 'cursor=')]/@href"
+
+
+def parse_nitter_page(page):
+    """
+    Extract tweets and the pagination link from a server-rendered Nitter search page.
+
+    Args:
+        page (bytes | str): Page HTML.
+
+    Returns:
+        tuple: (list of tweet texts, query string of the next page such as "?f=tweets&q=...&cursor=..." or None)
+
+    Raises:
+        NitterNeedsBrowser: The page has no timeline, so it needs JavaScript to render.
+    """
+    document = lxml.html.fromstring(page)
+    if not document.xpath(TIMELINE_XPATH):
+        raise NitterNeedsBrowser("no timeline in the page")
+    tweets = [element.text_content().strip() for element in document.xpath(TWEET_CONTENT_XPATH)]
+    next_links = document.xpath(NEXT_CURSOR_XPATH)
+    return tweets, (next_links[-1] if next_links else None)
+
+
+def scrape_nitter_http(keyword, max_tweets=10, progress=None):
+    """
+    Scrape Nitter search results over HTTP, following the "Load more" cursors until
+    `max_tweets` tweets are read or the results end.
+
+    Raises:
+        NitterNeedsBrowser: The first page can only be rendered by a browser.
+    """
+    search_url = f"{NITTER_INSTANCE}/search"
+    params = f"?f=tweets&q={quote_plus(keyword)}+usa"
+    tweets, seen = [], set()
+    client = get_http_client()
+    while params and params not in seen and len(tweets) < max_tweets:
+        seen.add(params)
+        nitter_rate_limiter.wait(search_url)
+        with span("nitter.http_page", page=len(seen)) as s:
+            try:
+                response = client.get(search_url + params, headers=NITTER_HEADERS, follow_redirects=True)
+                if response.status_code in NITTER_CHALLENGE_STATUSES and not tweets:
+                    raise NitterNeedsBrowser(f"HTTP {response.status_code}")
+                response.raise_for_status()
+                page_tweets, params = parse_nitter_page(response.content)
+            except (httpx.HTTPError, NitterNeedsBrowser) as e:
+                if not tweets:
+                    raise
+                # Keep the pages read so far, e.g. when a later page is a bot check
+                logging.warning(f"Stopped paging Nitter results for '{keyword}' after {len(tweets)} tweets: {e}")
+                s.set(error=str(e))
+                break
+            s.set(tweets=len(page_tweets), bytes=len(response.content))
+        if not page_tweets:
+            break
+        for tweet in page_tweets[:max_tweets - len(tweets)]:
+            tweets.append(tweet)
+            if progress:
+                progress.update(keyword, len(tweets), max_tweets)
+    return tweets
+
+
+def scrape_nitter_browser(keyword, max_tweets=10, progress=None):
+    """Scrape the first page of Nitter search results with a pooled headless Chrome."""
+    encoded_keyword = quote_plus(keyword)
+    search_url = f"{NITTER_INSTANCE}/search?f=tweets&q={encoded_keyword}+usa"
+    tweets = []
+    with get_driver_pool().driver() as driver:
+        nitter_rate_limiter.wait(search_url)
+        with span("nitter.page_load"):
+            driver.get(search_url)
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.tweet-content"))
+            )
+        tweet_elements = driver.find_elements(By.CSS_SELECTOR, "div.tweet-content")
+
+        for tweet in tweet_elements[:max_tweets]:
+            tweets.append(tweet.text)
+            if progress:
+                progress.update(keyword, len(tweets), max_tweets)
+    return tweets
+
+
+def scrape_nitter(keyword, max_tweets=10, progress=None, engine="auto"):
+    """
+    Scrape Nitter search results.
+
+    The page is fetched over HTTP and parsed with lxml; Chrome is only started when
+    the instance serves a page that needs JavaScript. Safe to call from worker
+    threads: it does not touch the Streamlit UI. Pages read before a failing later
+    page are kept; a keyword that yields nothing because of an error raises it, so
+    callers can tell a dead instance from an empty search.
+
+    Args:
+        keyword (str): Search keyword.
+        max_tweets (int): Maximum number of tweets to retrieve; more than one page is
+            read over HTTP when needed.
+        progress (ProgressReporter): Optional progress sink.
+        engine (str): "auto" (HTTP with browser fallback), "http" or "browser".
+
+    Returns:
+        list: List of tweet texts.
+
+    Raises:
+        Exception: The error that kept the first page from being read.
+    """
+    tweets = []
+    logging.info(f"Scraping tweets for: {keyword}")
+
+    with span("tweets.keyword", keyword=keyword, engine=engine) as s:
+        try:
+            if engine in ("auto", "http"):
+                try:
+                    tweets = scrape_nitter_http(keyword, max_tweets, progress)
+                except NitterNeedsBrowser as e:
+                    if engine == "http":
+                        raise
+                    logging.info(f"Nitter page for '{keyword}' needs a browser ({e}); using Chrome")
+                    s.set(fallback=str(e))
+                    engine = "browser"
+            if engine == "browser":
+                tweets = scrape_nitter_browser(keyword, max_tweets, progress)
+
+        except Exception as e:
+            logging.error(f"Error scraping Nitter: {e}")
+            if progress:
+                progress.update(keyword, len(tweets), max_tweets, message=f"error: {e}")
+            raise
+        s.set(tweets=len(tweets))
+
+    return tweets
+
+
+def parse_feed(query, raw_feed, progress=None):
+    """
+    Parse a downloaded RSS feed into plain entries.
+
+    Date filtering and deduplication happen later, for all keywords at once, in
+    news_table.build_news_table.
+
+    Args:
+        query (str): The search query the feed belongs to.
+        raw_feed (bytes): Raw RSS document.
+        progress (ProgressReporter): Optional progress sink.
+
+    Returns:
+        list: Feed entries as {"title", "link", "date"} dicts.
+    """
+    feed = feedparser.parse(raw_feed)
+    entries = [{
+        "title": entry.get("title"),
+        "link": entry.get("link"),
+        "date": entry.get("published")
+    } for entry in feed.entries]
+    if progress:
+        progress.update(query, len(entries), message="articles")
+    return entries
+
+
+def fetch_feeds(queries, days=5, progress=None, **fetch_kwargs):
+    """
+    Fetch the RSS feeds for several queries concurrently into one deduplicated news table.
+
+    Args:
+        queries (list): Search queries.
+        days (int): Number of days to look back.
+        progress (ProgressReporter): Optional progress sink.
+        **fetch_kwargs: Passed to feed_fetcher.fetch_raw_feeds (cache, url_template, ...).
+
+    Returns:
+        tuple: (news table DataFrame, dict of query -> exception for failed feeds)
+    """
+    entries_by_query, failed = {}, {}
+    with span("news.download", queries=len(queries)):
+        raw_feeds = fetch_raw_feeds(queries, **fetch_kwargs)
+    with span("news.parse") as s:
+        for query, raw_feed in raw_feeds.items():
+            if isinstance(raw_feed, BaseException):
+                failed[query] = raw_feed
+                continue
+            entries_by_query[query] = parse_feed(query, raw_feed, progress=progress)
+        news_table = build_news_table(entries_by_query, days=days)
+        s.set(articles=len(news_table), failed=len(failed))
+    return news_table, failed
+
+
+def scroll_up_until_elements(driver, selector, min_count=10, max_scrolls=15):
+    """
+    Scrolls the page until at least min_count unique elements (by aria-label) are found.
+
+    Args:
+        driver (webdriver): Selenium webdriver instance.
+        selector (str): CSS selector to find elements.
+        min_count (int): Minimum number of unique elements required.
+        max_scrolls (int): Maximum number of scroll attempts.
+
+    Returns:
+        list: List of unique aria-label texts.
+    """
+    unique_texts = set()
+    body = driver.find_element(By.TAG_NAME, "body")
+
+    for _ in range(max_scrolls):
+        elements = driver.find_elements(By.CSS_SELECTOR, selector)
+        for element in elements:
+            aria_label = element.get_attribute("aria-label")
+            if aria_label:
+                unique_texts.add(aria_label)
+        if len(unique_texts) >= min_count:
+            break
+        body.send_keys(Keys.PAGE_DOWN)
+        time.sleep(2)  # Allow time for new elements to load
+    return list(unique_texts)
+
+
+def trump_scraper(progress=None):
+    """
+    Scrapes posts from Donald Trump's Truth Social page using Selenium.
+
+    Args:
+        progress (ProgressReporter): Optional progress sink.
+
+    Returns:
+        list: List of post aria-label texts.
+
+    Raises:
+        Exception: Chrome or the page failed; the error is logged and re-raised.
+    """
+    with span("trump.scrape") as s:
+        try:
+            with get_driver_pool().driver() as driver:
+                driver.get(TRUMP_LINK)
+                # Wait until the timeline element is loaded
+                WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "#timeline"))
+                )
+                posts = scroll_up_until_elements(driver, "#timeline .status[aria-label]", min_count=10)
+        except Exception as e:
+            logging.error(f"Error scraping Trump page: {e}")
+            if progress:
+                progress.update("Donald Trump", 0, message=f"error: {e}")
+            raise
+        s.set(posts=len(posts))
+    if progress:
+        progress.update("Donald Trump", len(posts), message="posts")
+    return posts
@@ -0,0 +1,109 @@
+import logging
+import os
+import re
+import threading
+from concurrent.futures import Future
+
+from llm_cache import LLMCache
+from tracing import span
+
+DEFAULT_SEARCH_CACHE_PATH = os.path.join(".cache", "search_cache.sqlite")
+DEFAULT_SEARCH_TTL = 24 * 60 * 60  # Seconds a search result stays valid
+DEFAULT_MAX_SEARCHES = 20000
+
+
+def normalize_query(query):
+    """Cache key form of a query: lower-cased, without quotes, whitespace collapsed."""
+    return " ".join(re.sub(r"[\"'“”‘’`]", " ", query).lower().split())
+
+
+class FakeSearchProvider:
+    """Local search backend for tests: canned results per normalized query, with a call log."""
+
+    def __init__(self, results=None, default=None):
+        self.results = {normalize_query(query): value for query, value in (results or {}).items()}
+        self.default = default if default is not None else []
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def invoke(self, query):
+        with self._lock:
+            self.calls.append(query)
+        return self.results.get(normalize_query(query), self.default)
+
+
+class SearchCache:
+    """
+    Caching, deduplicating front for a search tool.
+
+    Queries are normalized before lookup, so '"Steakhouse  chains"' and 'steakhouse chains'
+    share an entry. Identical queries issued concurrently trigger a single backend call
+    (single-flight), and results persist with a TTL in an SQLite store shared across
+    runs. Any object with an invoke(query) method can be the backend.
+    """
+
+    def __init__(self, backend=None, path=DEFAULT_SEARCH_CACHE_PATH, ttl=DEFAULT_SEARCH_TTL,
+                 max_entries=DEFAULT_MAX_SEARCHES, name="tavily"):
+        self._backend = backend
+        self.name = name
+        self.store = LLMCache(path=path, ttl=ttl, max_entries=max_entries)
+        self.coalesced = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            from clients import get_search_tool
+
+            self._backend = get_search_tool()
+        return self._backend
+
+    def invoke(self, query):
+        """Return the search results for a query, from the cache when possible."""
+        normalized = normalize_query(query)
+        key = LLMCache.make_key(self.name, "search", normalized)
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+
+        try:
+            with span("search", query=normalized) as s:
+                value = self.store.get(key)
+                s.set(cache_hit=value is not None)
+                if value is None:
+                    value = self.backend.invoke(" ".join(query.replace('"', " ").split()))
+                    # Tools report failures as strings; only real result lists are kept
+                    if isinstance(value, list):
+                        self.store.set(key, value)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def stats(self):
+        return {**self.store.stats(), "coalesced": self.coalesced}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_search_cache(**kwargs):
+    """Return the process-wide search cache, opening it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SearchCache(**kwargs)
+            logging.info(f"Search cache opened at {_cache.store.path}")
+        return _cache
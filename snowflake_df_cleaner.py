@@ -1,4 +1,4 @@
-from langchain_openai import ChatOpenAI
+import concurrent.futures
 from environs import Env
 from langchain_core.prompts import PromptTemplate
 import pandas as pd
@@ -7,6 +7,10 @@ import json
 from langchain_groq import ChatGroq
 from langchain_core.pydantic_v1 import BaseModel, Field
 from typing import List
+from llm_cache import get_llm_cache
+from tokens import chunk_by_tokens
+from clients import get_chat_model
+from tracing import bind, span
 
 from pygments.lexers import business
 
@@ -17,47 +21,104 @@ logging.basicConfig(
 env = Env()
 env.read_env(".env")
 
-gpt_mini = ChatOpenAI(model= "gpt-4o-mini",
-                 # max_tokens=4096
-                 )
+CLASSIFIER_MODEL = "gpt-4o-mini"
 
-def clean_company_list(company_df, niche, batch_size=300):
+DEFAULT_CHUNK_TOKENS = 8000  # Description tokens per classification call
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_RETRIES = 2
 
-    # format = """
-    # [{{
-    #       UUID: corresponding UUID from teh provided dataframe,
-    #       SHORT_DESCRIPTION: chosen description from the list,
-    # }}]
-    # """
-
-    prompt_template = """ 
-You are provided with a dataframe with companies description and their corresponding unique ids.
+prompt_template = """ 
+You are provided with a list of companies, each with a unique id and a short description.
 Your task is to analyse which descriptions match the {niche}, i.e. this company belongs to {niche} business or has at least some relation to it.
 Include in your answer only those companies that belong to the {niche} business or has some relation to it even not that obvious.
-The answer must be the following json format:
-    [{{
-          UUID: corresponding UUID from teh provided dataframe,
-          SHORT_DESCRIPTION: chosen description from the list,
-    }}]
-Companies description dataframe: {companies_dataframe}
+Return only the ids, not the descriptions. The answer must be the following json format:
+    {{"relevant_uuids": ["UUID of a relevant company", ...]}}
+Companies: {companies_dataframe}
+    """
+
+
+def _parse_relevant_uuids(result, chunk_uuids):
+    """Extract the relevant UUIDs from a classification result; raise ValueError when malformed."""
+    if not isinstance(result, dict):
+        raise ValueError(f"Expected a JSON object, got {type(result).__name__}")
+    values = result.get("relevant_uuids", next(iter(result.values()), None) if result else [])
+    if not isinstance(values, list):
+        raise ValueError("Expected a list of UUIDs")
+    # Tolerate the legacy [{"UUID": ..., ...}] answer shape
+    uuids = {item.get("UUID") if isinstance(item, dict) else item for item in values}
+    return uuids & chunk_uuids
+
+
+def classify_chunk(chain, rows, niche, retries=DEFAULT_RETRIES):
+    """
+    Classify one chunk of companies, retrying this chunk only when the answer is malformed.
+
+    Returns:
+        set: UUIDs of the relevant companies in the chunk.
     """
+    inputs = {"companies_dataframe": rows, "niche": niche}
+    chunk_uuids = {row["UUID"] for row in rows}
+
+    def compute():
+        result = chain.invoke(inputs)
+        _parse_relevant_uuids(result, chunk_uuids)  # Never cache a malformed answer
+        return result
+
+    with span("classify.chunk", companies=len(rows)) as s:
+        for attempt in range(retries + 1):
+            try:
+                result = get_llm_cache().cached(CLASSIFIER_MODEL, prompt_template, inputs, compute)
+                relevant = _parse_relevant_uuids(result, chunk_uuids)
+                s.set(attempts=attempt + 1, relevant=len(relevant))
+                return relevant
+            except Exception as e:
+                if attempt == retries:
+                    raise
+                logging.warning(f"Malformed classification for a chunk of {len(rows)} companies, retrying: {e}")
 
+
+def iter_clean_company_list(company_df, niche, batch_size=300, max_tokens=DEFAULT_CHUNK_TOKENS,
+                            max_concurrency=DEFAULT_MAX_CONCURRENCY, classified_uuids=None):
+    """
+    Classify companies in token-budgeted chunks concurrently, yielding relevant rows as chunks finish.
+
+    Args:
+        company_df (pd.DataFrame): Companies with UUID and SHORT_DESCRIPTION columns.
+        niche (str): Niche to classify against.
+        batch_size (int): Maximum number of companies per chunk.
+        max_tokens (int): Token budget of one chunk.
+        max_concurrency (int): Maximum number of chunks classified at the same time.
+        classified_uuids (set): If given, receives the UUIDs of every successfully classified chunk.
+
+    Yields:
+        pd.DataFrame: Relevant rows of each finished chunk. A chunk that keeps failing is
+            logged and skipped.
+    """
     prompt = PromptTemplate(template=prompt_template, input_variables=["companies_dataframe", "niche"])
-    chain = prompt | gpt_mini.with_structured_output(method="json_mode")
-
-    result = chain.invoke({
-        "companies_dataframe": company_df[["UUID", "SHORT_DESCRIPTION"]].to_dict(orient="records"),
-        "niche": niche,
-    })
-    try:
-        with open("llm_df_response.json", "w", encoding="utf-8") as file:
-            json.dump(result, file, ensure_ascii=False, indent=4)
-        logging.info(f"Data successfully written to llm_df_response.json")
-    except Exception as e:
-        logging.error(f"Failed to write data to file: {e}")
-    print(result)
-    # Convert the list of dictionaries to a set of UUIDs
-    uuid_set = set(item['UUID'] for item in next(iter(result.values())))
-    # Filter the DataFrame based on UUIDs
-    filtered_df = company_df[company_df['UUID'].isin(uuid_set)].reset_index(drop=True)
-    return filtered_df
\ No newline at end of file
+    chain = prompt | get_chat_model(CLASSIFIER_MODEL).with_structured_output(method="json_mode")
+
+    records = company_df[["UUID", "SHORT_DESCRIPTION"]].dropna(subset=["UUID"]).to_dict(orient="records")
+    chunks = list(chunk_by_tokens(records, max_tokens, max_items=batch_size))
+    logging.info(f"Classifying {len(records)} companies in {len(chunks)} chunks")
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        futures = {executor.submit(bind(classify_chunk), chain, chunk, niche): chunk for chunk in chunks}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                uuid_set = future.result()
+            except Exception as e:
+                logging.error(f"Skipping a chunk after repeated classification failures: {e}")
+                continue
+            if classified_uuids is not None:
+                classified_uuids.update(row["UUID"] for row in futures[future])
+            # Filter the DataFrame based on UUIDs
+            yield company_df[company_df["UUID"].isin(uuid_set)]
+
+
+def clean_company_list(company_df, niche, batch_size=300, **kwargs):
+    """Return the rows of company_df relevant to the niche (see iter_clean_company_list)."""
+    frames = list(iter_clean_company_list(company_df, niche, batch_size=batch_size, **kwargs))
+    if not frames:
+        return company_df.iloc[0:0].reset_index(drop=True)
+    filtered_df = pd.concat(frames)
+    return filtered_df.sort_index().reset_index(drop=True)
@@ -0,0 +1,60 @@
+import numpy as np
+
+import category_index
+import llm
+from category_index import CategoryIndex, HashingEmbedder, scrape_texts
+
+CATEGORIES = [
+    {"naic_category": "722511", "Category": "Full-Service Restaurants"},
+    {"naic_category": "311612", "Category": "Meat Processed from Carcasses"},
+    {"naic_category": "524126", "Category": "Direct Property and Casualty Insurance Carriers"},
+    {"naic_category": "336111", "Category": "Automobile Manufacturing"},
+]
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self):
+        super().__init__(dim=64)
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return super().embed_documents(texts)
+
+
+def test_hashing_embedder_is_deterministic():
+    embedder = HashingEmbedder(dim=64)
+    first = embedder.embed_documents(["Beef prices rise", ""])
+    assert first.shape == (2, 64) and first.dtype == np.float32
+    assert np.array_equal(first, HashingEmbedder(dim=64).embed_documents(["beef PRICES rise", None]))
+    assert not first[1].any()
+
+
+def test_search_ranks_by_best_matching_text(tmp_path):
+    index = CategoryIndex(CATEGORIES, HashingEmbedder(), cache_dir=str(tmp_path))
+    assert index.search(["Restaurants struggle", "weather"], k=1) == [CATEGORIES[0]]
+    assert index.search(["automobile manufacturing slows", "insurance carriers"], k=2) == [CATEGORIES[3],
+                                                                                          CATEGORIES[2]]
+    assert len(index.search(["anything"], k=10)) == len(CATEGORIES)
+    assert index.search(["", None]) == []
+
+
+def test_category_embeddings_are_cached_on_disk(tmp_path):
+    embedder = CountingEmbedder()
+    first = CategoryIndex(CATEGORIES, embedder, cache_dir=str(tmp_path))
+    second = CategoryIndex(CATEGORIES, embedder, cache_dir=str(tmp_path))
+    assert embedder.calls == 1 and np.array_equal(first.matrix, second.matrix)
+    CategoryIndex(CATEGORIES[:2], embedder, cache_dir=str(tmp_path))  # Another category set, another entry
+    assert embedder.calls == 2
+
+
+def test_candidate_categories_cover_the_scraped_data(monkeypatch, tmp_path):
+    monkeypatch.setattr(llm, "get_category_list", lambda: CATEGORIES)
+    monkeypatch.chdir(tmp_path)  # The process-wide index caches under .cache/
+    monkeypatch.setattr(category_index, "_indexes", {})
+    scraped_data = {"news_feeds": {"beef": [{"title": "Meat processed from carcasses costs more"}]},
+                    "x_tweets": {"cars": ["Automobile manufacturing slows"]}}
+    assert scrape_texts(scraped_data) == ["Meat processed from carcasses costs more", "Automobile manufacturing slows"]
+    candidates = llm.get_candidate_categories(scraped_data, "Insurance carriers", top_k=3, embedder=HashingEmbedder())
+    assert [category["naic_category"] for category in candidates] == ["311612", "336111", "524126"]
+    assert llm.get_candidate_categories(scraped_data, "Insurance", top_k=0) == CATEGORIES
@@ -0,0 +1,72 @@
+import time
+
+import httpx
+import pytest
+
+import collectors
+import scrapers
+from collectors import Collector, NitterCollector, Post, TruthSocialCollector, merge_combined_data, run_collectors
+
+
+class SleepyCollector(Collector):
+    """Returns one post per keyword after `delay` seconds; `fail` keywords raise."""
+
+    def __init__(self, source, delay, max_workers=1, deadline=10, fail=()):
+        self.source = self.label = self.combined_key = source
+        self.delay = delay
+        self.max_workers = max_workers
+        self.deadline = deadline
+        self.fail = fail
+
+    def collect(self, item):
+        time.sleep(self.delay)
+        if item in self.fail:
+            raise RuntimeError(f"{item} failed")
+        return [Post(self.source, item, f"{item}!")], {}
+
+    def to_combined(self, records, expand=False):
+        return [post.text for post in records]
+
+
+def test_sources_run_side_by_side():
+    sources = [SleepyCollector("a", 0.3), SleepyCollector("b", 0.3), SleepyCollector("c", 0.3)]
+    start = time.monotonic()
+    results = run_collectors(sources, ["x"], poll_interval=0.01)
+    assert time.monotonic() - start < 0.8
+    assert merge_combined_data(results) == {"a": ["x!"], "b": ["x!"], "c": ["x!"]}
+    assert {source: result.state for source, result in results.items()} == {"a": "ok", "b": "ok", "c": "ok"}
+
+
+def test_partial_failed_and_timed_out_sources():
+    events = []
+    results = run_collectors(
+        [SleepyCollector("partial", 0, fail=("y",)), SleepyCollector("failed", 0, fail=("x", "y")),
+         SleepyCollector("slow", 1, deadline=0.2)],
+        ["x", "y"], on_event=lambda status, collector, item, detail: events.append((collector.source, status)),
+        poll_interval=0.01)
+    assert results["partial"].state == "partial"
+    assert results["partial"].errors == {"y": "y failed"}
+    assert results["failed"].state == "failed"
+    assert results["slow"].state == "timeout"
+    assert ("slow", "timeout") in events
+
+
+@pytest.fixture
+def dead_sources(monkeypatch):
+    client = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(502)))
+    monkeypatch.setattr(scrapers, "get_http_client", lambda: client)
+    monkeypatch.setattr(scrapers.nitter_rate_limiter, "min_interval", 0)
+
+    def no_chrome(progress=None):
+        raise RuntimeError("Chrome failed to start")
+
+    monkeypatch.setattr(collectors, "trump_scraper", no_chrome)
+
+
+def test_dead_nitter_and_truth_social_are_reported_as_failed(dead_sources):
+    results = run_collectors([NitterCollector(max_workers=2), TruthSocialCollector()], ["beef", "ai"],
+                             poll_interval=0.01)
+    assert results["tweets"].state == "failed"
+    assert set(results["tweets"].errors) == {"beef", "ai"}
+    assert results["truth_social"].state == "failed"
+    assert results["truth_social"].errors == {"Donald Trump": "Chrome failed to start"}
@@ -0,0 +1,81 @@
+import json
+
+import numpy as np
+import pytest
+
+import company_index
+from company_index import CompanyIndex, _trigrams, normalize_company_name
+
+RECORDS = [("u1", "ACME Foods, Inc."), ("u2", "Acme Food Group"), ("u3", "Beef & Co"),
+           ("u4", "Acme Frozen Foods LLC"), ("u5", "Steakhouse Partners")]
+
+
+def dice(a, b):
+    a, b = _trigrams(normalize_company_name(a)), _trigrams(normalize_company_name(b))
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+@pytest.fixture
+def index(tmp_path):
+    built = CompanyIndex(str(tmp_path / "index"))
+    built.add(RECORDS)
+    built.save()
+    return CompanyIndex(str(tmp_path / "index"))
+
+
+def test_normalize_company_name():
+    assert normalize_company_name("ACME Foods, Inc.") == "acme foods"
+    assert normalize_company_name("Beef & Co. Ltd") == "beef"
+
+
+def test_index_is_memory_mapped(index):
+    assert len(index) == 5
+    for name in ["names", "token_terms", "token_offsets", "trigram_terms", "trigram_postings"]:
+        assert isinstance(getattr(index, name), np.memmap), name
+    assert list(index.token_terms) == sorted(index.token_terms)
+
+
+def test_exact_lookup_ignores_case_punctuation_and_suffixes(index):
+    assert index.lookup("acme foods") == [{"uuid": "u1", "name": "ACME Foods, Inc.", "score": 1.0,
+                                           "match_type": "exact"}]
+    assert index.lookup("Unknown Name") == []
+
+
+def test_fuzzy_scores_are_trigram_dice(index):
+    matches = index.lookup("Acme Food Groups", limit=5, min_score=0.0)
+    assert [match["match_type"] for match in matches] == ["fuzzy"] * len(matches)
+    assert matches[0]["uuid"] == "u2"
+    for match in matches:
+        assert match["score"] == round(dice("Acme Food Groups", match["name"]), 3)
+
+
+def test_common_trigrams_still_count_towards_the_score(index, monkeypatch):
+    # Trigrams in more than one document only add to candidates found through rarer ones
+    monkeypatch.setattr(company_index, "MAX_TRIGRAM_DOCS", 1)
+    match = index.lookup("Acme Food Groups", limit=1, min_score=0.0)[0]
+    assert match["uuid"] == "u2" and match["score"] == round(dice("Acme Food Groups", "Acme Food Group"), 3)
+
+
+def test_save_merges_and_replaces_records(index):
+    index.add([("u3", "Beef Brothers"), ("u6", "Grill Masters")])
+    index.save()
+    assert len(index) == 6
+    assert index.lookup("beef brothers")[0]["uuid"] == "u3" and index.lookup("beef") == []
+
+
+def test_no_index_until_built(tmp_path):
+    assert company_index.get_company_index(str(tmp_path / "missing")) is None
+    assert CompanyIndex(str(tmp_path / "missing")).lookup("acme") == []
+
+
+def test_open_index_keeps_reading_while_another_instance_saves(index, tmp_path):
+    writer = CompanyIndex(index.directory)
+    writer.add([("u6", "Grill Masters")])
+    writer.save()
+    writer.add([("u7", "Smoke Shack")])
+    writer.save()
+    # The older instance still sees its own version; a new one sees the latest
+    assert len(index) == 5 and index.lookup("acme foods")[0]["uuid"] == "u1"
+    assert len(CompanyIndex(index.directory)) == 7
+    assert sorted(entry for entry in (tmp_path / "index").iterdir() if entry.is_dir()) == \
+        [tmp_path / "index" / json.loads((tmp_path / "index" / "meta.json").read_text())["version"]]
@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+
+import company_names_graph as graph
+from benchmarks.fixtures import ReplayChatModel
+from llm_cache import LLMCache
+
+PLAN = [
+    ("Search steakhouse chains", "#E1", "Google", "steakhouse chains USA"),
+    ("Search premium grills", "#E2", "Google", "premium grill restaurants"),
+    ("Merge the lists", "#E3", "LLM", "Merge #E1 and #E2"),
+    ("Normalize names", "#E4", "LLM", "Normalize #E3 and #E9"),
+]
+
+
+def test_step_dependencies_only_reference_earlier_steps():
+    assert graph.step_dependencies(PLAN) == {"#E1": set(), "#E2": set(), "#E3": {"#E1", "#E2"}, "#E4": {"#E3"}}
+
+
+def test_independent_steps_run_concurrently_and_dependents_see_their_evidence(monkeypatch):
+    running, overlap = set(), []
+    lock = threading.Lock()
+
+    def run_tool(tool, tool_input):
+        with lock:
+            running.add(tool_input)
+            overlap.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.discard(tool_input)
+        return f"<{tool_input}>"
+
+    monkeypatch.setattr(graph, "_run_tool", run_tool)
+    results = graph.tool_execution({"steps": PLAN, "results": None})["results"]
+    assert max(overlap) == 2  # #E1 and #E2 side by side
+    assert results["#E3"] == "<Merge <steakhouse chains USA> and <premium grill restaurants>>"
+    assert results["#E4"] == f"<Normalize {results['#E3']} and #E9>"  # Unknown references stay as they are
+
+
+def test_steps_with_results_are_not_rerun(monkeypatch):
+    calls = []
+    monkeypatch.setattr(graph, "_run_tool", lambda tool, tool_input: calls.append(tool_input) or "new")
+    results = graph.tool_execution({"steps": PLAN[:3], "results": {"#E1": "old", "#E2": "older"}})["results"]
+    assert calls == ["Merge old and older"] and results["#E1"] == "old"
+
+
+def test_unknown_tool_fails_the_step():
+    with pytest.raises(ValueError, match="Calculator"):
+        graph._run_tool("Calculator", "1 + 1")
+
+
+def test_run_graph_many_records_missing_companies_as_empty(monkeypatch):
+    class App:
+        def batch(self, inputs, config=None, return_exceptions=False):
+            return [{"result": {"companies": ["Acme Foods"]}}, {"result": {"answer": "none"}}, {},
+                    RuntimeError("rate limited")]
+
+    monkeypatch.setattr(graph, "get_app", lambda: App())
+    failed = set()
+    assert graph.run_graph_many(["steakhouses", "grills", "diners", "bakeries"], failed=failed) == {
+        "steakhouses": ["Acme Foods"], "grills": [], "diners": [], "bakeries": []}
+    assert failed == {"grills", "diners", "bakeries"}
+
+
+@pytest.fixture
+def model(monkeypatch, tmp_path):
+    """Fake chat model answering `model.answers` in order, with a fresh LLM cache."""
+    fake = ReplayChatModel(responder=lambda text: fake.answers.pop(0))
+    cache = LLMCache(path=str(tmp_path / "llm_cache.sqlite"))
+    monkeypatch.setattr(graph, "get_chat_model", lambda name: fake)
+    monkeypatch.setattr(graph, "get_llm_cache", lambda: cache)
+    return fake
+
+
+def test_plan_without_steps_is_not_cached(model):
+    state = {"task": graph._task("steakhouses")}
+    model.answers = ["I can not plan this.", "Plan: Search. #E1 = Google[steakhouse chains]"]
+    with pytest.raises(ValueError):
+        graph.get_plan(state)
+    assert graph.get_plan(state)["steps"] == [("Search. ", "#E1", "Google", "steakhouse chains")]
+    assert graph.get_plan(state)["steps"] and model.calls == 2
+
+
+def test_answer_without_companies_is_not_cached(model):
+    state = {"task": graph._task("steakhouses"), "steps": PLAN[:1], "results": {"#E1": "Acme Grill"}}
+    model.answers = ['{"answer": "Acme Grill"}', '{"companies": ["Acme Grill"]}']
+    with pytest.raises(ValueError):
+        graph.solve(state)
+    assert graph.solve(state) == graph.solve(state) == {"result": {"companies": ["Acme Grill"]}}
+    assert model.calls == 2
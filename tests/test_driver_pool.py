@@ -0,0 +1,104 @@
+import time
+
+import pytest
+
+import driver_pool
+from driver_pool import DriverPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+        self.quit_called = False
+
+    @property
+    def current_url(self):
+        if not self.alive:
+            raise ConnectionError("chrome not reachable")
+        return "about:blank"
+
+    def delete_all_cookies(self):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def launched(monkeypatch):
+    """Stand in for Chrome; lists every driver the pool starts."""
+    drivers = []
+    monkeypatch.setattr(driver_pool, "get_chrome_options", lambda headless=True: None)
+    monkeypatch.setattr(driver_pool, "create_driver", lambda options: drivers.append(FakeDriver()) or drivers[-1])
+    return drivers
+
+
+def lease(pool):
+    with pool.driver() as driver:
+        return driver
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_leased_drivers_are_reused(launched):
+    pool = DriverPool(size=2)
+    assert lease(pool) is lease(pool) is launched[0]
+    metrics = pool.metrics.as_dict()
+    assert metrics["leases"] == 2 and metrics["hits"] == 1 and metrics["cold_starts"] == 1
+    pool.close()
+    assert launched[0].quit_called
+
+
+def test_drivers_are_recycled_after_max_pages(launched):
+    pool = DriverPool(max_pages=2)
+    drivers = [lease(pool) for _ in range(3)]
+    assert drivers[0] is drivers[1] is not drivers[2]
+    assert launched[0].quit_called and pool.metrics.recycles == 1 and pool.metrics.cold_starts == 2
+
+
+def test_dead_drivers_are_replaced_on_checkout(launched):
+    pool = DriverPool()
+    lease(pool).alive = False
+    assert lease(pool) is launched[1]
+    assert launched[0].quit_called and pool.metrics.health_failures == 1
+
+
+def test_driver_broken_during_a_lease_is_not_returned(launched):
+    pool = DriverPool()
+    with pytest.raises(RuntimeError):
+        with pool.driver() as driver:
+            driver.alive = False
+            raise RuntimeError("page crashed")
+    assert launched[0].quit_called and lease(pool) is launched[1]
+
+
+def test_pool_size_bounds_concurrent_leases(launched):
+    pool = DriverPool(size=1)
+    with pool.driver():
+        with pytest.raises(TimeoutError):
+            with pool.driver(timeout=0.05):
+                pass
+
+
+def test_idle_drivers_are_reaped_without_another_lease(launched):
+    pool = DriverPool(idle_timeout=0.05, reap_interval=0.02)
+    lease(pool)
+    wait_for(lambda: launched[0].quit_called)
+    assert pool.metrics.evictions == 1
+    wait_for(lambda: pool._reaper is None)  # Nothing left to watch
+    lease(pool)
+    wait_for(lambda: launched[1].quit_called)
+
+
+def test_close_stops_the_reaper(launched):
+    pool = DriverPool(reap_interval=60)
+    lease(pool)
+    reaper = pool._reaper
+    pool.close()
+    reaper.join(timeout=5)
+    assert not reaper.is_alive() and launched[0].quit_called
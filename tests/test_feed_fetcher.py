@@ -0,0 +1,100 @@
+import hashlib
+import os
+import threading
+
+import pytest
+
+from benchmarks.fixtures import FixtureServer, make_rss, slug
+from feed_fetcher import FeedCache, feed_url, fetch_raw_feeds
+
+
+@pytest.fixture
+def server(tmp_path):
+    os.makedirs(tmp_path / "fixtures" / "feeds")
+    with FixtureServer(str(tmp_path / "fixtures")) as server:
+        server.feeds_dir = str(tmp_path / "fixtures" / "feeds")
+        yield server
+
+
+def write_feed(server, query, items=3, seed=0):
+    path = os.path.join(server.feeds_dir, f"{slug(query)}.xml")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(make_rss(query, items=items, seed=seed))
+    return path
+
+
+def statuses(server):
+    return [status for _, status in server.requests]
+
+
+def test_fresh_feeds_are_served_from_the_cache(server, tmp_path):
+    write_feed(server, "beef")
+    cache = FeedCache(str(tmp_path / "cache"))
+    first = fetch_raw_feeds(["beef"], url_template=server.rss_template, cache=cache)
+    assert fetch_raw_feeds(["beef"], url_template=server.rss_template, cache=cache) == first
+    assert statuses(server) == [200]
+
+
+def test_stale_feeds_are_revalidated_with_the_etag(server, tmp_path):
+    write_feed(server, "beef")
+    cache = FeedCache(str(tmp_path / "cache"), ttl=0)
+    first = fetch_raw_feeds(["beef"], url_template=server.rss_template, cache=cache)
+    cached = cache.get(feed_url("beef", server.rss_template))
+    assert cached.etag and cached.last_modified
+    assert fetch_raw_feeds(["beef"], url_template=server.rss_template, cache=cache) == first
+    assert statuses(server) == [200, 304]
+    assert cache.get(feed_url("beef", server.rss_template)).fetched_at >= cached.fetched_at
+
+
+def test_stale_feeds_are_revalidated_with_if_modified_since(server, tmp_path):
+    path = write_feed(server, "beef")
+    cache = FeedCache(str(tmp_path / "cache"), ttl=0)
+    url = feed_url("beef", server.rss_template)
+    cache.put(url, b"<rss>cached</rss>", last_modified="Sat, 01 Jan 2050 00:00:00 GMT")
+    assert fetch_raw_feeds(["beef"], url_template=server.rss_template, cache=cache) == {"beef": b"<rss>cached</rss>"}
+    os.utime(path, (4102444800 + 60,) * 2)  # Modified after the cached copy
+    with open(path, "rb") as file:
+        assert fetch_raw_feeds(["beef"], url_template=server.rss_template, cache=cache) == {"beef": file.read()}
+    assert statuses(server) == [304, 200]
+
+
+def test_changed_feeds_are_downloaded_again(server, tmp_path):
+    write_feed(server, "beef", seed=0)
+    cache = FeedCache(str(tmp_path / "cache"), ttl=0)
+    first = fetch_raw_feeds(["beef"], url_template=server.rss_template, cache=cache)
+    write_feed(server, "beef", seed=1)
+    assert fetch_raw_feeds(["beef"], url_template=server.rss_template, cache=cache) != first
+    assert statuses(server) == [200, 200]
+
+
+def test_unreachable_feeds_fall_back_to_the_stale_copy(tmp_path):
+    cache = FeedCache(str(tmp_path / "cache"), ttl=0)
+    template = "http://127.0.0.1:9/rss?q={query}"
+    cache.put(feed_url("beef", template), b"<rss>old</rss>")
+    results = fetch_raw_feeds(["beef", "pork"], url_template=template, cache=cache, timeout=2)
+    assert results["beef"] == b"<rss>old</rss>" and isinstance(results["pork"], Exception)
+
+
+def test_concurrent_writes_of_one_feed_stay_consistent(tmp_path):
+    cache = FeedCache(str(tmp_path / "cache"))
+    url = "http://news.test/rss?q=beef"
+    errors, mismatches = [], []
+
+    def write(worker):
+        for i in range(300):
+            body = f"<rss>{worker}-{i}</rss>".encode()
+            try:
+                cache.put(url, body, etag=hashlib.sha1(body).hexdigest())
+            except Exception as e:
+                errors.append(e)
+            cached = cache.get(url)
+            if hashlib.sha1(cached.body).hexdigest() != cached.etag:
+                mismatches.append(cached)
+
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == [] and mismatches == []
+    assert [name for name in os.listdir(cache.directory) if name.endswith(".tmp")] == []
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+import llm
+from benchmarks.fixtures import ReplayChatModel
+from llm_cache import LLMCache
+
+VALID = {
+    "Summary of Key Findings": "Beef prices rise.",
+    "Affected Business Categories": [{
+        "Business Category Name": "Full-Service Restaurants",
+        "NAIC Code": "722511",
+        "Suggested Niches": ["Premium Steakhouse"],
+        "Relevant Market Trends": ["beef prices"],
+        "Potential Impact": "Higher costs.",
+    }],
+}
+
+
+@pytest.fixture
+def analysis(monkeypatch, tmp_path):
+    """choose_relevant_niches against a fake model answering `responses` in order, with a fresh cache."""
+    responses = []
+    model = ReplayChatModel(responder=lambda text: json.dumps(responses.pop(0)))
+    cache = LLMCache(path=str(tmp_path / "llm_cache.sqlite"))
+    monkeypatch.setattr(llm, "get_chat_model", lambda name: model)
+    monkeypatch.setattr(llm, "get_llm_cache", lambda: cache)
+    monkeypatch.setattr(llm, "get_candidate_categories", lambda *args, **kwargs: [])
+
+    def run(answers, scraped_data=None, **kwargs):
+        responses[:] = answers
+        return llm.choose_relevant_niches(scraped_data or {"news_feeds": {"beef": ["Beef prices rise"]}},
+                                          "insurance", **kwargs)
+
+    run.model = model
+    return run
+
+
+def test_merge_niche_results_merges_by_code():
+    other = json.loads(json.dumps(VALID))
+    other["Affected Business Categories"][0]["Suggested Niches"] = ["premium steakhouse", "Burger Bar"]
+    merged = llm.merge_niche_results([VALID, {"foo": 1}, other])
+    assert merged["Affected Business Categories"][0]["Suggested Niches"] == ["Premium Steakhouse", "Burger Bar"]
+
+
+def test_merge_niche_results_without_a_valid_chunk_raises():
+    with pytest.raises(ValueError):
+        llm.merge_niche_results([{"foo": 1}])
+
+
+def test_malformed_single_chunk_raises_and_is_not_cached(analysis):
+    with pytest.raises(ValueError):
+        analysis([{"foo": 1}])
+    assert analysis([VALID]) == VALID
+    assert analysis.model.calls == 2
+    assert analysis([]) == VALID  # Now served from the cache
+    assert analysis.model.calls == 2
+
+
+def test_malformed_chunks_are_dropped_and_not_cached(analysis):
+    scraped_data = {"news_feeds": {"beef": ["Beef prices rise"], "tariffs": ["Tariffs on steel"]}}
+    result = analysis([VALID, {"foo": 1}], scraped_data, batch_size=1, max_concurrency=1)
+    assert result["Affected Business Categories"][0]["NAIC Code"] == "722511"
+    assert analysis([VALID], scraped_data, batch_size=1, max_concurrency=1) == result  # Only the bad chunk is retried
+    assert analysis.model.calls == 3
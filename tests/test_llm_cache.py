@@ -0,0 +1,66 @@
+import time
+
+from langchain_core.runnables import RunnableLambda
+
+from llm_cache import LLMCache
+
+
+def make_cache(tmp_path, **kwargs):
+    return LLMCache(path=str(tmp_path / "llm_cache.sqlite"), **kwargs)
+
+
+def test_key_ignores_cosmetic_whitespace():
+    assert (LLMCache.make_key("gpt", "T", {"text": "Beef  prices\nrise", "items": ("a ", "b")})
+            == LLMCache.make_key("gpt", "T", {"items": ["a", "b"], "text": "Beef prices rise"}))
+    assert LLMCache.make_key("gpt", "T", "x") != LLMCache.make_key("gpt", "T2", "x")
+    assert LLMCache.make_key("gpt", "T", "x") != LLMCache.make_key("gpt-mini", "T", "x")
+
+
+def test_cached_computes_once_and_persists(tmp_path):
+    calls = []
+    cache = make_cache(tmp_path)
+    compute = lambda: calls.append(1) or {"answer": 42}
+    assert cache.cached("gpt", "T", {"q": 1}, compute) == {"answer": 42}
+    assert make_cache(tmp_path).cached("gpt", "T", {"q": 1}, compute) == {"answer": 42}
+    assert len(calls) == 1 and cache.stats() == {"hits": 0, "misses": 1, "entries": 1}
+
+
+def test_expired_entries_are_misses(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, ttl=60)
+    cache.set("key", "value")
+    now = time.time()
+    monkeypatch.setattr("llm_cache.time.time", lambda: now + 61)
+    assert cache.get("key") is None and cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.set("a", 1)
+    time.sleep(0.01)
+    cache.set("b", 2)
+    time.sleep(0.01)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    time.sleep(0.01)
+    cache.set("c", 3)
+    assert [cache.get(key) for key in "abc"] == [1, None, 3]
+
+
+def test_batch_only_sends_misses(tmp_path):
+    sent = []
+    chain = RunnableLambda(lambda text: sent.append(text) or {"text": text.upper()})
+    cache = make_cache(tmp_path)
+    assert cache.batch(chain, "gpt", "T", ["a", "b"]) == [{"text": "A"}, {"text": "B"}]
+    assert cache.batch(chain, "gpt", "T", ["a", "b", "c"]) == [{"text": "A"}, {"text": "B"}, {"text": "C"}]
+    assert sorted(sent) == ["a", "b", "c"]
+
+
+def test_batch_returns_failures_without_caching_them(tmp_path):
+    def flaky(text):
+        if text == "bad":
+            raise ValueError("rate limited")
+        return text
+
+    cache = make_cache(tmp_path)
+    results = cache.batch(RunnableLambda(flaky), "gpt", "T", ["ok", "bad"])
+    assert results[0] == "ok" and isinstance(results[1], ValueError)
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,69 @@
+import os
+import time
+
+import pandas as pd
+
+from naics_store import SNAPSHOT_PATH, NaicsStore
+
+
+def test_bundled_snapshot_seeds_the_store(tmp_path):
+    store = NaicsStore(db_path=str(tmp_path / "naics.sqlite"), url=str(tmp_path / "missing.csv"))
+    categories = store.categories()
+    assert len(categories) == len(pd.read_csv(SNAPSHOT_PATH, dtype=str))
+    assert store.by_code("111110") == [{"naic_category": "111110", "Category": "Soybean Farming"}]
+    assert store.by_name("soybean farming") == store.by_code("111110")
+
+
+def test_store_is_read_back_from_sqlite(tmp_path):
+    csv_path = tmp_path / "sheet.csv"
+    pd.DataFrame({"naic_category": ["1", "1", "2"], "Category": ["A", "A", "B"]}).to_csv(csv_path, index=False)
+    db_path = str(tmp_path / "naics.sqlite")
+    NaicsStore(db_path=db_path, url=str(csv_path), snapshot_path=str(tmp_path / "none.csv"))
+    os.remove(csv_path)
+    store = NaicsStore(db_path=db_path, url=str(csv_path), snapshot_path=str(tmp_path / "none.csv"))
+    assert [category["Category"] for category in store.categories()] == ["A", "B"]
+
+
+def test_no_snapshot_and_no_sheet_serves_nothing_and_backs_off(tmp_path, monkeypatch):
+    store = NaicsStore(db_path=str(tmp_path / "naics.sqlite"), url=str(tmp_path / "missing.csv"),
+                       snapshot_path=str(tmp_path / "none.csv"))
+    started = []
+    monkeypatch.setattr(store, "refresh_in_background", lambda: started.append(time.time()))
+    assert store.categories() == []
+    assert started == []  # Still backing off after the failed download
+    store._retry_at = 0.0
+    assert store.categories() == []
+    assert len(started) == 1
+
+
+def wait_until_refreshed(store, timeout=5):
+    deadline = time.monotonic() + timeout
+    while store._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_stale_data_is_refreshed_on_access(tmp_path, monkeypatch):
+    csv_path = tmp_path / "sheet.csv"
+    pd.DataFrame({"naic_category": ["1"], "Category": ["A"]}).to_csv(csv_path, index=False)
+    store = NaicsStore(db_path=str(tmp_path / "naics.sqlite"), url=str(csv_path),
+                       snapshot_path=str(tmp_path / "none.csv"), ttl=60)
+    pd.DataFrame({"naic_category": ["2"], "Category": ["B"]}).to_csv(csv_path, index=False)
+    assert [category["Category"] for category in store.categories()] == ["A"]  # Still fresh
+    now = time.time()
+    monkeypatch.setattr("naics_store.time.time", lambda: now + 61)
+    store.categories()
+    wait_until_refreshed(store)
+    assert [category["Category"] for category in store.categories()] == ["B"]
+
+
+def test_failed_refresh_of_seeded_data_backs_off(tmp_path, monkeypatch):
+    store = NaicsStore(db_path=str(tmp_path / "naics.sqlite"), url=str(tmp_path / "missing.csv"))
+    wait_until_refreshed(store)  # The seed is stale right away; its refresh fails
+    assert store.categories() and store._retry_at > time.time()
+    started = []
+    monkeypatch.setattr(store, "refresh_in_background", lambda: started.append(time.time()))
+    store.categories()
+    assert started == []
+    store._retry_at = 0.0
+    store.categories()
+    assert len(started) == 1
@@ -0,0 +1,56 @@
+import duckdb
+import pandas as pd
+
+from niche_enrichment import enrich, fetch_dataframe, match_provenance, stream_query
+
+
+def make_conn():
+    conn = duckdb.connect()
+    conn.execute('create table organization_summary ("UUID" varchar, name varchar, "SHORT_DESCRIPTION" varchar)')
+    conn.executemany("insert into organization_summary values (?, ?, ?)",
+                     [("uuid-1", "Acme Foods Inc.", "Acme makes food."),
+                      ("uuid-2", "Blue River Labs", "Blue River runs labs.")])
+    return conn
+
+
+def test_fetch_dataframe_keeps_columns_of_empty_result():
+    df = fetch_dataframe("select * from organization_summary where name = ?", params=("Nobody",), conn=make_conn())
+    assert df.empty
+    assert list(df.columns) == ["UUID", "name", "SHORT_DESCRIPTION"]
+
+
+def test_stream_query_batches():
+    batches = list(stream_query("select * from organization_summary", conn=make_conn(), batch_size=1))
+    assert [len(batch) for batch in batches] == [1, 1]
+
+
+def test_enrich_without_any_match():
+    df, _ = enrich(["Nonexistent Zebra"], conn=make_conn(), table="organization_summary", dialect="duckdb")
+    assert df.empty
+    assert {"MATCH_INPUT", "MATCH_TYPE", "UUID"} <= set(df.columns)
+
+
+def test_enrich_matches_exact_and_prefix():
+    df, _ = enrich(["ACME FOODS", "Blue River", "Nonexistent Zebra"], conn=make_conn(), table="organization_summary",
+                dialect="duckdb")
+    assert dict(zip(df["MATCH_INPUT"], df["MATCH_TYPE"])) == {"ACME FOODS": "exact", "Blue River": "prefix"}
+
+
+def test_enrich_returns_provenance_per_input_name():
+    df, provenance = enrich(["ACME FOODS", "Acme Foods Inc", "Blue River", "Nonexistent Zebra"], conn=make_conn(),
+                table="organization_summary", dialect="duckdb")
+    assert len(df) == 2  # Both Acme names found the same organization
+    assert provenance.to_dict(orient="records") == [
+        {"MATCH_INPUT": "ACME FOODS", "MATCH_TYPE": "exact", "MATCH_COUNT": 1},
+        {"MATCH_INPUT": "Acme Foods Inc", "MATCH_TYPE": "exact", "MATCH_COUNT": 1},
+        {"MATCH_INPUT": "Blue River", "MATCH_TYPE": "prefix", "MATCH_COUNT": 1},
+        {"MATCH_INPUT": "Nonexistent Zebra", "MATCH_TYPE": "none", "MATCH_COUNT": 0},
+    ]
+
+
+def test_match_provenance_without_matches():
+    provenance = match_provenance(pd.DataFrame(), ["Nonexistent Zebra", "Other"])
+    assert provenance.to_dict(orient="records") == [
+        {"MATCH_INPUT": "Nonexistent Zebra", "MATCH_TYPE": "none", "MATCH_COUNT": 0},
+        {"MATCH_INPUT": "Other", "MATCH_TYPE": "none", "MATCH_COUNT": 0},
+    ]
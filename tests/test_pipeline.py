@@ -0,0 +1,61 @@
+import pandas as pd
+
+import pipeline
+from niche_enrichment import match_provenance
+from relevance_prefilter import PrefilterReport
+
+
+def fake_stages(monkeypatch, failing_niches, unclassified_niches):
+    """Stub every stage; the niches in the two sets fail in run_graph_many / cleaning until removed."""
+    calls = {"companies": [], "clean": []}
+    monkeypatch.setattr(pipeline, "collect_signals", lambda keywords: ({"news_feeds": {}}, None, {}))
+    monkeypatch.setattr(pipeline, "choose_relevant_niches", lambda combined_data, business_type: {})
+    monkeypatch.setattr(pipeline, "get_company_index", lambda: None)
+
+    def enrich(names, index=None):
+        df = pd.DataFrame({"UUID": [f"u-{name}" for name in names], "SHORT_DESCRIPTION": names})
+        return df, match_provenance(df.assign(MATCH_INPUT=names, MATCH_TYPE="exact"), names)
+
+    monkeypatch.setattr(pipeline, "enrich", enrich)
+
+    def run_graph_many(niches, failed=None):
+        calls["companies"].append(list(niches))
+        failed.update(failing_niches & set(niches))
+        return {niche: [] if niche in failing_niches else [f"{niche} co"] for niche in niches}
+
+    def two_tier_clean(df, niche):
+        calls["clean"].append(niche)
+        return df, PrefilterReport(total=len(df), unclassified=len(df) if niche in unclassified_niches else 0)
+
+    monkeypatch.setattr(pipeline, "run_graph_many", run_graph_many)
+    monkeypatch.setattr(pipeline, "two_tier_clean", two_tier_clean)
+    return calls
+
+
+def run(tmp_path):
+    job = pipeline.Job(keywords="beef", business_type="insurance", niches=["grills", "diners"])
+    return pipeline.run_jobs([job], out_dir=str(tmp_path), workers=1)[0]
+
+
+def test_failed_niches_are_not_checkpointed_and_retried(monkeypatch, tmp_path):
+    failing = {"diners"}
+    calls = fake_stages(monkeypatch, failing, set())
+    summary = run(tmp_path)
+    assert summary["status"] == "partial" and summary["incomplete"] == {"companies": ["diners"]}
+    assert summary["matching"] == {"grills": {"exact": 1}, "diners": {}}
+    failing.clear()
+    summary = run(tmp_path)
+    assert summary["status"] == "done" and "incomplete" not in summary
+    assert summary["stages"]["collect"] == "checkpoint" and summary["stages"]["niches"] == "checkpoint"
+    assert calls["companies"] == [["grills", "diners"]] * 2 and summary["companies"] == 2
+    assert run(tmp_path)["stages"]["clean"] == "checkpoint"
+
+
+def test_unclassified_chunks_are_retried(monkeypatch, tmp_path):
+    unclassified = {"grills"}
+    calls = fake_stages(monkeypatch, set(), unclassified)
+    assert run(tmp_path)["incomplete"] == {"clean": ["grills"]}
+    unclassified.clear()
+    summary = run(tmp_path)
+    assert summary["status"] == "done" and summary["stages"]["enrich"] == "checkpoint"
+    assert calls["clean"] == ["grills", "diners"] * 2
@@ -0,0 +1,66 @@
+import pandas as pd
+
+import relevance_prefilter
+from relevance_prefilter import term_coverage, two_tier_clean
+
+COMPANIES = pd.DataFrame({
+    "UUID": [f"u{i}" for i in range(6)],
+    "SHORT_DESCRIPTION": ["Premium steakhouse and grill", "Steakhouse chain", "Family restaurant with grill",
+                          "Dry-aged beef restaurant", "Bicycle repair shop", "Payroll software"],
+})
+
+
+def fake_llm(accepted_uuids):
+    """Stand in for iter_clean_company_list: classifies every row, accepting `accepted_uuids`."""
+    sent = []
+
+    def classify(company_df, niche, classified_uuids=None, **kwargs):
+        sent.extend(company_df["UUID"])
+        classified_uuids.update(company_df["UUID"])
+        yield company_df[company_df["UUID"].isin(accepted_uuids)]
+
+    classify.sent = sent
+    return classify
+
+
+def test_zero_overlap_rows_go_to_the_llm_by_default(monkeypatch):
+    # The LLM knows a dry-aged beef restaurant is a steakhouse although it shares no term with the niche
+    llm = fake_llm({"u0", "u1", "u3"})
+    monkeypatch.setattr(relevance_prefilter, "iter_clean_company_list", llm)
+    relevant, report = two_tier_clean(COMPANIES, "steakhouse")
+    assert set(relevant["UUID"]) == {"u0", "u1", "u3"}
+    assert report.auto_accepted == 2 and report.auto_rejected == 0  # Every description naming the niche
+    assert {"u2", "u3", "u4", "u5"} <= set(llm.sent)
+
+
+def test_audit_measures_agreement_on_zero_overlap_rejections(monkeypatch):
+    llm = fake_llm({"u0", "u1", "u3"})
+    monkeypatch.setattr(relevance_prefilter, "iter_clean_company_list", llm)
+    relevant, report = two_tier_clean(COMPANIES, "steakhouse", reject_threshold=0.05, audit_fraction=1.0)
+    assert set(relevant["UUID"]) == {"u0", "u1"}  # Audits measure, they do not change decisions
+    assert report.auto_rejected == 4 and set(llm.sent) == set(COMPANIES["UUID"])
+    assert report.audited == 6 and report.agreement_rate == 5 / 6  # All but the rejected u3
+    assert "agreed with 83% of 6 audited" in report.describe()
+    assert report.as_dict()["agreement_rate"] == 0.833
+
+
+def test_default_audit_covers_at_least_one_automatic_decision(monkeypatch):
+    monkeypatch.setattr(relevance_prefilter, "iter_clean_company_list", fake_llm(set()))
+    _, report = two_tier_clean(COMPANIES, "steakhouse")
+    assert report.audited == 1 and report.agreement_rate is not None
+    _, report = two_tier_clean(COMPANIES, "steakhouse", audit_fraction=0)
+    assert report.audited == 0 and "agreed" not in report.describe()
+
+
+def test_rows_of_failed_chunks_are_counted_as_unclassified(monkeypatch):
+    def failing(company_df, niche, classified_uuids=None, **kwargs):
+        return iter(())
+
+    monkeypatch.setattr(relevance_prefilter, "iter_clean_company_list", failing)
+    _, report = two_tier_clean(COMPANIES, "steakhouse", audit_fraction=0)
+    assert report.unclassified == report.sent_to_llm > 0
+
+
+def test_term_coverage():
+    coverage = term_coverage(COMPANIES["SHORT_DESCRIPTION"], "Premium Steakhouses")
+    assert list(coverage) == [1.0, 0.5, 0.0, 0.0, 0.0, 0.0]
@@ -0,0 +1,138 @@
+import threading
+import time
+
+import pytest
+
+import result_store
+from job_queue import CANCELLED, DONE, JobQueue
+from result_store import ResultStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(directory=str(tmp_path / "results"))
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def start_call(store, compute, started):
+    """get_or_compute(`compute`) on another thread once `started` holds; returns (thread, outcome list)."""
+    outcome = []
+
+    def run():
+        try:
+            outcome.append(store.get_or_compute("key", compute))
+        except BaseException as e:  # Includes KeyboardInterrupt, which would otherwise end the thread silently
+            outcome.append(e)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    wait_for(started)
+    return thread, outcome
+
+
+def start_owner(store, compute):
+    return start_call(store, compute, lambda: store.is_running("key"))
+
+
+def start_waiter(store, compute):
+    joined = store.stats["joined"]
+    return start_call(store, compute, lambda: store.stats["joined"] > joined)
+
+
+def test_results_survive_a_new_store(store):
+    store.put("key", {"niches": [1, 2]})
+    assert ResultStore(directory=store.directory).get_or_compute("key", lambda: 1 / 0) == ({"niches": [1, 2]}, "disk")
+    assert store.get_or_compute("key", lambda: 1 / 0) == ({"niches": [1, 2]}, "memory")
+
+
+def test_concurrent_callers_share_one_computation(store):
+    release = threading.Event()
+    thread, outcome = start_owner(store, lambda: release.wait() and "result")
+    waiter, joined = start_waiter(store, lambda: 1 / 0)
+    release.set()
+    thread.join(), waiter.join()
+    assert outcome == [("result", "computed")] and joined == [("result", "joined")]
+    assert store.stats["misses"] == 1
+
+
+def test_failure_reaches_waiters_and_is_not_stored(store):
+    release = threading.Event()
+
+    def fail():
+        release.wait()
+        raise ValueError("boom")
+
+    thread, outcome = start_owner(store, fail)
+    waiter, joined = start_waiter(store, lambda: 1 / 0)
+    release.set()
+    thread.join(), waiter.join()
+    assert isinstance(outcome[0], ValueError) and isinstance(joined[0], ValueError)
+    assert store.get("key") is None
+
+
+def test_waiter_takes_over_when_the_owner_is_interrupted(store):
+    release = threading.Event()
+
+    def interrupted():
+        release.wait()
+        raise KeyboardInterrupt
+
+    thread, outcome = start_owner(store, interrupted)
+    waiter, joined = start_waiter(store, lambda: "recomputed")
+    release.set()
+    thread.join(), waiter.join()
+    assert isinstance(outcome[0], KeyboardInterrupt)
+    assert joined == [("recomputed", "computed")]
+    assert not store.is_running("key")
+
+
+def test_cancelling_one_job_does_not_cancel_the_jobs_joined_to_it(store):
+    queue = JobQueue(stage_workers={"llm": 2})
+    release = threading.Event()
+
+    def fetch(ctx):
+        return store.get_or_compute("key", lambda: ctx.run("llm", lambda: release.wait(5) and "result"))
+
+    alice = queue.submit("fetch", fetch, owner="alice")
+    wait_for(lambda: store.is_running("key"))
+    bob = queue.submit("fetch", fetch, owner="bob")
+    wait_for(lambda: store.stats["joined"] == 1)
+    queue.cancel(alice)
+    wait_for(lambda: queue.get(alice).finished)
+    release.set()
+    wait_for(lambda: queue.get(bob).finished)
+    queue.shutdown()
+    assert queue.get(alice).status == CANCELLED
+    assert queue.get(bob).status == DONE and queue.get(bob).result == ("result", "computed")
+
+
+def test_owner_rechecks_the_store_before_computing(store, monkeypatch):
+    lookup = store._lookup
+
+    def stored_meanwhile(key):
+        # Another owner finishes between this caller's lookup and it taking ownership
+        monkeypatch.setattr(store, "_lookup", lookup)
+        store.put(key, "stored")
+        return None, "disk"
+
+    monkeypatch.setattr(store, "_lookup", stored_meanwhile)
+    assert store.get_or_compute("key", lambda: 1 / 0) == ("stored", "memory")
+    assert store.stats["misses"] == 0
+
+
+def test_disk_hit_survives_a_failing_touch(store, monkeypatch):
+    store.put("key", "value")
+    fresh = ResultStore(directory=store.directory)
+
+    def read_only(path, *args, **kwargs):
+        raise PermissionError(path)
+
+    monkeypatch.setattr(result_store.os, "utime", read_only)
+    assert fresh.get("key") == "value"
+
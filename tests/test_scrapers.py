@@ -0,0 +1,61 @@
+import httpx
+import pytest
+
+import scrapers
+from benchmarks.fixtures import make_nitter_page, nitter_cursor
+
+CHALLENGE_PAGE = b"<html><body><h1>Checking your browser</h1><script>challenge()</script></body></html>"
+
+
+@pytest.fixture
+def browser_calls(monkeypatch):
+    """Stand in for Chrome; records the keywords that fell back to it."""
+    calls = []
+    monkeypatch.setattr(scrapers, "scrape_nitter_browser",
+                        lambda keyword, max_tweets, progress: calls.append(keyword) or ["from browser"])
+    return calls
+
+
+def serve(monkeypatch, pages):
+    """Answer Nitter requests from {cursor (None for the first page): (status, body)}."""
+    def handler(request):
+        status, body = pages[request.url.params.get("cursor")]
+        return httpx.Response(status, content=body)
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(scrapers, "get_http_client", lambda: client)
+    monkeypatch.setattr(scrapers, "NITTER_INSTANCE", "http://nitter.test")
+    monkeypatch.setattr(scrapers.nitter_rate_limiter, "min_interval", 0)
+
+
+def test_parse_nitter_page_reads_tweets_and_cursor():
+    tweets, next_params = scrapers.parse_nitter_page(make_nitter_page("beef", tweets=3, page=1, pages=3))
+    assert len(tweets) == 3
+    assert all(tweet.endswith("#beef") for tweet in tweets)
+    assert next_params == f"?f=tweets&q=beef+usa&cursor={nitter_cursor(2)}"
+
+
+def test_parse_nitter_page_without_timeline_needs_browser():
+    with pytest.raises(scrapers.NitterNeedsBrowser):
+        scrapers.parse_nitter_page(CHALLENGE_PAGE)
+
+
+def test_scrape_nitter_follows_cursors(monkeypatch, browser_calls):
+    serve(monkeypatch, {cursor: (200, make_nitter_page("beef", 20, page=page, pages=3))
+                        for page, cursor in enumerate([None, nitter_cursor(1), nitter_cursor(2)])})
+    assert len(scrapers.scrape_nitter("beef", max_tweets=45)) == 45
+    assert len(scrapers.scrape_nitter("beef", max_tweets=100)) == 60
+    assert browser_calls == []
+
+
+def test_scrape_nitter_keeps_tweets_when_a_later_page_is_a_challenge(monkeypatch, browser_calls):
+    serve(monkeypatch, {None: (200, make_nitter_page("beef", 20, page=0, pages=2)),
+                        nitter_cursor(1): (200, CHALLENGE_PAGE)})
+    assert len(scrapers.scrape_nitter("beef", max_tweets=40)) == 20
+    assert browser_calls == []
+
+
+def test_scrape_nitter_falls_back_to_browser_for_a_challenge_first_page(monkeypatch, browser_calls):
+    serve(monkeypatch, {None: (503, CHALLENGE_PAGE)})
+    assert scrapers.scrape_nitter("beef") == ["from browser"]
+    assert browser_calls == ["beef"]
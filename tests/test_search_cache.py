@@ -0,0 +1,61 @@
+import threading
+import time
+
+from search_cache import FakeSearchProvider, SearchCache, normalize_query
+
+RESULTS = [{"url": "https://example.com", "content": "Steakhouse chains in the USA"}]
+
+
+class BlockingProvider(FakeSearchProvider):
+    """FakeSearchProvider whose calls wait for `release`, so concurrent callers overlap."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.release = threading.Event()
+
+    def invoke(self, query):
+        self.release.wait(5)
+        return super().invoke(query)
+
+
+def test_normalize_query():
+    assert normalize_query(' "Steakhouse  Chains" ') == "steakhouse chains"
+    assert normalize_query("steakhouse’s chains") == normalize_query("steakhouse s chains")
+
+
+def test_normalized_queries_share_one_entry(tmp_path):
+    provider = FakeSearchProvider({"steakhouse chains": RESULTS})
+    cache = SearchCache(provider, path=str(tmp_path / "search.sqlite"))
+    assert cache.invoke('"Steakhouse chains"') == RESULTS
+    assert cache.invoke("steakhouse   CHAINS") == RESULTS
+    assert provider.calls == ["Steakhouse chains"]
+    # Persisted: a new cache on the same store does not call the backend
+    assert SearchCache(provider, path=str(tmp_path / "search.sqlite")).invoke("steakhouse chains") == RESULTS
+    assert len(provider.calls) == 1
+
+
+def test_failures_reported_as_strings_are_not_cached(tmp_path):
+    provider = FakeSearchProvider(default="HTTPError('429 Too Many Requests')")
+    cache = SearchCache(provider, path=str(tmp_path / "search.sqlite"))
+    assert cache.invoke("beef prices") == provider.default
+    provider.default = RESULTS
+    assert cache.invoke("beef prices") == RESULTS
+    assert len(provider.calls) == 2
+
+
+def test_concurrent_identical_queries_make_one_call(tmp_path):
+    provider = BlockingProvider({"beef prices": RESULTS})
+    cache = SearchCache(provider, path=str(tmp_path / "search.sqlite"))
+    results = []
+    threads = [threading.Thread(target=lambda query=query: results.append(cache.invoke(query)))
+               for query in ["beef prices", "Beef Prices", '"beef prices"']]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while cache.coalesced < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    provider.release.set()
+    for thread in threads:
+        thread.join()
+    assert results == [RESULTS] * 3
+    assert len(provider.calls) == 1 and cache.stats()["coalesced"] == 2
@@ -0,0 +1,50 @@
+import functools
+import json
+import logging
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding(name):
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        # tiktoken downloads its BPE files on first use; estimate when that is not possible
+        logging.warning(f"tiktoken encoding {name} unavailable, estimating token counts: {e}")
+        return None
+
+
+def count_tokens(value, encoding="o200k_base"):
+    """Count the tokens of a string (or of the JSON form of any other value)."""
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+    enc = _encoding(encoding)
+    if enc is None:
+        return len(text) // 4 + 1
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def chunk_by_tokens(items, max_tokens, max_items=None, cost=count_tokens):
+    """
+    Split items into consecutive chunks that stay under a token budget.
+
+    An item larger than the budget gets a chunk of its own.
+
+    Args:
+        items (iterable): Items to split.
+        max_tokens (int): Token budget per chunk.
+        max_items (int): Optional maximum number of items per chunk.
+        cost (callable): Token cost of one item.
+
+    Yields:
+        list: Chunks of items.
+    """
+    chunk, used = [], 0
+    for item in items:
+        tokens = cost(item)
+        if chunk and (used + tokens > max_tokens or (max_items and len(chunk) >= max_items)):
+            yield chunk
+            chunk, used = [], 0
+        chunk.append(item)
+        used += tokens
+    if chunk:
+        yield chunk
@@ -0,0 +1,262 @@
+"""
+Lightweight span tracing for the pipeline stages.
+
+Spans are only recorded inside an active trace(), and a trace is only active when
+tracing is enabled (MARKETMUSE_TRACE=1 or enable()). Outside of one, span() returns a
+shared no-op object, so instrumented code costs one ContextVar lookup.
+
+    with trace("fetch") as run:
+        with span("news", keywords=3) as s:
+            ...
+            s.set(rows=120)
+    waterfall(run.spans)
+
+Finished traces are appended to a JSONL file, one span per line, using OpenTelemetry
+field names; to_otlp() converts them to an OTLP/JSON export.
+"""
+import contextvars
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_TRACE_PATH = os.path.join(".cache", "traces.jsonl")
+
+_enabled = os.environ.get("MARKETMUSE_TRACE", "").lower() in ("1", "true", "yes")
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+_write_lock = threading.Lock()
+
+
+def enable(on=True):
+    """Turn tracing on or off for traces started from now on."""
+    global _enabled
+    _enabled = on
+
+
+def is_enabled():
+    return _enabled
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    def __init__(self, trace_record, name, attributes):
+        self.trace = trace_record
+        self.name = name
+        self.attributes = dict(attributes)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = None
+        self.start_ns = self.end_ns = 0
+        self.status = "OK"
+        self._token = None
+
+    def set(self, **attributes):
+        """Attach attributes (row counts, token counts, cache hits...) to the span."""
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent is not None else None
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        if exc_type is not None:
+            self.status = "ERROR"
+            self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self.trace.add(self)
+        return False
+
+    def as_dict(self):
+        return {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "status": self.status,
+            "thread": threading.current_thread().name,
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """Spans of one run; thread-safe, since workers add spans concurrently."""
+
+    def __init__(self, name):
+        self.name = name
+        self.trace_id = secrets.token_hex(16)
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, finished):
+        record = finished.as_dict()
+        with self._lock:
+            self.spans.append(record)
+
+
+def span(name, **attributes):
+    """Context manager timing a stage or sub-call; a no-op outside an active trace."""
+    trace_record = _current_trace.get()
+    if trace_record is None:
+        return NOOP_SPAN
+    return Span(trace_record, name, attributes)
+
+
+def current_span():
+    """The innermost open span, or the no-op span, for attaching attributes from nested code."""
+    return _current_span.get() or NOOP_SPAN
+
+
+@contextmanager
+def trace(name, enabled=None, path=DEFAULT_TRACE_PATH, **attributes):
+    """
+    Start a trace with a root span; when it ends its spans are appended to `path`.
+
+    Yields:
+        Trace: The trace (its spans list fills up as spans finish), or None when tracing is off.
+    """
+    if not (_enabled if enabled is None else enabled):
+        yield None
+        return
+    trace_record = Trace(name)
+    trace_token = _current_trace.set(trace_record)
+    span_token = _current_span.set(None)
+    try:
+        with Span(trace_record, name, attributes):
+            yield trace_record
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        if path:
+            export_jsonl(trace_record.spans, path)
+
+
+def bind(fn):
+    """Wrap a callable so it runs in the caller's trace context, e.g. before executor.submit."""
+    if _current_trace.get() is None:
+        return fn
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+def export_jsonl(spans, path=DEFAULT_TRACE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with _write_lock, open(path, "a", encoding="utf-8") as file:
+        for record in spans:
+            file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    logging.info(f"Trace with {len(spans)} spans written to {path}")
+
+
+def read_traces(path=DEFAULT_TRACE_PATH):
+    """Read a trace file back as {trace id: [spans]}, in file order."""
+    traces = {}
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                traces.setdefault(record["traceId"], []).append(record)
+    return traces
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans, service_name="marketmuse"):
+    """Convert span records to an OTLP/JSON ExportTraceServiceRequest."""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+        "scopeSpans": [{
+            "scope": {"name": "marketmuse.tracing"},
+            "spans": [{
+                "traceId": record["traceId"],
+                "spanId": record["spanId"],
+                "parentSpanId": record["parentSpanId"] or "",
+                "name": record["name"],
+                "kind": 1,
+                "startTimeUnixNano": str(record["startTimeUnixNano"]),
+                "endTimeUnixNano": str(record["endTimeUnixNano"]),
+                "attributes": [{"key": key, "value": _otlp_value(value)}
+                               for key, value in record["attributes"].items()],
+                "status": {"code": 2 if record["status"] == "ERROR" else 1},
+            } for record in spans],
+        }],
+    }]}
+
+
+def waterfall(spans):
+    """
+    Tabulate spans for a waterfall chart: one row per span, ordered by start.
+
+    Returns:
+        pd.DataFrame: name, depth, start_s and end_s (seconds from the trace start),
+            duration_s, status and attributes.
+    """
+    import pandas as pd
+
+    if not spans:
+        return pd.DataFrame(columns=["name", "depth", "start_s", "end_s", "duration_s", "status", "attributes"])
+    parents = {record["spanId"]: record["parentSpanId"] for record in spans}
+
+    def depth(span_id):
+        level = 0
+        while parents.get(span_id):
+            span_id, level = parents[span_id], level + 1
+        return level
+
+    origin = min(record["startTimeUnixNano"] for record in spans)
+    rows = [{
+        "name": record["name"],
+        "depth": depth(record["spanId"]),
+        "start_s": (record["startTimeUnixNano"] - origin) / 1e9,
+        "end_s": (record["endTimeUnixNano"] - origin) / 1e9,
+        "duration_s": (record["endTimeUnixNano"] - record["startTimeUnixNano"]) / 1e9,
+        "status": record["status"],
+        "attributes": json.dumps(record["attributes"], default=str),
+    } for record in spans]
+    return pd.DataFrame(rows).sort_values("start_s", kind="stable").reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize or convert a trace file.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_TRACE_PATH)
+    parser.add_argument("--otlp", help="write the last trace as OTLP/JSON to this file")
+    args = parser.parse_args()
+
+    traces = read_traces(args.path)
+    if not traces:
+        raise SystemExit(f"No traces in {args.path}")
+    last = list(traces.values())[-1]
+    print(waterfall(last)[["name", "depth", "start_s", "duration_s", "status"]].to_string(index=False))
+    if args.otlp:
+        with open(args.otlp, "w", encoding="utf-8") as file:
+            json.dump(to_otlp(last), file, indent=2)